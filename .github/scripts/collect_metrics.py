@@ -1,16 +1,32 @@
+import argparse
 import os  
+import re
 import sys  
 import pandas as pd  
-from github import Github, GithubException, UnknownObjectException # Added UnknownObjectException  
+import pyarrow.parquet as pq
 from datetime import datetime, timedelta, timezone # Added timezone  
 import time  
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from github_rest import GITHUB_API_URL, ConditionalRestClient, EndpointStats, RateLimitScheduler, create_session
+from http_cache import HttpCache
+from metrics_dataset import COMPACTED_PREFIX, append_day, compact_months
+from metrics_schema import metrics_dataframe, metrics_table
+from metrics_state import MetricsState
+
+
+def parse_github_time(value):
+    """Parse a GitHub ISO 8601 timestamp ('2024-01-01T00:00:00Z') into an aware datetime."""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
 
 
 # --- GraphQL Helper ---  
-def run_graphql_query(token, query, variables=None):  
-    """Runs a GraphQL query against the GitHub API."""  
+def run_graphql_query(token, query, variables=None, client=None):  
+    """Runs a GraphQL query against the GitHub API, through `client`'s session and rate limits if given."""  
     graphql_url = "https://api.github.com/graphql"  
     headers = {  
         "Authorization": f"bearer {token}",  
@@ -21,7 +37,10 @@ def run_graphql_query(token, query, variables=None):
         payload["variables"] = variables  
 
     try:  
-        response = requests.post(graphql_url, headers=headers, json=payload, timeout=30) # Added timeout  
+        if client:  
+            response = client.post_graphql(payload)  
+        else:  
+            response = requests.post(graphql_url, headers=headers, json=payload, timeout=30) # Added timeout  
         response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)  
 
         json_response = response.json()  
@@ -45,507 +64,469 @@ def run_graphql_query(token, query, variables=None):
          return None  
 
   
+def run_search_counts(token, searches, client=None):  
+    """Counts several GitHub searches with a single GraphQL request.  
+
+    `searches` maps an alias to a (search query, search type) pair, where the type is ISSUE  
+    (issues and PRs) or DISCUSSION. Every entry becomes one aliased `search` field, so the  
+    counts are computed server-side and the cost does not depend on how many items match.  
+    Returns a dict of alias -> count, or None if the query failed.  
+    """  
+    declarations, fields, variables = [], [], {}  
+    for alias, (search_query, search_type) in searches.items():  
+        count_field = "discussionCount" if search_type == "DISCUSSION" else "issueCount"  
+        declarations.append(f"${alias}: String!")  
+        fields.append(f"{alias}: search(query: ${alias}, type: {search_type}, first: 0) {{ {count_field} }}")  
+        variables[alias] = search_query  
+    query = f"query({', '.join(declarations)}) {{\n  " + "\n  ".join(fields) + "\n}"  
+
+    data = run_graphql_query(token, query, variables, client)  
+    if data is None:  
+        return None  
+    try:  
+        return {alias: next(iter(data[alias].values())) for alias in searches}  
+    except (KeyError, TypeError, StopIteration) as e:  
+        print(f"Warning: Could not extract search counts from GraphQL response: {e}. Response: {data}")  
+        return None  
+  
 # --- Configuration ---  
 token = os.getenv("GITHUB_TOKEN")  
-repo_name = os.getenv("GITHUB_REPOSITORY") # Format: 'owner/repo'  
 lookback_days = 1 # Define the period for "new" items (e.g., last 1 day)  
 output_filename = f"github_metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet"  
-max_retries = 3 # Retries for API calls that might need time  
+max_retries = 9 # Polls of API calls that might need time (contributor stats)  
+stats_poll_seconds = 10 # Polled in the background while the other families run  
+max_concurrent_requests = 8 # GitHub's secondary limits discourage many concurrent requests  
+max_concurrent_repositories = 4 # Repositories collected in parallel (multi-repository mode)  
+# Cursors, windows and ETags carried over between runs, one file per repository (restored/saved by the workflow cache)  
+state_dir = os.getenv("METRICS_STATE_DIR", ".metrics_state")  
+# GitHub Actions sets both; point them at mock_github_server.py to run offline  
+api_url = os.getenv("GITHUB_API_URL", GITHUB_API_URL)  
+graphql_url = os.getenv("GITHUB_GRAPHQL_URL", f"{api_url}/graphql")  
+# Append-only history: date=YYYY-MM-DD/ partitions, completed months compacted (local path, file:// or s3:// URI)  
+dataset_uri = os.getenv("METRICS_DATASET_URI")  
+# Re-read this much before each cursor, for items that become visible late; duplicates are dropped by ID  
+cursor_overlap = timedelta(minutes=10)  
+  
+  
+def parse_arguments():  
+    parser = argparse.ArgumentParser(  
+        description="Collect GitHub metrics into a Parquet table, one row per repository. "  
+                    "Defaults to the single repository in GITHUB_REPOSITORY.")  
+    parser.add_argument("--repos", nargs="+", default=os.getenv("METRICS_REPOSITORIES", "").split(),  
+                        help="Repositories to collect, as owner/repo (env: METRICS_REPOSITORIES, space separated)")  
+    parser.add_argument("--org", default=os.getenv("METRICS_ORG"),  
+                        help="Collect every repository of this organization (env: METRICS_ORG)")  
+    parser.add_argument("--match", default=os.getenv("METRICS_REPO_MATCH"),  
+                        help="With --org, only repositories whose name matches this regex, e.g. 'llama-stack'")  
+    parser.add_argument("--include-archived", action="store_true", help="With --org, also collect archived repositories")  
+    return parser.parse_args()  
+  
+  
+def resolve_repositories(args, rest):  
+    if args.repos:  
+        return args.repos  
+    if args.org:  
+        repos = [r for r in rest.paginate(f"orgs/{args.org}/repos", {"type": "all"})  
+                 if args.include_archived or not r.get('archived')]  
+        return sorted(r['full_name'] for r in repos if not args.match or re.search(args.match, r['name']))  
+    repo_name = os.getenv("GITHUB_REPOSITORY") # Format: 'owner/repo'  
+    return [repo_name] if repo_name else []  
+  
   
 # --- Input Validation ---  
+args = parse_arguments()  
 if not token:  
     print("Error: GITHUB_TOKEN environment variable not set.")  
     sys.exit(1)  
-if not repo_name:  
-    print("Error: GITHUB_REPOSITORY environment variable not set.")  
-    sys.exit(1)  
-  
-print(f"Starting metrics collection for repository: {repo_name}")  
-print(f"Lookback period for 'new' items: {lookback_days} day(s)")  
   
 # --- GitHub API Connection ---  
+# One connection pool and one rate-limit budget, shared by every repository and metric family  
+session = create_session(pool_size=max_concurrent_requests)  
+scheduler = RateLimitScheduler(max_concurrent=max_concurrent_requests)  
+http_cache = HttpCache(os.path.join(state_dir, "http"))  
+  
+  
+def new_client():  
+    return ConditionalRestClient(token, http_cache, api_url=api_url, graphql_url=graphql_url,  
+                                 scheduler=scheduler, session=session)  
+  
+  
+listing_rest = new_client()  
 try:  
-    g = Github(token, retry=5, timeout=15) # Added retry and timeout to Github object  
-    repo = g.get_repo(repo_name)  
-    print("Successfully connected to GitHub API.")  
-except GithubException as e:  
-    print(f"Error connecting to GitHub API or getting repository: {e}")  
+    repositories = resolve_repositories(args, listing_rest)  
+except requests.exceptions.RequestException as e:  
+    print(f"Error listing repositories of organization {args.org}: {e}")  
+    sys.exit(1)  
+if not repositories:  
+    print("Error: no repositories to collect. Set GITHUB_REPOSITORY, or pass --repos or --org.")  
     sys.exit(1)  
   
+print(f"Starting metrics collection for {len(repositories)} repository(ies): {', '.join(repositories)}")  
+print(f"Lookback period for 'new' items: {lookback_days} day(s)")  
+  
 # --- Define Cutoff Time (UTC) ---  
+run_started_at = datetime.now(timezone.utc)  
 # Use timezone-aware datetime object for 'since' parameter  
-cutoff_datetime_aware = datetime.now(timezone.utc) - timedelta(days=lookback_days)  
-# Use naive datetime for simple comparisons if needed (e.g., fork creation)  
-cutoff_datetime_naive = datetime.utcnow() - timedelta(days=lookback_days)  
+cutoff_datetime_aware = run_started_at - timedelta(days=lookback_days)  
 print(f"Calculating 'new' items since: {cutoff_datetime_aware}")  
   
   
-# --- Data Collection ---  
-metrics = {}  
-metrics['timestamp_utc'] = datetime.now(timezone.utc) # Store timezone-aware timestamp  
-metrics['repository_name'] = repo.full_name  
+class RepositoryRun:  
+    """What the metric families of one repository share: its name, API client, checkpoint and /repos data."""  
   
-print("\nFetching standard repository metrics...")  
-try:  
-    # Standard Attributes  
-    metrics['stars'] = repo.stargazers_count  
-    metrics['watchers'] = repo.subscribers_count  
-    metrics['forks_total'] = repo.forks_count # Renamed for clarity  
-    metrics['open_issues_total'] = repo.open_issues_count # Renamed for clarity  
-    metrics['network_count'] = repo.network_count  
-    metrics['size_kb'] = repo.size  
-    metrics['language'] = repo.language  
-    metrics['created_at_utc'] = repo.created_at  
-    metrics['pushed_at_utc'] = repo.pushed_at  
-    metrics['archived'] = repo.archived  
-    metrics['disabled'] = repo.disabled  
-    metrics['has_issues'] = repo.has_issues  
-    metrics['has_projects'] = repo.has_projects  
-    metrics['has_wiki'] = repo.has_wiki  
-    metrics['has_pages'] = repo.has_pages  
-    metrics['has_downloads'] = repo.has_downloads  
-    metrics['has_discussions'] = repo.has_discussions # Added check for discussions  
-    metrics['license'] = repo.get_license().license.spdx_id if repo.license else None  
-  
-    # List Counts  
-    metrics['contributors_count_total'] = repo.get_contributors().totalCount  
-    metrics['releases_count_total'] = repo.get_releases().totalCount  
-  
-except GithubException as e:  
-    print(f"Warning: Could not fetch some standard metrics: {e}")  
-    # Initialize potentially missed metrics  
-    standard_keys = ['stars', 'watchers', 'forks_total', 'open_issues_total', 'network_count', 'size_kb',  
-                     'language', 'created_at_utc', 'pushed_at_utc', 'archived', 'disabled', 'has_issues',  
-                     'has_projects', 'has_wiki', 'has_pages', 'has_downloads', 'has_discussions', 'license',  
-                     'contributors_count_total', 'releases_count_total']  
-    for key in standard_keys:  
-        if key not in metrics: metrics[key] = None  
+    def __init__(self, repo_name, rest, state, repo_data):  
+        self.repo_name = repo_name  
+        self.rest = rest  
+        self.state = state  
+        self.repo_data = repo_data  
+  
+    def log(self, message):  
+        print(f"[{self.repo_name}] {message}")  
+  
+  
+def collect_standard_metrics(run):  
+    metrics = {}  
+    run.log("Fetching standard repository metrics...")  
+    try:  
+        # Standard Attributes (from the conditional /repos response above)  
+        metrics['stars'] = run.repo_data.get('stargazers_count')  
+        metrics['watchers'] = run.repo_data.get('subscribers_count')  
+        metrics['forks_total'] = run.repo_data.get('forks_count') # Renamed for clarity  
+        metrics['open_issues_total'] = run.repo_data.get('open_issues_count') # Renamed for clarity  
+        metrics['network_count'] = run.repo_data.get('network_count')  
+        metrics['size_kb'] = run.repo_data.get('size')  
+        metrics['language'] = run.repo_data.get('language')  
+        metrics['created_at_utc'] = parse_github_time(run.repo_data.get('created_at'))  
+        metrics['pushed_at_utc'] = parse_github_time(run.repo_data.get('pushed_at'))  
+        metrics['archived'] = run.repo_data.get('archived')  
+        metrics['disabled'] = run.repo_data.get('disabled')  
+        metrics['has_issues'] = run.repo_data.get('has_issues')  
+        metrics['has_projects'] = run.repo_data.get('has_projects')  
+        metrics['has_wiki'] = run.repo_data.get('has_wiki')  
+        metrics['has_pages'] = run.repo_data.get('has_pages')  
+        metrics['has_downloads'] = run.repo_data.get('has_downloads')  
+        metrics['has_discussions'] = run.repo_data.get('has_discussions') # Added check for discussions  
+        metrics['license'] = (run.repo_data.get('license') or {}).get('spdx_id')  
+  
+        # List Counts (one per_page=1 request each, read from the 'last' page link)  
+        metrics['contributors_count_total'] = run.rest.count(f"repos/{run.repo_name}/contributors")  
+        metrics['releases_count_total'] = run.rest.count(f"repos/{run.repo_name}/releases")  
+  
+    except requests.exceptions.RequestException as e:  
+        run.log(f"Warning: Could not fetch some standard metrics: {e}")  
+        # Initialize potentially missed metrics  
+        standard_keys = ['stars', 'watchers', 'forks_total', 'open_issues_total', 'network_count', 'size_kb',  
+                         'language', 'created_at_utc', 'pushed_at_utc', 'archived', 'disabled', 'has_issues',  
+                         'has_projects', 'has_wiki', 'has_pages', 'has_downloads', 'has_discussions', 'license',  
+                         'contributors_count_total', 'releases_count_total']  
+        for key in standard_keys:  
+            if key not in metrics: metrics[key] = None  
+    return metrics  
   
   
 # --- Calculated Metrics: "New" Forks (Last Period) ---  
-print(f"\nCalculating new forks in the last {lookback_days} day(s)...")  
-new_forks_count = 0  
-try:  
-    # Iterate through forks - PaginatedList handles pagination  
-    for fork in repo.get_forks():  
-        # Compare naive UTC datetimes  
-        if fork.created_at.replace(tzinfo=None) >= cutoff_datetime_naive:  
-             new_forks_count += 1  
-        else:  
-            # Forks are sorted newest first, so we can stop early  
-            break  
-    metrics['forks_new_last_period'] = new_forks_count  
-    print(f"Found {new_forks_count} new forks.")  
-except GithubException as e:  
-    print(f"Warning: Could not calculate new forks: {e}")  
-    metrics['forks_new_last_period'] = None  
+def collect_forks(run):  
+    run.log(f"Calculating new forks in the last {lookback_days} day(s)...")  
+    try:  
+        # Only walk forks created after the cursor; forks are sorted newest first, so we can stop early.  
+        # The first page is a conditional request, so a day without new forks costs no rate limit.  
+        forks_cursor = run.state.cursor('forks', cutoff_datetime_aware)  
+        for fork in run.rest.paginate(f"repos/{run.repo_name}/forks", {"sort": "newest"},  
+                                  stop=lambda f: parse_github_time(f['created_at']) < forks_cursor):  
+            run.state.record('forks_new', fork['id'], parse_github_time(fork['created_at']))  
+        run.state.advance('forks', run_started_at - cursor_overlap)  
+        new_forks_count = run.state.count_since('forks_new', cutoff_datetime_aware)  
+        run.log(f"Found {new_forks_count} new forks.")  
+        return {'forks_new_last_period': new_forks_count}  
+    except requests.exceptions.RequestException as e:  
+        run.log(f"Warning: Could not calculate new forks: {e}")  
+        return {'forks_new_last_period': None}  
   
   
 # --- Calculated Metrics: "New" Contributors (Approximation using stats) ---  
-# Stays the same as the previously corrected version - using weekly stats approximation  
-print(f"\nCalculating recent contributor additions (weekly stats)...")  
-recent_contributor_adds = 0  
-retries = 0  
-stats_contributors = None  
-while retries < max_retries:  
-    try:  
-        stats_contributors = repo.get_stats_contributors()  
-        if stats_contributors is not None: break  
-        else:  
-            print(f"Contributor stats not available yet (Attempt {retries+1}/{max_retries}). Waiting 30 seconds...")  
-            time.sleep(30)  
-            retries += 1  
-    except GithubException as e:  
-        if e.status == 202:  
-            print(f"Contributor stats computing (Attempt {retries+1}/{max_retries}). Waiting 30 seconds...")  
-            time.sleep(30)  
+# Using weekly stats approximation; the conditional request is free while the stats are unchanged.  
+# While GitHub answers 202 (still computing), this family polls in its own worker and the others proceed.  
+def collect_contributor_stats(run):  
+    run.log(f"Calculating recent contributor additions (weekly stats)...")  
+    recent_contributor_adds = 0  
+    retries = 0  
+    stats_contributors = None  
+    while retries < max_retries:  
+        try:  
+            status, stats_contributors, _ = run.rest.get_response(f"repos/{run.repo_name}/stats/contributors")  
+            if status != 202: break  
+            run.log(f"Contributor stats computing (Attempt {retries+1}/{max_retries}). Polling again in {stats_poll_seconds} seconds...")  
+            time.sleep(stats_poll_seconds)  
             retries += 1  
-        elif e.status == 404:  
-            print(f"Warning: Contributor stats API 404: {e}")  
-            stats_contributors = [] # Treat as empty  
+        except requests.exceptions.HTTPError as e:  
+            if e.response is not None and e.response.status_code == 404:  
+                run.log(f"Warning: Contributor stats API 404: {e}")  
+                stats_contributors = [] # Treat as empty  
+            else:  
+                run.log(f"Warning: Could not fetch contributor stats: {e}")  
+                stats_contributors = None  
             break  
-        else:  
-            print(f"Warning: Could not fetch contributor stats: {e}")  
+        except requests.exceptions.RequestException as e:  
+            run.log(f"Warning: Could not fetch contributor stats: {e}")  
             stats_contributors = None  
             break  
   
-if stats_contributors is not None:  
-    cutoff_date_stats_naive = cutoff_datetime_naive # Use naive for comparison consistency  
-    print(f"Cutoff date for contributor stats: {cutoff_date_stats_naive} UTC (comparing week start)")  
+    if stats_contributors is None:  
+        if retries == max_retries: run.log("Warning: Contributor stats could not be retrieved.")  
+        return {'contributors_additions_recent_weeks': None}  
     for stat in stats_contributors:  
-        if not hasattr(stat, 'weeks') or not stat.weeks: continue  
-        for week_stat in stat.weeks:  
-            if not hasattr(week_stat, 'w'): continue  
-            week_start_time = week_stat.w  
-            if isinstance(week_start_time, datetime):  
-                naive_week_start = week_start_time.replace(tzinfo=None)  
-                if naive_week_start >= cutoff_date_stats_naive:  
-                    if hasattr(week_stat, 'a') and isinstance(week_stat.a, int):  
-                        recent_contributor_adds += week_stat.a  
-            else:  
-                 print(f"Warning: Unexpected type for week_stat.w: {type(week_start_time)}. Skipping.")  
-    metrics['contributors_additions_recent_weeks'] = recent_contributor_adds # Changed name slightly  
-    print(f"Found {recent_contributor_adds} contributor additions (approx) based on recent weekly stats.")  
-else:  
-     metrics['contributors_additions_recent_weeks'] = None  
-     if retries == max_retries: print("Warning: Contributor stats could not be retrieved.")  
+        for week_stat in stat.get('weeks') or []:  
+            # 'w' is the start of the week as a Unix timestamp  
+            week_start_time = datetime.fromtimestamp(week_stat.get('w', 0), tz=timezone.utc)  
+            if week_start_time >= cutoff_datetime_aware and isinstance(week_stat.get('a'), int):  
+                recent_contributor_adds += week_stat['a']  
+    run.log(f"Found {recent_contributor_adds} contributor additions (approx) based on recent weekly stats "  
+          f"(week start >= {cutoff_datetime_aware}).")  
+    return {'contributors_additions_recent_weeks': recent_contributor_adds} # Changed name slightly  
   
   
 # --- Traffic Data (Last Day if available) ---  
-print("\nFetching traffic data (views and clones)...")  
-  
-# Define the target date (yesterday in UTC)  
-target_traffic_date_naive = (datetime.utcnow() - timedelta(days=1)).date()  
-print(f"Targeting traffic data for date: {target_traffic_date_naive}")  
-  
-# Initialize metrics for the target date  
-metrics['traffic_views_last_day_total'] = None  
-metrics['traffic_views_last_day_unique'] = None  
-metrics['traffic_clones_last_day_total'] = None  
-metrics['traffic_clones_last_day_unique'] = None  
-  
-# --- Process Views ---  
-found_view_data_for_target = False  
-try:  
-    views_traffic_obj = repo.get_views_traffic(per="day")  
-    # Check if the object and the 'views' list exist and are not empty  
-    if views_traffic_obj and hasattr(views_traffic_obj, 'views') and views_traffic_obj.views:  
-        # Iterate through the list of daily view data  
-        for view_entry in views_traffic_obj.views:  
-            # Check if the entry has a timestamp and it's a datetime object  
-            if hasattr(view_entry, 'timestamp') and isinstance(view_entry.timestamp, datetime):  
-                # Compare the date part of the timestamp with our target date  
-                if view_entry.timestamp.date() == target_traffic_date_naive:  
-                    # Found the data for yesterday!  
-                    metrics['traffic_views_last_day_total'] = getattr(view_entry, 'count', None) # Use getattr for safety  
-                    metrics['traffic_views_last_day_unique'] = getattr(view_entry, 'uniques', None)  
-                    print(f"Found views for {target_traffic_date_naive}: Total={metrics['traffic_views_last_day_total']}, Unique={metrics['traffic_views_last_day_unique']}")  
-                    found_view_data_for_target = True  
-                    break # Stop searching once found  
-            else:  
-                 print(f"Warning: Skipping view entry with missing or invalid timestamp: {view_entry}")  
-  
-        # After checking all entries, if we didn't find the target date  
-        if not found_view_data_for_target:  
-            print(f"Warning: No view data found specifically for target date {target_traffic_date_naive}. Metrics remain None.")  
-            # metrics['traffic_views_last_day_total'] = 0 # Alternative: default to 0 if preferred  
-            # metrics['traffic_views_last_day_unique'] = 0  
-  
-    else:  
-        print("Warning: No daily view data list available or attribute 'views' missing.")  
-        # Metrics remain None as initialized  
-  
-except GithubException as e:  
-    print(f"Warning: Could not fetch views traffic data: {e}")  
-    # Metrics remain None  
-except Exception as e: # Catch other potential errors during processing  
-    print(f"Warning: Error processing view data: {e}")  
-    # Metrics remain None  
-  
-  
-# --- Process Clones ---  
-found_clone_data_for_target = False  
-try:  
-    clones_traffic_obj = repo.get_clones_traffic(per="day")  
-    # Check if the object and the 'clones' list exist and are not empty  
-    if clones_traffic_obj and hasattr(clones_traffic_obj, 'clones') and clones_traffic_obj.clones:  
-        # Iterate through the list of daily clone data  
-        for clone_entry in clones_traffic_obj.clones:  
-             # Check if the entry has a timestamp and it's a datetime object  
-            if hasattr(clone_entry, 'timestamp') and isinstance(clone_entry.timestamp, datetime):  
-                # Compare the date part of the timestamp with our target date  
-                if clone_entry.timestamp.date() == target_traffic_date_naive:  
-                    # Found the data for yesterday!  
-                    metrics['traffic_clones_last_day_total'] = getattr(clone_entry, 'count', None) # Use getattr for safety  
-                    metrics['traffic_clones_last_day_unique'] = getattr(clone_entry, 'uniques', None)  
-                    print(f"Found clones for {target_traffic_date_naive}: Total={metrics['traffic_clones_last_day_total']}, Unique={metrics['traffic_clones_last_day_unique']}")  
-                    found_clone_data_for_target = True  
-                    break # Stop searching once found  
+def collect_traffic(run):  
+    # Define the target date (yesterday in UTC)  
+    target_traffic_date = (run_started_at - timedelta(days=1)).date()  
+    run.log(f"Fetching traffic data (views and clones) for date: {target_traffic_date}")  
+  
+    # Initialize metrics for the target date  
+    metrics = {  
+        'traffic_views_last_day_total': None, 'traffic_views_last_day_unique': None,  
+        'traffic_clones_last_day_total': None, 'traffic_clones_last_day_unique': None,  
+    }  
+    for kind in ('views', 'clones'):  
+        try:  
+            traffic = run.rest.get(f"repos/{run.repo_name}/traffic/{kind}", {"per": "day"}) or {}  
+            # Find the daily entry for the target date  
+            entry = next((e for e in traffic.get(kind) or []  
+                          if parse_github_time(e.get('timestamp')).date() == target_traffic_date), None)  
+            if entry is not None:  
+                metrics[f'traffic_{kind}_last_day_total'] = entry.get('count')  
+                metrics[f'traffic_{kind}_last_day_unique'] = entry.get('uniques')  
+                run.log(f"Found {kind} for {target_traffic_date}: Total={entry.get('count')}, Unique={entry.get('uniques')}")  
             else:  
-                print(f"Warning: Skipping clone entry with missing or invalid timestamp: {clone_entry}")  
+                run.log(f"Warning: No {kind} data found specifically for target date {target_traffic_date}. Metrics remain None.")  
+        except requests.exceptions.RequestException as e:  
+            run.log(f"Warning: Could not fetch {kind} traffic data: {e}")  
+            # Metrics remain None  
+        except Exception as e: # Catch other potential errors during processing  
+            run.log(f"Warning: Error processing {kind} data: {e}")  
+            # Metrics remain None  
+    return metrics  
   
-        # After checking all entries, if we didn't find the target date  
-        if not found_clone_data_for_target:  
-            print(f"Warning: No clone data found specifically for target date {target_traffic_date_naive}. Metrics remain None.")  
-            # metrics['traffic_clones_last_day_total'] = 0 # Alternative: default to 0  
-            # metrics['traffic_clones_last_day_unique'] = 0  
-  
-    else:  
-        print("Warning: No daily clone data list available or attribute 'clones' missing.")  
-        # Metrics remain None as initialized  
-  
-except GithubException as e:  
-    print(f"Warning: Could not fetch clones traffic data: {e}")  
-    # Metrics remain None  
-except Exception as e: # Catch other potential errors during processing  
-    print(f"Warning: Error processing clone data: {e}")  
-    # Metrics remain None  
-   
   
 # --- Referrers and Popular Content Data (Last 14 days) ---  
-print("\nFetching top referrers data (last 14 days)...")  
-top_referrers_data = [] # Initialize empty list  
-try:  
-    top_referrers_list = repo.get_top_referrers()  
-    # Iterate through the PaginatedList of Referrer objects  
-    for r in top_referrers_list:  
-         # Extract relevant data into a dictionary  
-         # Use getattr for safety in case attributes are missing unexpectedly  
-         referrer_dict = {  
-             "referrer": getattr(r, 'referrer', None),  
-             "count": getattr(r, 'count', None),  
-             "uniques": getattr(r, 'uniques', None)  
-         }  
-         top_referrers_data.append(referrer_dict)  
-  
-    metrics['traffic_top_referrers_data'] = top_referrers_data # Store the list of dicts  
-    print(f"Fetched {len(top_referrers_data)} top referrer entries.")  
-  
-except GithubException as e:  
-     print(f"Warning: Could not fetch top referrers: {e}")  
-     metrics['traffic_top_referrers_data'] = None # Set to None on API error  
-except Exception as e: # Catch potential errors during processing the list  
-    print(f"Warning: Error processing referrer data: {e}")  
-    metrics['traffic_top_referrers_data'] = None  
-  
-  
-print("\nFetching top paths data (last 14 days)...")  
-top_paths_data = [] # Initialize empty list  
-try:  
-    top_paths_list = repo.get_top_paths()  
-     # Iterate through the PaginatedList of Path objects  
-    for p in top_paths_list:  
-         # Extract relevant data into a dictionary  
-         path_dict = {  
-             "path": getattr(p, 'path', None),  
-             "title": getattr(p, 'title', None), # Title might not always exist  
-             "count": getattr(p, 'count', None),  
-             "uniques": getattr(p, 'uniques', None)  
-         }  
-         top_paths_data.append(path_dict)  
-  
-    metrics['traffic_top_paths_data'] = top_paths_data # Store the list of dicts  
-    print(f"Fetched {len(top_paths_data)} top path entries.")  
-  
-except GithubException as e:  
-     print(f"Warning: Could not fetch top paths: {e}")  
-     metrics['traffic_top_paths_data'] = None # Set to None on API error  
-except Exception as e: # Catch potential errors during processing the list  
-    print(f"Warning: Error processing path data: {e}")  
-    metrics['traffic_top_paths_data'] = None  
-  
-  
-# --- Issues Opened/Closed Last Period ---  
-print(f"\nCalculating Issues opened/closed in the last {lookback_days} day(s)...")  
-issues_opened_count = 0  
-issues_closed_count = 0  
-issues_comments_count = 0  
-try:  
-    # Issues opened: Use 'since' which filters by creation time  
-    opened_issues = repo.get_issues(state='all', sort='created', since=cutoff_datetime_aware)  
-    for issue in opened_issues:  
-        # Double check creation time (though 'since' should handle it)  
-        # Note: get_issues() returns PRs as well. We need to filter later if needed.  
-        # For now, count all items returned by get_issues as potential "issues" opened.  
-        issues_opened_count += 1  
-  
-    # Issues closed: Need to check closed_at time  
-    # Get recently updated closed issues/PRs  
-    recently_updated_closed_items = repo.get_issues(state='closed', sort='updated', direction='desc', since=cutoff_datetime_aware)  
-    for item in recently_updated_closed_items:  
-        if item.closed_at and item.closed_at >= cutoff_datetime_aware:  
-            # Check if it's actually an Issue (not a PR)  
-            # An item is a PR if it has the 'pull_request' attribute  
-            if not hasattr(item, 'pull_request') or not item.pull_request:  
-                 issues_closed_count += 1  
-  
-    metrics['issues_opened_last_period'] = issues_opened_count  
-    metrics['issues_closed_last_period'] = issues_closed_count  
-    print(f"Found: Opened={issues_opened_count}, Closed={issues_closed_count}")  
-  
-except GithubException as e:  
-    print(f"Warning: Could not calculate issue metrics: {e}")  
-    metrics['issues_opened_last_period'] = None  
-    metrics['issues_closed_last_period'] = None  
-  
-# --- Pull Requests Opened/Closed Last Period ---  
-print(f"\nCalculating PRs opened/closed in the last {lookback_days} day(s)...")  
-prs_opened_count = 0  
-prs_closed_count = 0 # Includes merged PRs  
-prs_merged_count = 0  
-try:  
-    # PRs opened: Use 'since' on pulls endpoint  
-    opened_pulls = repo.get_pulls(state='all', sort='created', direction='desc', base=repo.default_branch) # Filter by base branch if desired  
-    # Iterate and filter by date - 'since' might not exist for pulls in PyGithub < 2.0 or work as expected  
-    for pr in opened_pulls:  
-        if pr.created_at >= cutoff_datetime_aware:  
-             prs_opened_count += 1  
-        else:  
-            break # Since sorted by created desc  
-  
-    # PRs closed/merged: Check closed_at/merged_at  
-    # Get recently updated closed PRs  
-    recently_updated_closed_pulls = repo.get_pulls(state='closed', sort='updated', direction='desc')#, since=cutoff_datetime_aware) # since might not work well here  
-    for pr in recently_updated_closed_pulls:  
-        # Stop checking if PRs updated date is older than cutoff  
-        if pr.updated_at < cutoff_datetime_aware:  
-             break  
-  
-        if pr.closed_at and pr.closed_at >= cutoff_datetime_aware:  
-            prs_closed_count += 1  
-            if pr.merged_at and pr.merged_at >= cutoff_datetime_aware:  
-                prs_merged_count += 1  
-  
+def collect_top_referrers(run):  
+    run.log("Fetching top referrers data (last 14 days)...")  
+    try:  
+        top_referrers_data = [  
+            {"referrer": r.get('referrer'), "count": r.get('count'), "uniques": r.get('uniques')}  
+            for r in run.rest.get(f"repos/{run.repo_name}/traffic/popular/referrers") or []  
+        ]  
+        run.log(f"Fetched {len(top_referrers_data)} top referrer entries.")  
+        return {'traffic_top_referrers_data': top_referrers_data} # Store the list of dicts  
+    except requests.exceptions.RequestException as e:  
+        run.log(f"Warning: Could not fetch top referrers: {e}")  
+        return {'traffic_top_referrers_data': None} # Set to None on API error  
   
-    metrics['prs_opened_last_period'] = prs_opened_count  
-    metrics['prs_closed_last_period'] = prs_closed_count  
-    metrics['prs_merged_last_period'] = prs_merged_count  
-    print(f"Found: Opened={prs_opened_count}, Closed={prs_closed_count}, Merged={prs_merged_count}")  
   
-except GithubException as e:  
-    print(f"Warning: Could not calculate PR metrics: {e}")  
-    metrics['prs_opened_last_period'] = None  
-    metrics['prs_closed_last_period'] = None  
-    metrics['prs_merged_last_period'] = None  
+def collect_top_paths(run):  
+    run.log("Fetching top paths data (last 14 days)...")  
+    try:  
+        top_paths_data = [  
+            {"path": p.get('path'), "title": p.get('title'), "count": p.get('count'), "uniques": p.get('uniques')}  
+            for p in run.rest.get(f"repos/{run.repo_name}/traffic/popular/paths") or []  
+        ]  
+        run.log(f"Fetched {len(top_paths_data)} top path entries.")  
+        return {'traffic_top_paths_data': top_paths_data} # Store the list of dicts  
+    except requests.exceptions.RequestException as e:  
+        run.log(f"Warning: Could not fetch top paths: {e}")  
+        return {'traffic_top_paths_data': None} # Set to None on API error  
+  
+  
+# --- Issues, PRs and Discussions Opened/Closed Last Period (batched GraphQL search) ---  
+# All counters come from one GraphQL request with an aliased `search` per counter, instead of  
+# paginating every issue and PR in the period through REST.  
+def collect_search_counts(run):  
+    run.log(f"Calculating Issues/PRs/Discussions opened/closed in the last {lookback_days} day(s) via GraphQL search...")  
+    since_iso_string = cutoff_datetime_aware.strftime('%Y-%m-%dT%H:%M:%SZ')  
+    default_branch = run.repo_data.get('default_branch')  
+    searches = {  
+        # Like the REST issues listing, "issues opened" counts PRs as well  
+        'issues_opened_last_period': (f"repo:{run.repo_name} created:>={since_iso_string}", "ISSUE"),  
+        'issues_closed_last_period': (f"repo:{run.repo_name} is:issue closed:>={since_iso_string}", "ISSUE"),  
+        # Opened PRs are counted against the default branch only  
+        'prs_opened_last_period': (f"repo:{run.repo_name} is:pr base:{default_branch} created:>={since_iso_string}", "ISSUE"),  
+        'prs_closed_last_period': (f"repo:{run.repo_name} is:pr closed:>={since_iso_string}", "ISSUE"), # Includes merged PRs  
+        'prs_merged_last_period': (f"repo:{run.repo_name} is:pr merged:>={since_iso_string}", "ISSUE"),  
+    }  
+    if run.repo_data.get('has_discussions'):  
+        # This counts currently 'open' discussions created since the cutoff.  
+        searches['discussions_opened_last_period'] = (  
+            f"repo:{run.repo_name} type:discussion is:open created:>={since_iso_string}", "DISCUSSION")  
+    else:  
+        run.log("Discussions feature not enabled for this repository. Skipping discussion metrics.")  
+  
+    search_counts = run_search_counts(token, searches, run.rest)  
+    if search_counts is None:  
+        run.log("Warning: Failed to get issue/PR/discussion counts via GraphQL search.")  
+        search_counts = {}  
+    metrics = {key: search_counts.get(key) for key in searches}  
+    metrics.setdefault('discussions_opened_last_period', None)  
+    # NOTE: Getting an exact count of *all* comments across *all* discussions created  
+    # within a specific time window using a single, efficient GraphQL query is difficult.  
+    # The search API doesn't seem to support filtering for `type:discussioncomment` directly,  
+    # and fetching comments per discussion can lead to many API calls, so we leave it as None.  
+    metrics['discussions_comments_last_period'] = None # Still challenging  
+    run.log(f"Found: Issues Opened={metrics['issues_opened_last_period']}, Closed={metrics['issues_closed_last_period']}; "  
+          f"PRs Opened={metrics['prs_opened_last_period']}, Closed={metrics['prs_closed_last_period']}, "  
+          f"Merged={metrics['prs_merged_last_period']}; Discussions Opened={metrics['discussions_opened_last_period']}")  
+    return metrics  
   
   
 # --- Comments (Issues, PRs) Last Period ---  
-print(f"\nCalculating Issue/PR Comments in the last {lookback_days} day(s)...")  
-issue_comments_last_period = 0  
-pr_comments_last_period = 0 # Includes review comments and general PR comments  
+def collect_comments(run):  
+    run.log(f"Calculating Issue/PR Comments in the last {lookback_days} day(s)...")  
+    try:  
+        comments_cursor = run.state.cursor('comments', cutoff_datetime_aware)  
+        comments_params = {"sort": "created", "direction": "desc", "since": comments_cursor.isoformat()}  
+  
+        def created_before_cursor(comment):  
+            # Since comments are sorted desc by creation, stop at the first one older than the cursor  
+            return parse_github_time(comment['created_at']) < comments_cursor  
+  
+        # General Issue/PR comments (use issues endpoint), differentiated based on URL  
+        for comment in run.rest.paginate(f"repos/{run.repo_name}/issues/comments", comments_params,  
+                                     stop=created_before_cursor, conditional=False):  
+            family = 'pr_comments' if "/pull/" in comment['html_url'] else 'issue_comments'  
+            run.state.record(family, comment['id'], parse_github_time(comment['created_at']))  
+  
+        # PR Review Comments  
+        for comment in run.rest.paginate(f"repos/{run.repo_name}/pulls/comments", comments_params,  
+                                     stop=created_before_cursor, conditional=False):  
+            run.state.record('pr_review_comments', comment['id'], parse_github_time(comment['created_at']))  
+        run.state.advance('comments', run_started_at - cursor_overlap)  
+  
+        issue_comments_last_period = run.state.count_since('issue_comments', cutoff_datetime_aware)  
+        # Includes review comments and general PR comments  
+        pr_comments_last_period = (run.state.count_since('pr_comments', cutoff_datetime_aware)  
+                                   + run.state.count_since('pr_review_comments', cutoff_datetime_aware))  
+        run.log(f"Found: Issue Comments={issue_comments_last_period}, PR Comments={pr_comments_last_period}")  
+        return {'issue_comments_last_period': issue_comments_last_period,  
+                'pr_comments_last_period': pr_comments_last_period} # Combined count  
   
-try:  
-    # General Issue/PR comments (use issues endpoint)  
-    all_comments = repo.get_issues_comments(sort='created', direction='desc', since=cutoff_datetime_aware)  
-    for comment in all_comments:  
-         # Check creation date again just to be sure  
-        if comment.created_at >= cutoff_datetime_aware:  
-            # Differentiate based on URL  
-            if "/pull/" in comment.html_url:  
-                pr_comments_last_period += 1  
-            else:  
-                issue_comments_last_period += 1  
-        else:  
-             # Since comments are sorted desc, we can stop  
-             break  
+    except requests.exceptions.RequestException as e:  
+        run.log(f"Warning: Could not calculate comment metrics: {e}")  
+        return {'issue_comments_last_period': None, 'pr_comments_last_period': None}  
   
-    # PR Review Comments  
-    review_comments = repo.get_pulls_comments(sort='created', direction='desc', since=cutoff_datetime_aware)  
-    for comment in review_comments:  
-         if comment.created_at >= cutoff_datetime_aware:  
-             pr_comments_last_period += 1  
-         else:  
-             break  
   
-    metrics['issue_comments_last_period'] = issue_comments_last_period  
-    metrics['pr_comments_last_period'] = pr_comments_last_period # Combined count  
-    print(f"Found: Issue Comments={issue_comments_last_period}, PR Comments={pr_comments_last_period}")  
+# The contributor stats go first: the first request also asks GitHub to start computing them  
+metric_families = [collect_contributor_stats, collect_standard_metrics, collect_forks, collect_traffic,  
+                   collect_top_referrers, collect_top_paths, collect_search_counts, collect_comments]  
   
-except GithubException as e:  
-    print(f"Warning: Could not calculate comment metrics: {e}")  
-    metrics['issue_comments_last_period'] = None  
-    metrics['pr_comments_last_period'] = None  
   
+def run_family(collect, run):  
+    start = time.perf_counter()  
+    result = collect(run)  
+    return result, time.perf_counter() - start  
   
-# --- Discussions Metrics (via GraphQL) ---  
-print(f"\nCalculating Discussion Metrics for the last {lookback_days} day(s) via GraphQL...")  
-
-# Initialize metrics  
-metrics['discussions_opened_last_period'] = None  
-metrics['discussions_comments_last_period'] = None # Still challenging  
-
-# Check if discussions are enabled first  
-if metrics.get('has_discussions'):  
-    # Format the cutoff date as an ISO 8601 string for GraphQL  
-    since_iso_string = cutoff_datetime_aware.isoformat()  
-
-    # --- Query for Discussions Opened ---  
-    # Use the search API via GraphQL for efficient filtering by creation date  
-    search_query_string = f"repo:{repo_name} type:discussion is:open created:>={since_iso_string}"  
-    # Also count closed ones created in the period? Add another query or adjust logic if needed.  
-    # This query counts currently 'open' discussions created since the cutoff.  
+  
+def collect_repository(repo_name):  
+    """Collect every metric family of one repository into one row.  
 
-    discussions_search_query = """  
-    query($searchQuery: String!) {  
-      search(query: $searchQuery, type: DISCUSSION, first: 0) {  
-        discussionCount  
-      }  
-    }  
+    Never raises: a failure is recorded in the row's `collection_errors` and its metrics stay None,  
+    so one broken or inaccessible repository does not abort the whole run.  
     """  
-    variables = {"searchQuery": search_query_string}  
-
-    print(f"Running GraphQL search for new discussions with query: '{search_query_string}'")  
-    graphql_data_disc = run_graphql_query(token, discussions_search_query, variables)  
-
-    if graphql_data_disc and 'search' in graphql_data_disc:  
-        try:  
-            metrics['discussions_opened_last_period'] = graphql_data_disc['search']['discussionCount']  
-            print(f"Found via GraphQL Search: Discussions Opened={metrics['discussions_opened_last_period']}")  
-        except (KeyError, TypeError) as e:  
-             print(f"Warning: Could not extract discussion count from GraphQL response: {e}. Response: {graphql_data_disc}")  
-    else:  
-        print("Warning: Failed to get discussion count via GraphQL search.")  
-
-
-    # --- Query for Discussion Comments ---  
-    # NOTE: Getting an exact count of *all* comments across *all* discussions created  
-    # within a specific time window using a single, efficient GraphQL query is difficult.  
-    # The search API doesn't seem to support filtering for `type:discussioncomment` directly.  
-    # A possible (but potentially slow and complex) alternative would be:  
-    # 1. Fetch discussions UPDATED since the cutoff date.  
-    # 2. For each discussion, fetch comments created since the cutoff date (requires pagination per discussion).  
-    # This approach can lead to many API calls and is not implemented here for efficiency.  
-    # We will leave `discussions_comments_last_period` as None.  
-
-    print("Note: Fetching discussion *comment* counts for the period is complex with GraphQL Search and not implemented.")  
-    metrics['discussions_comments_last_period'] = None # Explicitly set to None  
-
-else:  
-    print("Discussions feature not enabled for this repository. Skipping GraphQL calls.")  
-    # Ensure metrics are None if discussions are disabled  
-    metrics['discussions_opened_last_period'] = None  
-    metrics['discussions_comments_last_period'] = None  
-  
-# --- Final Data Preparation ---  
-# Convert datetime objects to string or ensure pyarrow handles them  
-for key, value in metrics.items():  
-    if isinstance(value, datetime):  
-        # Ensure timezone-aware datetimes are handled correctly by pyarrow  
-        # Or convert to ISO format string with timezone  
-        if value.tzinfo is None:  
-            # Optional: Make naive datetimes timezone-aware (assuming UTC) before writing  
-            # metrics[key] = value.replace(tzinfo=timezone.utc)  
-            pass # Keep naive UTC as is  
-        # else: keep timezone-aware datetimes as is  
-        # Alternatively, convert all to ISO strings:  
-        # metrics[key] = value.isoformat()  
-  
-  
-# Create DataFrame - Note the list around the dictionary for a single row  
-try:  
-    df = pd.DataFrame([metrics])  
-  
-    # Define specific data types (especially nullable integers)  
-    # Adjust based on the actual metrics collected  
-    dtype_mapping = {  
-        'stars': pd.Int64Dtype(), 'watchers': pd.Int64Dtype(), 'forks_total': pd.Int64Dtype(),  
-        'open_issues_total': pd.Int64Dtype(), 'network_count': pd.Int64Dtype(), 'size_kb': pd.Int64Dtype(),  
-        'contributors_count_total': pd.Int64Dtype(), 'releases_count_total': pd.Int64Dtype(),  
-        'forks_new_last_period': pd.Int64Dtype(), 'contributors_additions_recent_weeks': pd.Int64Dtype(),  
-        'traffic_views_last_day_total': pd.Int64Dtype(), 'traffic_views_last_day_unique': pd.Int64Dtype(),  
-        'traffic_clones_last_day_total': pd.Int64Dtype(), 'traffic_clones_last_day_unique': pd.Int64Dtype(),  
-        # 'traffic_referrers_top_count': pd.Int64Dtype(), 'traffic_popular_paths_top_count': pd.Int64Dtype(),  
-        'issues_opened_last_period': pd.Int64Dtype(), 'issues_closed_last_period': pd.Int64Dtype(),  
-        'prs_opened_last_period': pd.Int64Dtype(), 'prs_closed_last_period': pd.Int64Dtype(),  
-        'prs_merged_last_period': pd.Int64Dtype(), 'issue_comments_last_period': pd.Int64Dtype(),  
-        'pr_comments_last_period': pd.Int64Dtype(),  
-        'discussions_opened_last_period': pd.Int64Dtype(), 'discussions_comments_last_period': pd.Int64Dtype()  
-        # Add others as needed, boolean types usually fine, string types usually fine  
-    }  
-    # Filter out any keys from mapping that don't exist in the DataFrame (e.g., due to API errors)  
-    valid_dtype_mapping = {k: v for k, v in dtype_mapping.items() if k in df.columns}  
-    df = df.astype(valid_dtype_mapping)  
+    start = time.perf_counter()  
+    row = {'timestamp_utc': run_started_at, 'collection_date': run_started_at.date(), # Store timezone-aware timestamp  
+           'repository_name': repo_name}  
+    state = MetricsState(os.path.join(state_dir, f"{repo_name.replace('/', '-')}.json"), repo_name)  
+    rest = new_client()  
+    try:  
+        repo_data = rest.get(f"repos/{repo_name}")  
+    except requests.exceptions.RequestException as e:  
+        print(f"[{repo_name}] Error getting repository: {e}")  
+        row['collection_errors'] = f"repository: {e}"  
+        return row  
+    run = RepositoryRun(repo_data['full_name'], rest, state, repo_data)  
+    row['repository_name'] = run.repo_name  
+  
+    # Each metric family is collected by its own function, returning a dict of metrics. The families  
+    # run concurrently and share the scheduler, so a repository takes as long as its slowest family  
+    # (usually the contributor stats, which GitHub may still be computing) instead of the sum of all.  
+    errors = []  
+    family_results = {}  
+    with ThreadPoolExecutor(max_workers=len(metric_families)) as pool:  
+        futures = {pool.submit(run_family, collect, run): collect for collect in metric_families}  
+        for future in as_completed(futures):  
+            collect = futures[future]  
+            try:  
+                family_results[collect], elapsed = future.result()  
+                run.log(f"{collect.__name__} done in {elapsed:.1f}s")  
+            except Exception as e: # One failing family must not lose the others  
+                run.log(f"Warning: {collect.__name__} failed: {e}")  
+                errors.append(f"{collect.__name__}: {e}")  
+                family_results[collect] = {}  
+  
+    # Merge in declaration order so the column order is stable between runs  
+    for collect in metric_families:  
+        row.update(family_results[collect])  
+    row['collection_errors'] = "; ".join(errors) or None  
+  
+    # --- Persist the Checkpoint ---  
+    try:  
+        state.save()  
+    except OSError as e:  
+        run.log(f"Warning: Could not save collection state, the next run will start from scratch: {e}")  
+    # API cost of this repository, per endpoint  
+    row['api_calls'] = rest.calls  
+    row['api_not_modified'] = rest.not_modified  
+    row['api_endpoint_stats'] = rest.stats.rows()  
+    run.log(f"Collected in {time.perf_counter() - start:.1f}s with {rest.calls} API calls "  
+            f"({rest.not_modified} answered 304 Not Modified, not counted against the rate limit)")  
+    return row  
+  
+  
+def collect_repository_isolated(repo_name):  
+    try:  
+        return collect_repository(repo_name)  
+    except Exception as e: # Anything unexpected still only costs this repository's row  
+        print(f"[{repo_name}] Error: collection failed: {e}")  
+        return {'timestamp_utc': run_started_at, 'collection_date': run_started_at.date(), 'repository_name': repo_name,  
+                'collection_errors': f"{type(e).__name__}: {e}"}  
+  
   
+# --- Data Collection ---  
+print(f"\nCollecting {len(repositories)} repository(ies), {len(metric_families)} metric families each...")  
+collection_start = time.perf_counter()  
+with ThreadPoolExecutor(max_workers=min(max_concurrent_repositories, len(repositories))) as pool:  
+    rows = list(pool.map(collect_repository_isolated, repositories))  
+rows.sort(key=lambda row: row['repository_name'])  
+failed = [row['repository_name'] for row in rows if row.get('collection_errors')]  
+# Rows without repository data at all (not found, no access, unexpected error)  
+unreachable = [row['repository_name'] for row in rows if row.get('created_at_utc') is None]  
+print(f"\nCollected {len(rows)} repository(ies) in {time.perf_counter() - collection_start:.1f}s "  
+      f"(rate-limit waits: {scheduler.waited_seconds:.1f}s, core rate limit remaining: {scheduler.remaining('core')})")  
+if failed:  
+    print(f"Warning: {len(failed)} repository(ies) with errors: {', '.join(failed)}")  
+  
+# API cost per endpoint over all repositories  
+total_stats = EndpointStats()  
+for row in rows:  
+    total_stats.add_rows(row.get('api_endpoint_stats') or [])  
+print(f"\n{'endpoint':<45} {'calls':>6} {'304s':>6} {'seconds':>8}")  
+for endpoint in total_stats.rows():  
+    print(f"{endpoint['endpoint']:<45} {endpoint['calls']:>6} {endpoint['not_modified']:>6} {endpoint['seconds']:>8.2f}")  
+print(f"Pruned {http_cache.prune()} unused HTTP cache entries.")  
+  
+  
+# Create the table - one row per repository, with every column of the schema  
+try:  
+    # The explicit schema keeps column types stable even when a metric is None for every repository  
+    table = metrics_table(rows)  
+    df = metrics_dataframe(table)  
   
     print("\n--- Collected Metrics ---")  
     # Print columns horizontally for better readability if many columns  
@@ -556,13 +537,23 @@ try:
   
     # --- Write to Parquet ---  
     print(f"\nWriting metrics to {output_filename}...")  
-    df.to_parquet(output_filename, engine='pyarrow', index=False, coerce_timestamps='us', allow_truncated_timestamps=False)  
+    pq.write_table(table, output_filename, coerce_timestamps='us', allow_truncated_timestamps=False)  
     print("Successfully wrote Parquet file.")  
   
+    # --- Append to the Partitioned History ---  
+    if dataset_uri:  
+        print(f"\nAppending {table.num_rows} row(s) to {append_day(table, dataset_uri)}")  
+        for month, files, rows_compacted in compact_months(dataset_uri):  
+            print(f"Compacted {files} file(s) into {COMPACTED_PREFIX}/month={month} ({rows_compacted} rows)")  
+  
 except Exception as e:  
     print(f"Error creating DataFrame or writing Parquet file: {e}")  
     import traceback  
     traceback.print_exc() # Print full traceback for debugging  
     sys.exit(1)  
   
+# Only fail the job when nothing could be collected at all  
+if len(unreachable) == len(rows):  
+    print("\nError: no repository could be collected.")  
+    sys.exit(1)  
 print("\nScript finished successfully.") 
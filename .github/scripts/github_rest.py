@@ -0,0 +1,248 @@
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+import requests.adapters
+
+GITHUB_API_URL = "https://api.github.com"
+_LINK_NEXT = re.compile(r'<([^>]+)>;\s*rel="next"')
+_LINK_LAST_PAGE = re.compile(r'[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+
+class RateLimitScheduler:
+    """Shares GitHub's rate limits between metric families collected concurrently.
+
+    - Primary limits: remembers `X-RateLimit-Remaining` / `X-RateLimit-Reset` per
+      resource (core, graphql, ...) and holds new requests once only `reserve`
+      calls are left, until the window resets.
+    - Secondary limits: caps the number of requests in flight, and on a 403/429
+      with `Retry-After` (or an exhausted limit) pauses every caller before retrying.
+
+    Waits longer than `max_wait` seconds are not taken; the request is sent and
+    its error is reported by the family that made it.
+    """
+
+    def __init__(self, max_concurrent=4, reserve=10, max_wait=900, max_attempts=3):
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.max_attempts = max_attempts
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._limits = {}  # resource -> (remaining, reset epoch seconds)
+        self._paused_until = 0.0
+        self.waited_seconds = 0.0
+
+    def remaining(self, resource="core"):
+        return self._limits.get(resource, (None, 0))[0]
+
+    def _wait_seconds(self, resource):
+        with self._lock:
+            now = time.time()
+            wait = self._paused_until - now
+            remaining, reset = self._limits.get(resource, (None, 0))
+            if remaining is not None and remaining <= self.reserve:
+                wait = max(wait, reset - now + 1)
+            return wait if 0 < wait <= self.max_wait else 0
+
+    def _update(self, response):
+        headers = response.headers
+        if "X-RateLimit-Remaining" not in headers:
+            return
+        resource = headers.get("X-RateLimit-Resource", "core")
+        with self._lock:
+            self._limits[resource] = (int(headers["X-RateLimit-Remaining"]), int(headers.get("X-RateLimit-Reset", 0)))
+
+    def _retry_after(self, response, attempt):
+        """Seconds to pause for a rate-limited response, or None if it was not rate limited."""
+        if response.status_code not in (403, 429):
+            return None
+        if "Retry-After" in response.headers:
+            return int(response.headers["Retry-After"])
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            return max(int(response.headers.get("X-RateLimit-Reset", 0)) - time.time(), 0) + 1
+        if response.status_code == 429 or "secondary rate limit" in response.text.lower():
+            return 60 * 2 ** attempt
+        return None  # A plain 403 (e.g. missing permission)
+
+    def request(self, resource, send):
+        """Call `send()` (returning a `requests.Response`) within the limits of `resource`."""
+        for attempt in range(self.max_attempts):
+            wait = self._wait_seconds(resource)
+            if wait:
+                print(f"Rate limit: waiting {wait:.0f}s before the next {resource} request...")
+                time.sleep(wait)
+                with self._lock:
+                    self.waited_seconds += wait
+            with self._slots:
+                response = send()
+            self._update(response)
+            retry_after = self._retry_after(response, attempt)
+            if retry_after is None or attempt == self.max_attempts - 1:
+                return response
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.time() + retry_after)
+        return response
+
+
+class EndpointStats:
+    """Call counts and time per endpoint, e.g. `GET repos/{repo}/forks`, so API cost regressions are visible."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}  # endpoint -> [calls, not_modified, seconds]
+
+    @staticmethod
+    def endpoint_name(method, url):
+        path = urlparse(url).path
+        path = re.sub(r"^(/api/v3)?/", "", path)  # GitHub Enterprise Server prefix
+        path = re.sub(r"^repos/[^/]+/[^/]+", "repos/{repo}", path)
+        path = re.sub(r"^orgs/[^/]+", "orgs/{org}", path)
+        path = re.sub(r"/\d+(?=/|$)", "/{n}", path)
+        return f"{method} {path}"
+
+    def record(self, endpoint, seconds, not_modified=False):
+        with self._lock:
+            entry = self.endpoints.setdefault(endpoint, [0, 0, 0.0])
+            entry[0] += 1
+            entry[1] += not_modified
+            entry[2] += seconds
+
+    def add_rows(self, rows):
+        """Accumulate rows as returned by `rows()`, e.g. to total several clients."""
+        with self._lock:
+            for row in rows:
+                entry = self.endpoints.setdefault(row["endpoint"], [0, 0, 0.0])
+                entry[0] += row["calls"]
+                entry[1] += row["not_modified"]
+                entry[2] += row["seconds"]
+
+    @property
+    def calls(self):
+        return sum(entry[0] for entry in self.endpoints.values())
+
+    @property
+    def not_modified(self):
+        return sum(entry[1] for entry in self.endpoints.values())
+
+    def rows(self):
+        """One dict per endpoint, the most expensive first."""
+        with self._lock:
+            rows = [{"endpoint": endpoint, "calls": calls, "not_modified": not_modified, "seconds": round(seconds, 3)}
+                    for endpoint, (calls, not_modified, seconds) in self.endpoints.items()]
+        return sorted(rows, key=lambda row: row["seconds"], reverse=True)
+
+
+def create_session(pool_size=8):
+    """A keep-alive session whose connection pool is shared by every client and thread."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)  # Local mock server
+    return session
+
+
+class ConditionalRestClient:
+    """Minimal GitHub REST (and GraphQL) client that makes conditional requests.
+
+    The ETag / Last-Modified validators and the last body of every URL are
+    kept in an on-disk `HttpCache`, and sent back as `If-None-Match` /
+    `If-Modified-Since`. An unchanged resource then answers `304 Not Modified`,
+    which does not count against the rate limit, and the cached body is reused.
+    All requests go through the shared session, scheduler and endpoint stats.
+    """
+
+    def __init__(self, token, cache=None, api_url=GITHUB_API_URL, graphql_url=None, scheduler=None, session=None):
+        self.api_url = api_url.rstrip("/")
+        self.graphql_url = graphql_url or f"{self.api_url}/graphql"
+        self.cache = cache
+        self.scheduler = scheduler or RateLimitScheduler()
+        self.session = session or create_session()  # Share one across clients to pool connections
+        self.stats = EndpointStats()
+        self.token = token
+        self.headers = {
+            "Authorization": f"token {token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+
+    @property
+    def calls(self):
+        return self.stats.calls
+
+    @property
+    def not_modified(self):
+        return self.stats.not_modified
+
+    @property
+    def rate_limit_remaining(self):
+        return self.scheduler.remaining("core")
+
+    def _url(self, path_or_url):
+        return path_or_url if path_or_url.startswith("http") else f"{self.api_url}/{path_or_url.lstrip('/')}"
+
+    def _send(self, resource, endpoint, send, cached=False):
+        start = time.perf_counter()
+        response = self.scheduler.request(resource, send)
+        self.stats.record(endpoint, time.perf_counter() - start, not_modified=response.status_code == 304 and cached)
+        return response
+
+    def get_response(self, path_or_url, params=None, conditional=True):
+        """GET with validators from the cache. Returns (status, json_body, headers).
+
+        Pass `conditional=False` for URLs that change every run (e.g. with a
+        `since` parameter), which would only fill the cache with dead entries.
+        """
+        url = self._url(path_or_url)
+        cache_key = requests.Request("GET", url, params=params).prepare().url
+        cached = self.cache.get(cache_key) if conditional and self.cache else None
+        headers = dict(self.headers)
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = self._send("core", EndpointStats.endpoint_name("GET", url),
+                              lambda: self.session.get(url, headers=headers, params=params, timeout=30),
+                              cached=bool(cached))
+        if response.status_code == 304 and cached:
+            return 200, cached["body"], cached.get("headers", {})
+        if response.status_code == 202:
+            return 202, None, response.headers  # GitHub is still computing (stats endpoints)
+        response.raise_for_status()
+
+        body = response.json() if response.content else None
+        kept_headers = {k: response.headers[k] for k in ("Link",) if k in response.headers}
+        if conditional and self.cache and (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+            self.cache.put(cache_key, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                           kept_headers, body)
+        return response.status_code, body, kept_headers
+
+    def post_graphql(self, payload):
+        """POST a GraphQL payload over the shared session. Returns the `requests.Response`."""
+        headers = {"Authorization": f"bearer {self.token}", "Content-Type": "application/json"}
+        return self._send("graphql", "POST graphql",
+                          lambda: self.session.post(self.graphql_url, headers=headers, json=payload, timeout=30))
+
+    def get(self, path_or_url, params=None, conditional=True):
+        return self.get_response(path_or_url, params, conditional)[1]
+
+    def paginate(self, path, params=None, stop=None, conditional=True):
+        """Yield items across pages, stopping early once `stop(item)` is true."""
+        url, page_params = self._url(path), dict(params or {}, per_page=100)
+        while url:
+            _status, items, headers = self.get_response(url, page_params, conditional)
+            for item in items or []:
+                if stop is not None and stop(item):
+                    return
+                yield item
+            match = _LINK_NEXT.search(headers.get("Link", ""))
+            url, page_params = (match.group(1), None) if match else (None, None)
+
+    def count(self, path, params=None):
+        """Total number of items in a list endpoint, from one `per_page=1` request."""
+        _status, items, headers = self.get_response(path, dict(params or {}, per_page=1))
+        match = _LINK_LAST_PAGE.search(headers.get("Link", ""))
+        return int(match.group(1)) if match else len(items or [])
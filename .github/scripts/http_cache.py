@@ -0,0 +1,57 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+
+
+class HttpCache:
+    """On-disk cache of GET responses and their validators, one JSON file per URL.
+
+    Entries hold the `ETag` / `Last-Modified` validators, the headers needed to
+    page through results and the JSON body. They are sent back as
+    `If-None-Match` / `If-Modified-Since`, and a `304 Not Modified` answer is
+    served from the entry. Entries not used for `max_age_days` are pruned.
+    """
+
+    def __init__(self, directory, max_age_days=30):
+        self.directory = directory
+        self.max_age_days = max_age_days
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.directory, f"{hashlib.sha256(url.encode()).hexdigest()[:32]}.json")
+
+    def get(self, url):
+        path = self._path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url:
+            return None
+        os.utime(path)  # Mark as used, for pruning
+        return entry
+
+    def put(self, url, etag, last_modified, headers, body):
+        entry = {"url": url, "etag": etag, "last_modified": last_modified, "headers": headers, "body": body}
+        path = self._path(url)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"  # Unique: several threads may store the same URL
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def prune(self):
+        """Delete entries not used within `max_age_days`. Returns how many were deleted."""
+        cutoff = time.time() - self.max_age_days * 86400
+        deleted = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    deleted += 1
+            except OSError:
+                pass
+        return deleted
@@ -0,0 +1,190 @@
+"""Append-only, date-partitioned Parquet history of the collected metrics.
+
+Layout under the dataset root (a local path, file:// or s3:// URI):
+
+    date=YYYY-MM-DD/part-<HHMMSS>-<id>.parquet   one small file per run, for the current month
+    compacted/month=YYYY-MM/part-0.parquet       completed months, compacted into one file
+
+Compacted months live under their own prefix, so each level holds a single
+partition key and Hive-style partition discovery works on either prefix.
+
+Every file has the full `METRICS_SCHEMA`, rows sorted by (collection_date,
+repository_name) and column statistics, and compacted files have one row group
+per day, so a time-range scan skips whole directories by name and whole row
+groups by their min/max statistics.
+
+S3-compatible stores (e.g. MinIO for local testing) are selected with
+METRICS_S3_ENDPOINT, e.g. http://localhost:9000; credentials come from the
+usual AWS_* environment variables.
+
+    python .github/scripts/metrics_dataset.py show <uri> [--start 2025-01-01] [--end 2025-01-31]
+    python .github/scripts/metrics_dataset.py compact <uri>
+"""
+
+import argparse
+import os
+import uuid
+from datetime import date, datetime, timezone
+from urllib.parse import urlparse
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from metrics_schema import METRICS_SCHEMA
+
+COMPACTED_PREFIX = "compacted"
+SORT_KEYS = [('collection_date', 'ascending'), ('repository_name', 'ascending')]
+WRITE_OPTIONS = {
+    'compression': 'zstd',
+    'write_statistics': True,
+    'coerce_timestamps': 'us',
+    'allow_truncated_timestamps': False,
+}
+
+
+def open_dataset_root(uri):
+    """Return (filesystem, root path) for a local path, file:// or s3:// URI."""
+    endpoint = os.getenv("METRICS_S3_ENDPOINT")
+    parsed = urlparse(uri)
+    if parsed.scheme == "s3" and endpoint:
+        endpoint_url = urlparse(endpoint)
+        fs = pafs.S3FileSystem(endpoint_override=endpoint_url.netloc, scheme=endpoint_url.scheme or "https",
+                               region=os.getenv("AWS_REGION", "us-east-1"))
+        return fs, f"{parsed.netloc}{parsed.path}".rstrip("/")
+    if not parsed.scheme:
+        uri = os.path.abspath(uri)
+    fs, root = pafs.FileSystem.from_uri(uri)
+    return fs, root.rstrip("/")
+
+
+def _partitions(fs, root):
+    """Map partition directory name -> path, e.g. {'date=2025-01-02': '<root>/date=2025-01-02'}."""
+    try:
+        infos = fs.get_file_info(pafs.FileSelector(root, allow_not_found=True))
+    except FileNotFoundError:
+        return {}
+    return {info.base_name: info.path for info in infos if info.type == pafs.FileType.Directory}
+
+
+def _files(fs, path):
+    selector = pafs.FileSelector(path, recursive=False)
+    return sorted(info.path for info in fs.get_file_info(selector)
+                  if info.type == pafs.FileType.File and info.base_name.endswith(".parquet"))
+
+
+def _write(fs, table, path, row_groups=None):
+    """Write `table` atomically where the filesystem allows it (tmp name, then move)."""
+    tmp_path = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+    with fs.open_output_stream(tmp_path) as sink:
+        with pq.ParquetWriter(sink, METRICS_SCHEMA, **WRITE_OPTIONS) as writer:
+            for group in row_groups or [table]:
+                writer.write_table(group)
+    fs.move(tmp_path, path)
+
+
+def append_day(table, uri, day=None):
+    """Add one run's rows as a new file in the `date=` partition of its day. Returns the file path."""
+    fs, root = open_dataset_root(uri)
+    day = day or table.column('collection_date')[0].as_py() or datetime.now(timezone.utc).date()
+    partition = f"{root}/date={day.isoformat()}"
+    fs.create_dir(partition, recursive=True)
+    path = f"{partition}/part-{datetime.now(timezone.utc).strftime('%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+    _write(fs, table.cast(METRICS_SCHEMA).sort_by(SORT_KEYS), path)
+    return path
+
+
+def _read_files(fs, paths):
+    # Files written before a column was added are read with nulls for it; the daily
+    # blob.parquet files uploaded before this dataset existed get their day from the timestamp
+    table = ds.dataset(paths, schema=METRICS_SCHEMA, format="parquet", filesystem=fs).to_table()
+    index = table.schema.get_field_index('collection_date')
+    day = pc.coalesce(table.column('collection_date'), pc.cast(table.column('timestamp_utc'), pa.date32()))
+    return table.set_column(index, 'collection_date', day)
+
+
+def compact_months(uri, before=None):
+    """Fold the daily partitions of months before `before` (default: this month) into one file per month.
+
+    Idempotent: an existing monthly file is merged with any daily files left for
+    that month, and daily partitions are only removed after the monthly file has
+    been written.
+    """
+    fs, root = open_dataset_root(uri)
+    before = (before or datetime.now(timezone.utc).date()).strftime("%Y-%m")
+    months = _partitions(fs, f"{root}/{COMPACTED_PREFIX}")
+    days_by_month = {}
+    for name, path in _partitions(fs, root).items():
+        if name.startswith("date=") and name[5:12] < before:
+            days_by_month.setdefault(name[5:12], []).append(path)
+
+    compacted = []
+    for month, day_paths in sorted(days_by_month.items()):
+        month_dir = f"{root}/{COMPACTED_PREFIX}/month={month}"
+        month_file = f"{month_dir}/part-0.parquet"
+        paths = [p for day_path in day_paths for p in _files(fs, day_path)]
+        if f"month={month}" in months:
+            paths += _files(fs, month_dir)
+        table = _read_files(fs, paths).sort_by(SORT_KEYS)
+        days = pc.unique(table.column('collection_date')).to_pylist()
+        row_groups = [table.filter(pc.equal(table.column('collection_date'), day)) for day in days]
+        fs.create_dir(month_dir, recursive=True)
+        _write(fs, table, month_file, row_groups=row_groups)
+        for day_path in day_paths:
+            fs.delete_dir(day_path)
+        for stale in set(_files(fs, month_dir)) - {month_file}:
+            fs.delete_file(stale)
+        compacted.append((month, len(paths), table.num_rows))
+    return compacted
+
+
+def read_history(uri, start=None, end=None, repositories=None):
+    """Rows with `start` <= collection_date <= `end`, reading only the partitions that can match."""
+    fs, root = open_dataset_root(uri)
+    partitions = [(name, path, "date") for name, path in _partitions(fs, root).items()]
+    partitions += [(name, path, "month") for name, path in _partitions(fs, f"{root}/{COMPACTED_PREFIX}").items()]
+    paths = []
+    for name, path, expected_key in partitions:
+        key, _, value = name.partition("=")
+        first, last = (value, value) if key == "date" else (f"{value}-01", f"{value}-31")
+        if key == expected_key and (not start or last >= start.isoformat()) and (not end or first <= end.isoformat()):
+            paths += _files(fs, path)
+    if not paths:
+        return METRICS_SCHEMA.empty_table()
+
+    condition = None
+    for part in (ds.field('collection_date') >= start if start else None,
+                 ds.field('collection_date') <= end if end else None,
+                 ds.field('repository_name').isin(repositories) if repositories else None):
+        if part is not None:
+            condition = part if condition is None else condition & part
+    dataset = ds.dataset(paths, schema=METRICS_SCHEMA, format="parquet", filesystem=fs)
+    return dataset.to_table(filter=condition).sort_by(SORT_KEYS)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["show", "compact"])
+    parser.add_argument("uri", help="Dataset root: a local path, file:// or s3:// URI")
+    parser.add_argument("--start", type=date.fromisoformat)
+    parser.add_argument("--end", type=date.fromisoformat)
+    parser.add_argument("--repos", nargs="+")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if args.command == "compact":
+        for month, files, rows in compact_months(args.uri):
+            print(f"Compacted {files} file(s) into {COMPACTED_PREFIX}/month={month} ({rows} rows)")
+        return
+    table = read_history(args.uri, args.start, args.end, args.repos)
+    print(f"{table.num_rows} rows")
+    print(table.select(['collection_date', 'repository_name', 'stars', 'forks_total',
+                        'issues_opened_last_period', 'prs_merged_last_period']).to_pandas().to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import pandas as pd
+import pyarrow as pa
+
+# Nullable integer metrics (especially counts that are None when an API call failed)
+dtype_mapping = {
+    'stars': pd.Int64Dtype(), 'watchers': pd.Int64Dtype(), 'forks_total': pd.Int64Dtype(),
+    'open_issues_total': pd.Int64Dtype(), 'network_count': pd.Int64Dtype(), 'size_kb': pd.Int64Dtype(),
+    'contributors_count_total': pd.Int64Dtype(), 'releases_count_total': pd.Int64Dtype(),
+    'forks_new_last_period': pd.Int64Dtype(), 'contributors_additions_recent_weeks': pd.Int64Dtype(),
+    'traffic_views_last_day_total': pd.Int64Dtype(), 'traffic_views_last_day_unique': pd.Int64Dtype(),
+    'traffic_clones_last_day_total': pd.Int64Dtype(), 'traffic_clones_last_day_unique': pd.Int64Dtype(),
+    'issues_opened_last_period': pd.Int64Dtype(), 'issues_closed_last_period': pd.Int64Dtype(),
+    'prs_opened_last_period': pd.Int64Dtype(), 'prs_closed_last_period': pd.Int64Dtype(),
+    'prs_merged_last_period': pd.Int64Dtype(), 'issue_comments_last_period': pd.Int64Dtype(),
+    'pr_comments_last_period': pd.Int64Dtype(),
+    'discussions_opened_last_period': pd.Int64Dtype(), 'discussions_comments_last_period': pd.Int64Dtype(),
+    'api_calls': pd.Int64Dtype(), 'api_not_modified': pd.Int64Dtype(),
+}
+
+_TIMESTAMP = pa.timestamp('us', tz='UTC')
+_REFERRER = pa.struct([('referrer', pa.string()), ('count', pa.int64()), ('uniques', pa.int64())])
+_ENDPOINT = pa.struct([('endpoint', pa.string()), ('calls', pa.int64()), ('not_modified', pa.int64()),
+                       ('seconds', pa.float64())])
+_PATH = pa.struct([('path', pa.string()), ('title', pa.string()), ('count', pa.int64()), ('uniques', pa.int64())])
+
+# Every column in output order. Columns not in `dtype_mapping` are typed here; the integer ones
+# are typed from `dtype_mapping`, so a column that is None for every repository keeps its type.
+_COLUMNS = [
+    ('timestamp_utc', _TIMESTAMP), ('collection_date', pa.date32()), # UTC day of the run, the partition key
+    ('repository_name', pa.string()), ('collection_errors', pa.string()),
+    ('stars', None), ('watchers', None), ('forks_total', None), ('open_issues_total', None),
+    ('network_count', None), ('size_kb', None), ('language', pa.string()),
+    ('created_at_utc', _TIMESTAMP), ('pushed_at_utc', _TIMESTAMP),
+    ('archived', pa.bool_()), ('disabled', pa.bool_()), ('has_issues', pa.bool_()), ('has_projects', pa.bool_()),
+    ('has_wiki', pa.bool_()), ('has_pages', pa.bool_()), ('has_downloads', pa.bool_()),
+    ('has_discussions', pa.bool_()), ('license', pa.string()),
+    ('contributors_count_total', None), ('releases_count_total', None),
+    ('forks_new_last_period', None), ('contributors_additions_recent_weeks', None),
+    ('traffic_views_last_day_total', None), ('traffic_views_last_day_unique', None),
+    ('traffic_clones_last_day_total', None), ('traffic_clones_last_day_unique', None),
+    ('traffic_top_referrers_data', pa.list_(_REFERRER)), ('traffic_top_paths_data', pa.list_(_PATH)),
+    ('issues_opened_last_period', None), ('issues_closed_last_period', None),
+    ('prs_opened_last_period', None), ('prs_closed_last_period', None), ('prs_merged_last_period', None),
+    ('discussions_opened_last_period', None), ('discussions_comments_last_period', None),
+    ('issue_comments_last_period', None), ('pr_comments_last_period', None),
+    # API cost of collecting the row
+    ('api_calls', None), ('api_not_modified', None), ('api_endpoint_stats', pa.list_(_ENDPOINT)),
+]
+assert all(name in dtype_mapping for name, type_ in _COLUMNS if type_ is None)
+
+METRICS_SCHEMA = pa.schema([(name, type_ or pa.int64()) for name, type_ in _COLUMNS])
+
+
+def metrics_table(rows):
+    """Rows (dicts, possibly missing keys) as an Arrow table with the fixed schema."""
+    return pa.Table.from_pylist(rows, schema=METRICS_SCHEMA)
+
+
+def metrics_dataframe(table):
+    """The table as a DataFrame with nullable integers, for display."""
+    return table.to_pandas().astype(dtype_mapping)
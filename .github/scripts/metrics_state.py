@@ -0,0 +1,78 @@
+import json
+import os
+from datetime import datetime, timezone
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class MetricsState:
+    """Checkpoint persisted between metrics runs.
+
+    - `cursors`: per metric family, the time up to which items were already
+      fetched; the next run only asks for items updated after it.
+    - `windows`: per metric family, the timestamps of items seen inside the
+      lookback period, keyed by item ID, so counts for the period can be
+      computed from deltas alone.
+
+    Validators for conditional requests live in the `HttpCache` next to it.
+    """
+
+    def __init__(self, path, repository):
+        self.path = path
+        self.repository = repository
+        self.cursors = {}
+        self.windows = {}
+        data = self._load(path)
+        if data.get("repository") == repository:
+            self.cursors = data.get("cursors", {})
+            self.windows = data.get("windows", {})
+        elif data:
+            print(f"Warning: state file {path} belongs to {data.get('repository')}; starting fresh.")
+
+    @staticmethod
+    def _load(path):
+        if not path or not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not read state file {path} ({e}); starting fresh.")
+            return {}
+
+    def cursor(self, family, default):
+        """Time up to which `family` was collected, or `default` on the first run."""
+        value = self.cursors.get(family)
+        return max(_parse_time(value), default) if value else default
+
+    def advance(self, family, until):
+        self.cursors[family] = until.isoformat()
+
+    def record(self, family, item_id, timestamp):
+        """Remember that `item_id` happened at `timestamp` in `family`'s window."""
+        if timestamp is not None:
+            self.windows.setdefault(family, {})[str(item_id)] = timestamp.isoformat()
+
+    def count_since(self, family, cutoff):
+        """Drop window entries older than `cutoff` and count the rest."""
+        window = {k: v for k, v in self.windows.get(family, {}).items() if _parse_time(v) >= cutoff}
+        self.windows[family] = window
+        return len(window)
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = {
+            "version": 2,
+            "repository": self.repository,
+            "saved_at_utc": datetime.now(timezone.utc).isoformat(),
+            "cursors": self.cursors,
+            "windows": self.windows,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,214 @@
+"""A local stand-in for the GitHub REST and GraphQL APIs, to run and benchmark collect_metrics.py offline.
+
+Serves every endpoint the collector uses with synthetic, deterministic data
+per repository, including pagination `Link` headers, ETags with
+`304 Not Modified`, rate-limit headers, a `202` on the first contributor
+stats request and a configurable latency per request.
+
+    python .github/scripts/mock_github_server.py --port 8765 --latency-ms 50 &
+    GITHUB_API_URL=http://127.0.0.1:8765 GITHUB_GRAPHQL_URL=http://127.0.0.1:8765/graphql \\
+    GITHUB_TOKEN=dummy python .github/scripts/collect_metrics.py --org mock-org
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+RATE_LIMIT = 5000
+
+
+def _iso(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _seed(*parts):
+    return int(hashlib.sha256("/".join(map(str, parts)).encode()).hexdigest()[:8], 16)
+
+
+class MockGitHubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=0.0, org="mock-org", repos=4, items=250):
+        super().__init__(address, _Handler)
+        self.latency_ms = latency_ms
+        self.org = org
+        self.repo_names = [f"{org}/llama-stack-repo-{i}" for i in range(repos)]
+        self.items = items  # Forks and comments per repository, spread over the last days
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+        self.requests = 0
+        self.not_modified = 0
+        self.remaining = {"core": RATE_LIMIT, "graphql": RATE_LIMIT}
+        self._stats_requested = set()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _items(self, repo, kind):
+        """`items` synthetic objects, newest first, one every 45 minutes."""
+        return [{
+            "id": _seed(repo, kind, i),
+            "number": i + 1,
+            "created_at": _iso(self.now - timedelta(minutes=45 * i)),
+            "updated_at": _iso(self.now - timedelta(minutes=45 * i)),
+            "html_url": f"https://github.com/{repo}/{'pull' if i % 3 == 0 else 'issues'}/{i + 1}#c{i}",
+        } for i in range(self.items)]
+
+    def repository(self, repo):
+        seed = _seed(repo)
+        return {
+            "full_name": repo, "name": repo.split("/")[1], "archived": False, "disabled": False,
+            "stargazers_count": seed % 5000, "subscribers_count": seed % 200, "forks_count": seed % 900,
+            "open_issues_count": seed % 150, "network_count": seed % 900, "size": seed % 100000,
+            "language": "Python", "created_at": "2024-06-01T00:00:00Z", "pushed_at": _iso(self.now),
+            "has_issues": True, "has_projects": True, "has_wiki": False, "has_pages": False,
+            "has_downloads": True, "has_discussions": seed % 2 == 0, "default_branch": "main",
+            "license": {"spdx_id": "MIT"},
+        }
+
+    def resolve(self, path):
+        """Return (status, full list or object) for a REST path, or (404, None)."""
+        if path == f"/orgs/{self.org}/repos":
+            return 200, [self.repository(repo) for repo in self.repo_names]
+        match = re.match(r"^/repos/([^/]+/[^/]+)(/.*)?$", path)
+        if not match or match.group(1) not in self.repo_names:
+            return 404, None
+        repo, rest = match.group(1), match.group(2) or ""
+        days = [self.now.date() - timedelta(days=d) for d in range(14, 0, -1)]
+        if rest == "":
+            return 200, self.repository(repo)
+        if rest in ("/contributors", "/releases"):
+            return 200, [{"id": i} for i in range(_seed(repo, rest) % 120)]
+        if rest in ("/forks", "/issues/comments", "/pulls/comments"):
+            return 200, self._items(repo, rest)
+        if rest == "/stats/contributors":
+            with self._lock:
+                first = repo not in self._stats_requested
+                self._stats_requested.add(repo)
+            if first:
+                return 202, {}
+            weeks = [{"w": int((self.now - timedelta(weeks=w)).timestamp()), "a": w * 10, "d": w, "c": 1}
+                     for w in range(4)]
+            return 200, [{"author": {"login": f"dev{i}"}, "total": 4, "weeks": weeks} for i in range(5)]
+        if rest in ("/traffic/views", "/traffic/clones"):
+            kind = rest.rsplit("/", 1)[1]
+            return 200, {"count": 0, "uniques": 0, kind: [
+                {"timestamp": f"{day}T00:00:00Z", "count": _seed(repo, kind, day) % 300,
+                 "uniques": _seed(repo, kind, day) % 40} for day in days]}
+        if rest == "/traffic/popular/referrers":
+            return 200, [{"referrer": site, "count": 10, "uniques": 3} for site in ("github.com", "google.com")]
+        if rest == "/traffic/popular/paths":
+            return 200, [{"path": f"/{repo}", "title": repo, "count": 20, "uniques": 5}]
+        return 404, None
+
+    def search_counts(self, query):
+        """Answer the aliased `search { issueCount | discussionCount }` queries of run_search_counts."""
+        return {alias: {field: _seed(variable) % 25}
+                for alias, variable, field in re.findall(r"(\w+): search\(query: \$(\w+)[^{]*\{ (\w+) \}", query)}
+
+    def take(self, resource, not_modified=False):
+        with self._lock:
+            self.requests += 1
+            self.not_modified += not_modified
+            if not not_modified:  # Like GitHub, 304s do not count against the rate limit
+                self.remaining[resource] = max(self.remaining[resource] - 1, 0)
+            return self.remaining[resource]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: MockGitHubServer
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real server
+
+    def do_GET(self):
+        time.sleep(self.server.latency_ms / 1000)
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        status, payload = self.server.resolve(url.path)
+        if status != 200 or not isinstance(payload, list):
+            self._send(status, payload if status != 404 else {"message": "Not Found"})
+            return
+
+        # since / sort parameters only matter for the item lists, which are already newest first
+        if "since" in params:
+            payload = [item for item in payload if item.get("updated_at", "") >= params["since"].replace("+00:00", "Z")]
+        per_page = int(params.get("per_page", 30))
+        page = int(params.get("page", 1))
+        last_page = max((len(payload) + per_page - 1) // per_page, 1)
+        links = []
+        for rel, number in (("next", page + 1), ("last", last_page)):
+            if number <= last_page and (rel == "last" or page < last_page):
+                links.append(f'<{self.server.url}{url.path}?{urlencode(dict(params, page=number))}>; rel="{rel}"')
+        headers = {"Link": ", ".join(links)} if links else {}
+        self._send(200, payload[(page - 1) * per_page:page * per_page], headers)
+
+    def do_POST(self):
+        time.sleep(self.server.latency_ms / 1000)
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0)) or 0) or b"{}")
+        if urlparse(self.path).path.rstrip("/") != "/graphql":
+            self._send(404, {"message": "Not Found"})
+            return
+        self._send(200, {"data": self.server.search_counts(body.get("query", ""))}, resource="graphql")
+
+    def _send(self, status, payload, headers=None, resource="core"):
+        data = json.dumps(payload).encode() if status != 202 else b""
+        etag = f'"{hashlib.sha256(data).hexdigest()[:20]}"'
+        not_modified = status == 200 and self.command == "GET" and self.headers.get("If-None-Match") == etag
+        remaining = self.server.take(resource, not_modified)
+        self.send_response(304 if not_modified else status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("ETag", etag)
+        self.send_header("X-RateLimit-Limit", str(RATE_LIMIT))
+        self.send_header("X-RateLimit-Remaining", str(remaining))
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        self.send_header("X-RateLimit-Resource", resource)
+        if not_modified:
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+
+def start_mock_server(host="127.0.0.1", port=0, **kwargs) -> MockGitHubServer:
+    """Start a mock server in a background thread; port 0 picks a free port."""
+    server = MockGitHubServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Simulated latency per request")
+    parser.add_argument("--org", default="mock-org")
+    parser.add_argument("--repos", type=int, default=4, help="Repositories in the organization")
+    parser.add_argument("--items", type=int, default=250, help="Forks and comments per repository")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    server = MockGitHubServer((args.host, args.port), latency_ms=args.latency_ms, org=args.org,
+                              repos=args.repos, items=args.items)
+    print(f"Mock GitHub API listening on {server.url} ({len(server.repo_names)} repositories in {args.org}, "
+          f"latency {args.latency_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"\nServer stopped after {server.requests} requests ({server.not_modified} answered 304).")
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pyarrow as pa
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from metrics_dataset import COMPACTED_PREFIX, append_day, read_history  # noqa: E402
+from metrics_schema import METRICS_SCHEMA  # noqa: E402
+from mock_github_server import start_mock_server  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    server = start_mock_server(org="mock-org", repos=2, items=120)
+    yield server
+    server.shutdown()
+
+
+def collect(server, workdir, dataset):
+    env = dict(os.environ, GITHUB_TOKEN="dummy", GITHUB_API_URL=server.url, GITHUB_GRAPHQL_URL=f"{server.url}/graphql",
+               METRICS_STATE_DIR=str(workdir / ".metrics_state"), METRICS_DATASET_URI=str(dataset))
+    result = subprocess.run([sys.executable, str(SCRIPTS_DIR / "collect_metrics.py"), "--org", "mock-org"],
+                            cwd=workdir, env=env, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
+
+
+def test_second_run_reuses_etags_appends_and_compacts(server, tmp_path):
+    dataset = tmp_path / "dataset"
+    # A run from a completed month, left in its daily partition
+    last_month = datetime.now(timezone.utc).date().replace(day=1) - timedelta(days=1)
+    row = {field.name: None for field in METRICS_SCHEMA}
+    row.update(collection_date=last_month, repository_name="mock-org/old-repo")
+    append_day(pa.Table.from_pylist([row], schema=METRICS_SCHEMA), str(dataset), last_month)
+
+    collect(server, tmp_path, dataset)
+    first_run_not_modified = server.not_modified
+    output = collect(server, tmp_path, dataset)
+
+    # The second run revalidates with the stored ETags and gets 304s
+    assert server.not_modified > first_run_not_modified
+    assert "answered 304 Not Modified" in output
+
+    # Each run appended its own file to today's partition
+    today_partitions = [p for p in dataset.glob("date=*") if p.name != f"date={last_month.isoformat()}"]
+    assert len(today_partitions) == 1
+    assert len(list(today_partitions[0].glob("*.parquet"))) == 2
+
+    # The completed month was moved under the compacted prefix, with nothing left at the top level
+    assert not (dataset / f"date={last_month.isoformat()}").exists()
+    assert not list(dataset.glob("month=*"))
+    month_dir = dataset / COMPACTED_PREFIX / f"month={last_month.strftime('%Y-%m')}"
+    assert [p.name for p in month_dir.iterdir()] == ["part-0.parquet"]
+
+    history = read_history(str(dataset))
+    assert history.num_rows == 1 + 2 * 2
+    assert history.column("repository_name").to_pylist().count("mock-org/old-repo") == 1
@@ -0,0 +1,172 @@
+"""Admission control for chat turns sharing one model server.
+
+At most `max_in_flight` turns run at once. Other turns wait in a bounded
+queue that is served round-robin across users, so one user sending many
+messages cannot push everyone else back. A turn is shed with `QueueFull`
+when the queue (or the user's share of it) is full, or after waiting
+`max_wait` seconds.
+
+    admission = AdmissionController(max_in_flight=2)
+
+    async with admission.slot(user_id, on_wait=show_position):
+        ...  # run the turn
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from latency_stats import SAMPLES_KEPT, percentile
+
+
+class QueueFull(Exception):
+    """The turn was not admitted; the message is meant for the user."""
+
+
+@dataclass(eq=False)  # Waiters are compared by identity in the queues
+class _Waiter:
+    user_id: str
+    admitted: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+@dataclass
+class AdmissionStats:
+    admitted: int = 0
+    shed: int = 0
+    max_queued: int = 0
+    wait_seconds: deque = field(default_factory=lambda: deque(maxlen=SAMPLES_KEPT))  # Of the latest admissions
+
+    def __str__(self):
+        p95 = percentile(self.wait_seconds, 0.95, default=0.0)
+        return (f"Admitted: {self.admitted} | Shed: {self.shed} | Max queued: {self.max_queued} | "
+                f"Wait p95: {p95:.2f}s")
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight=2, max_queued=16, max_queued_per_user=2, max_wait=120.0):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.max_queued_per_user = max_queued_per_user
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.stats = AdmissionStats()
+        self._queues = OrderedDict()  # user_id -> deque of waiters; order is the round-robin order
+        self._changed = asyncio.Event()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_in_flight=int(os.getenv("CHAT_MAX_IN_FLIGHT", "2")),
+            max_queued=int(os.getenv("CHAT_MAX_QUEUED", "16")),
+            max_queued_per_user=int(os.getenv("CHAT_MAX_QUEUED_PER_USER", "2")),
+            max_wait=float(os.getenv("CHAT_MAX_WAIT_SECONDS", "120")),
+        )
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def position(self, waiter) -> Optional[int]:
+        """1-based place of `waiter` in the round-robin service order, or None once admitted."""
+        queue = self._queues.get(waiter.user_id)
+        if not queue or waiter not in queue:
+            return None
+        index = queue.index(waiter)
+        position = index + 1
+        before = True  # Users ahead in the rotation get one extra turn in the round of `waiter`
+        for user_id, other in self._queues.items():
+            if user_id == waiter.user_id:
+                before = False
+                continue
+            position += min(len(other), index + before)
+        return position
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _dispatch(self):
+        """Hand free slots to the next waiters, one user at a time."""
+        while self.in_flight < self.max_in_flight and self._queues:
+            user_id, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            del self._queues[user_id]
+            if queue:
+                self._queues[user_id] = queue  # Back of the rotation
+            if waiter.admitted.done():
+                continue  # Cancelled while queued
+            self.in_flight += 1
+            waiter.admitted.set_result(True)
+        self._notify()
+
+    def _remove(self, waiter):
+        queue = self._queues.get(waiter.user_id)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self._queues[waiter.user_id]
+            self._notify()
+
+    def release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    async def acquire(self, user_id, on_wait: Optional[Callable[[int], Awaitable[None]]] = None):
+        """Wait for a slot, calling `on_wait(position)` whenever the queue position changes."""
+        if self.in_flight < self.max_in_flight and not self._queues:
+            self.in_flight += 1
+            self.stats.admitted += 1
+            self.stats.wait_seconds.append(0.0)
+            return
+        if self.queued >= self.max_queued:
+            self.stats.shed += 1
+            raise QueueFull("⚠️ The assistant is at capacity right now. Please try again in a minute.")
+        if len(self._queues.get(user_id, ())) >= self.max_queued_per_user:
+            self.stats.shed += 1
+            raise QueueFull("⚠️ You already have messages waiting. Please wait for them to be answered.")
+
+        waiter = _Waiter(user_id, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(user_id, deque()).append(waiter)
+        self.stats.max_queued = max(self.stats.max_queued, self.queued)
+        self._notify()  # A new user joins the current round, ahead of others' later turns
+        deadline = waiter.enqueued_at + self.max_wait
+        reported = None
+        try:
+            while not waiter.admitted.done():
+                position = self.position(waiter)
+                if on_wait is not None and position != reported:
+                    reported = position
+                    await on_wait(position)
+                    continue  # The queue may have moved while reporting
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    self.stats.shed += 1
+                    raise QueueFull("⚠️ The assistant is too busy to answer right now. Please try again later.")
+                changed = asyncio.ensure_future(self._changed.wait())
+                try:
+                    await asyncio.wait([waiter.admitted, changed], timeout=timeout,
+                                       return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    changed.cancel()
+        except BaseException:
+            if waiter.admitted.done() and not waiter.admitted.cancelled():
+                self.release()  # Admitted just as the wait was cancelled
+            else:
+                waiter.admitted.cancel()
+                self._remove(waiter)
+            raise
+        self.stats.admitted += 1
+        self.stats.wait_seconds.append(time.perf_counter() - waiter.enqueued_at)
+
+    @asynccontextmanager
+    async def slot(self, user_id, on_wait=None):
+        await self.acquire(user_id, on_wait)
+        try:
+            yield
+        finally:
+            self.release()
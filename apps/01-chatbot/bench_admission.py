@@ -0,0 +1,95 @@
+"""Burst-load benchmark of the chatbot's admission control.
+
+A burst of users sends one message each at the same moment to a replayed
+stack whose "model" serves `--capacity` streams at full speed and slows
+every stream down beyond that, like a single Ollama. The turns are run as
+demo_01_app.py runs them (worker-thread streaming), first with no admission
+limit, then through an `AdmissionController`. Reports time to first token,
+turn latency and shed turns.
+
+    python bench_admission.py --users 16 --capacity 2 --max-queued 8 --speed 4
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from llama_stack_client import Agent, LlamaStackClient
+
+from admission import AdmissionController, QueueFull
+from event_stream import TextDelta, aiter_turn_events
+from latency_stats import percentile
+from stream_fixtures import load_fixture, start_replay_server, synthetic_session
+
+PROMPT = [{"role": "user", "content": "how to do great work?"}]
+
+
+async def run_turn(agent, session_id, admission, user_id, results):
+    submitted = time.perf_counter()
+    ttft = None
+    try:
+        async with admission.slot(user_id):
+            start_turn = lambda: agent.create_turn(messages=PROMPT, session_id=session_id, stream=True)
+            async for event in aiter_turn_events(start_turn):
+                if ttft is None and type(event) is TextDelta:
+                    ttft = time.perf_counter() - submitted
+    except QueueFull:
+        results["shed"] += 1
+        return
+    results["ttft"].append(ttft)
+    results["total"].append(time.perf_counter() - submitted)
+
+
+async def burst(agent, session_id, admission, users):
+    results = {"ttft": [], "total": [], "shed": 0}
+    started = time.perf_counter()
+    await asyncio.gather(*(run_turn(agent, session_id, admission, f"user{i}", results) for i in range(users)))
+    results["wall"] = time.perf_counter() - started
+    return results
+
+
+def report(label, results):
+    ttft, total, nan = results["ttft"], results["total"], float("nan")
+    print(f"{label:<22} TTFT p50 {percentile(ttft, 0.5, nan):6.2f}s  p95 {percentile(ttft, 0.95, nan):6.2f}s | "
+          f"turn p50 {percentile(total, 0.5, nan):6.2f}s  p95 {percentile(total, 0.95, nan):6.2f}s  "
+          f"max {max(total, default=float('nan')):6.2f}s | answered {len(total):>3}, shed {results['shed']:>3} "
+          f"| wall {results['wall']:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", help="Recorded session; default: a synthetic turn")
+    parser.add_argument("--tokens", type=int, default=100, help="Answer length of the synthetic turn")
+    parser.add_argument("--users", type=int, default=16)
+    parser.add_argument("--capacity", type=int, default=2, help="Streams the simulated model serves at full speed")
+    parser.add_argument("--max-in-flight", type=int, help="Admission limit (default: --capacity)")
+    parser.add_argument("--max-queued", type=int, default=8)
+    parser.add_argument("--speed", type=float, default=4.0, help="Replay speed-up of the recorded timing")
+    args = parser.parse_args()
+
+    exchanges = load_fixture(args.fixture) if args.fixture else synthetic_session(tokens=args.tokens)
+    server = start_replay_server(exchanges, speed=args.speed, capacity=args.capacity)
+    client = LlamaStackClient(base_url=server.url, http_client=httpx.Client(limits=httpx.Limits(max_connections=None)))
+    agent = Agent(client, model="replay", instructions="")
+    session_id = agent.create_session("bench_session")
+
+    async def run():
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=args.users))
+        single = await burst(agent, session_id, AdmissionController(max_in_flight=1), 1)
+        unlimited = AdmissionController(max_in_flight=args.users, max_queued=args.users)
+        limited = AdmissionController(max_in_flight=args.max_in_flight or args.capacity,
+                                      max_queued=args.max_queued, max_queued_per_user=1)
+        print(f"{args.users} users at once, model capacity {args.capacity} streams, speed x{args.speed}\n")
+        report("single user", single)
+        report("no admission control", await burst(agent, session_id, unlimited, args.users))
+        report(f"admission {limited.max_in_flight}+{limited.max_queued}", await burst(agent, session_id, limited, args.users))
+        print(f"\n{limited.stats}")
+
+    asyncio.run(run())
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
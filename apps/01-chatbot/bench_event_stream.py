@@ -0,0 +1,98 @@
+"""Benchmark `iter_turn_events` against `AgentEventLogger` on a recorded turn.
+
+The turn is replayed from a fixture (see stream_fixtures.py; a synthetic one
+is generated when none is given) and its chunks are kept in memory, so only
+the event processing is timed, the way demo_01_app.py consumes it: text is
+handed on, everything else is dropped. Reports events/s and the peak memory
+traced by `tracemalloc` while processing one turn, then the end-to-end time
+of replayed turns (HTTP, SSE parsing and processing, no model time).
+
+    python bench_event_stream.py --fixture fixtures/great_work.jsonl --iterations 2000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import httpx
+from llama_stack_client import Agent, AgentEventLogger, LlamaStackClient
+
+from event_stream import TextDelta, iter_turn_events
+from stream_fixtures import load_fixture, start_replay_server, synthetic_session
+
+PROMPT = [{"role": "user", "content": "how to do great work?"}]
+
+
+def with_event_logger(response, sink):
+    for log in AgentEventLogger().log(response):
+        if hasattr(log, 'content') and log.content:
+            sink(log.content)
+
+
+def with_turn_events(response, sink):
+    for event in iter_turn_events(response):
+        if type(event) is TextDelta:
+            sink(event.text)
+
+
+PROCESSORS = {"AgentEventLogger": with_event_logger, "iter_turn_events": with_turn_events}
+
+
+def bench(label, process, chunks, iterations):
+    out = []
+    process(chunks, out.append)  # warm up
+    out.clear()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        process(chunks, out.append)
+        out.clear()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    process(chunks, out.append)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rate = len(chunks) * iterations / elapsed
+    print(f"{label:<20} {rate:>12,.0f} events/s  ({elapsed / iterations * 1e6:>8.1f} µs/turn, "
+          f"peak {peak / 1024:>7.1f} KiB)")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", help="Recorded session; default: a synthetic turn")
+    parser.add_argument("--tokens", type=int, default=200, help="Answer length of the synthetic turn")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=20, help="Replayed turns for the end-to-end timing")
+    args = parser.parse_args()
+
+    exchanges = load_fixture(args.fixture) if args.fixture else synthetic_session(tokens=args.tokens)
+    server = start_replay_server(exchanges, speed=0)
+    client = LlamaStackClient(base_url=server.url, http_client=httpx.Client())
+    agent = Agent(client, model="replay", instructions="")
+    session_id = agent.create_session("bench_session")
+
+    chunks = list(agent.create_turn(messages=PROMPT, session_id=session_id, stream=True))
+    print(f"Turn: {len(chunks)} chunks, {args.iterations} iterations\n")
+    rates = {label: bench(label, process, chunks, args.iterations) for label, process in PROCESSORS.items()}
+    print(f"\nSpeed-up: {rates['iter_turn_events'] / rates['AgentEventLogger']:.1f}x")
+
+    print(f"\nEnd to end, {args.turns} replayed turns (no model time):")
+    for label, process in PROCESSORS.items():
+        start = time.perf_counter()
+        for _ in range(args.turns):
+            process(agent.create_turn(messages=PROMPT, session_id=session_id, stream=True), lambda text: None)
+        print(f"{label:<20} {(time.perf_counter() - start) / args.turns * 1000:>8.2f} ms/turn")
+
+    turn = agent.create_turn(messages=PROMPT, session_id=session_id, stream=False)
+    for label, process in PROCESSORS.items():
+        try:
+            process(turn, lambda text: None)
+            print(f"{label:<20} handles a non-streaming turn")
+        except Exception as e:
+            print(f"{label:<20} fails on a non-streaming turn: {type(e).__name__}: {e}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Size / latency / recall benchmark of the FAISS index types in faiss_index.py.
+
+Builds every preset on the same synthetic corpus of normalized, clustered
+embeddings (like sentence embeddings of related documents) and reports
+build time, serialized index size, peak RSS, single-query latency and
+recall@k against an exact flat search. The serialized size is what the index
+stores (vectors or codes, graph links, centroids). The peak RSS is what
+building and searching it actually took on top of the corpus, including
+training buffers and allocator slack: each index is built and queried in a
+forked child process, which reports how far its resident-set high-water mark
+rose above the one it started with.
+
+    python bench_faiss_index.py --count 100000 --dimension 384
+    python bench_faiss_index.py --count 1000000 --index flat --index ivf-pq
+"""
+
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+
+import faiss
+import numpy as np
+
+from faiss_index import PRESETS, IndexConfig, _normalize
+from latency_stats import percentile
+
+
+def synthetic_corpus(count, dimension, clusters=1000, queries=200, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension), dtype=np.float32)
+    vectors = np.empty((count, dimension), dtype=np.float32)
+    for start in range(0, count, 100_000):  # In blocks, so a million vectors are held once rather than three times
+        block = centers[rng.integers(clusters, size=min(100_000, count - start))]
+        block += 0.5 * rng.standard_normal(block.shape, dtype=np.float32)
+        vectors[start:start + len(block)] = _normalize(block)
+    questions = centers[rng.integers(clusters, size=queries)]
+    questions += 0.5 * rng.standard_normal((queries, dimension), dtype=np.float32)
+    return vectors, _normalize(questions)
+
+
+def recall(ids, truth):
+    return np.mean([len(set(found) & set(expected)) / len(expected) for found, expected in zip(ids, truth)])
+
+
+def max_rss_bytes():
+    """High-water mark of this process's resident set size."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def in_child(function, *args):
+    """Call `function(*args)` in a forked process and return its result.
+
+    The child shares the corpus with this process instead of copying it, and
+    starts with this process's RSS as its high-water mark. FAISS's OpenMP
+    threads only ever run in children: libgomp does not survive a fork once
+    its thread pool has started.
+    """
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_child_main, args=(sender, function, args))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = RuntimeError(f"{function.__name__} died in the child process (exit code {process.exitcode})")
+    process.join()
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+
+def _child_main(sender, function, args):
+    try:
+        result = function(*args)
+    except BaseException as e:
+        result = e
+    sender.send(result)
+
+
+def exact_neighbours(vectors, queries, k):
+    exact = faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(vectors)
+    return exact.search(queries, k)[1]
+
+
+def serialized_size(index):
+    """Bytes `faiss.write_index` writes, counted as they stream out.
+
+    `faiss.serialize_index` would hold the index a second (and, while its
+    buffer grows, a third) time, which a million-vector index cannot afford.
+    """
+    size = 0
+
+    def count(chunk):
+        nonlocal size
+        size += len(chunk)
+
+    faiss.write_index(index, faiss.PyCallbackIOWriter(count))
+    return size
+
+
+def measure(config, vectors, queries, truth, k):
+    baseline_rss = max_rss_bytes()
+    start = time.perf_counter()
+    index = config.build(vectors)
+    build_seconds = time.perf_counter() - start
+    latencies, found = [], []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k)
+        latencies.append(time.perf_counter() - start)
+        found.append(ids[0])
+    return build_seconds, serialized_size(index), max_rss_bytes() - baseline_rss, latencies, recall(found, truth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100_000, help="Corpus size")
+    parser.add_argument("--dimension", type=int, default=384, help="Embedding size (all-MiniLM-L6-v2: 384)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--index", action="append", help=f"Preset or factory string; default: all of {', '.join(PRESETS)}")
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--ef-search", type=int, default=64)
+    args = parser.parse_args()
+
+    vectors, queries = synthetic_corpus(args.count, args.dimension, queries=args.queries)
+    truth = in_child(exact_neighbours, vectors, queries, args.k)
+
+    print(f"{args.count} vectors x {args.dimension} dims ({vectors.nbytes / 2**20:.0f} MiB raw), "
+          f"{args.queries} queries, recall@{args.k}, {faiss.omp_get_max_threads()} threads\n")
+    print(f"{'index':<26} {'build':>8} {'serialized':>10} {'peak RSS':>10} {'p50':>9} {'p99':>9} {'recall':>7}")
+    for name in args.index or PRESETS:
+        config = IndexConfig(factory=name, nprobe=args.nprobe, ef_search=args.ef_search)
+        build_seconds, serialized_size, peak_rss, latencies, hit_rate = in_child(
+            measure, config, vectors, queries, truth, args.k)
+        factory = config.factory_string(args.dimension, args.count)
+        print(f"{factory:<26} {build_seconds:7.1f}s {serialized_size / 2**20:7.1f}MiB {peak_rss / 2**20:7.1f}MiB "
+              f"{percentile(latencies, 0.5) * 1000:7.2f}ms {percentile(latencies, 0.99) * 1000:7.2f}ms {hit_rate:7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Recall / latency benchmark of hybrid retrieval against pure vector search.
+
+Chunks the sources like the chatbot does (50 tokens), embeds them with the
+stack's embedding model, and asks known-item questions generated from the
+chunks:
+
+- terms: the two or three rarest words of a chunk, like the names and dates
+  users ask about ("bering land bridge 1980")
+- phrase: eight consecutive words from the middle of a chunk
+
+A question is answered if a chunk containing its words (or its phrase) is in
+the top k. These questions quote the text, so BM25 finds them by
+construction: they measure what vector search misses, not how well
+paraphrased questions are served. For that, hand-written questions about a
+source are added where data/labelled_questions.jsonl has some:
+
+- labelled: a question in other words than the text, like "When did the
+  Bering Land Bridge become a national preserve?", answered by the chunks
+  containing its labelled answer phrase
+
+The benchmark compares vector search, BM25, their fusion and the fusion with
+the rerank. Search latency excludes the query embedding, which every mode
+but BM25 pays once; it is reported on its own.
+
+    python bench_hybrid_search.py --base-url http://localhost:5001 --source https://www.paulgraham.com/greatwork.html
+    python bench_hybrid_search.py --base-url http://localhost:5001 --source https://www.nps.gov/aboutus/upload/NPIndex2012-2016.pdf
+
+Without `--base-url`, hashed character trigrams stand in for the embedding
+model. That checks the plumbing offline but says little about real vector
+search.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+from faiss_index import IndexConfig
+from hybrid_search import HybridRetriever
+from ingest import chunk_document, embed, fetch_text
+from latency_stats import percentile
+
+DEFAULT_LABELLED = Path(__file__).parent / "data" / "labelled_questions.jsonl"
+
+
+def hashed_trigrams(texts, dimension=384):
+    vectors = np.zeros((len(texts), dimension), dtype=np.float32)
+    for row, text in enumerate(texts):
+        text = f" {text.lower()} "
+        for start in range(len(text) - 2):
+            vectors[row, int(hashlib.md5(text[start:start + 3].encode()).hexdigest()[:8], 16) % dimension] += 1
+    return vectors
+
+
+def known_item_questions(retriever, count, seed=0):
+    """(kind, question, indices of the chunks that answer it) triples."""
+    rng = random.Random(seed)
+    lexical = retriever.lexical
+    questions = []
+    for doc_id in rng.sample(range(len(retriever.chunks)), min(count, len(retriever.chunks))):
+        doc_terms = sorted(set(lexical.doc_terms[doc_id]), key=lambda term: (-lexical.idf(term), term))
+        rare = doc_terms[:rng.choice((2, 3))]
+        if rare:
+            answers = [i for i, doc in enumerate(lexical.doc_terms) if set(rare) <= set(doc)]
+            questions.append(("terms", " ".join(rare), answers))
+        words = retriever.chunks[doc_id].text.split()
+        if len(words) >= 12:
+            start = (len(words) - 8) // 2
+            phrase = " ".join(words[start:start + 8])
+            answers = [i for i, chunk in enumerate(retriever.chunks) if phrase in " ".join(chunk.text.split())]
+            questions.append(("phrase", phrase, answers))
+    return questions
+
+
+def _normalized(text):
+    return " ".join(text.split()).lower()
+
+
+def labelled_questions(path, sources, chunks):
+    """("labelled", question, indices of the chunks containing its answer) triples for the given sources.
+
+    Also returns the questions whose answer phrase is in no chunk (e.g. the
+    document changed), which are left out.
+    """
+    texts = [_normalized(chunk.text) for chunk in chunks]
+    questions, unanswerable = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry["source"] not in sources:
+                continue
+            answer = _normalized(entry["answer"])
+            answers = [i for i, text in enumerate(texts) if answer in text]
+            if answers:
+                questions.append(("labelled", entry["question"], answers))
+            else:
+                unanswerable.append(entry["question"])
+    return questions, unanswerable
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", action="append", help="URL or file to index (repeatable)")
+    parser.add_argument("--base-url", help="Llama Stack to embed with; default: hashed trigrams")
+    parser.add_argument("--embedding-model", help="Default: the stack's first embedding model")
+    parser.add_argument("--chunk-size", type=int, default=50, help="Tokens per chunk")
+    parser.add_argument("--questions", type=int, default=100, help="Chunks to generate questions from")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--index", default="flat", help="faiss_index.py preset or factory string")
+    parser.add_argument("--labelled", default=str(DEFAULT_LABELLED), help="Hand-written questions (JSON lines)")
+    args = parser.parse_args()
+
+    sources = args.source or ["https://www.paulgraham.com/greatwork.html"]
+    chunks = []
+    for number, source in enumerate(sources, start=1):
+        chunks.extend(chunk_document(f"document_{number}", fetch_text(source), args.chunk_size))
+
+    if args.base_url:
+        from llama_stack_client import LlamaStackClient
+
+        client = LlamaStackClient(base_url=args.base_url, timeout=120)
+        model_id = args.embedding_model or next(m for m in client.models.list() if m.model_type == "embedding").identifier
+        cache = EmbeddingCache.from_env(model_id)  # Repeated runs only embed the questions
+        embed_texts = lambda texts: embed(client, model_id, texts, cache=cache if len(texts) > 1 else None)
+    else:
+        model_id = "hashed trigrams (offline stand-in)"
+        embed_texts = hashed_trigrams
+
+    start = time.perf_counter()
+    vectors = embed_texts([chunk.text for chunk in chunks])
+    embed_seconds = time.perf_counter() - start
+    retriever = HybridRetriever(chunks, vectors, lambda query: embed_texts([query])[0], IndexConfig(factory=args.index))
+    questions = known_item_questions(retriever, args.questions)
+    labelled, unanswerable = labelled_questions(args.labelled, sources, chunks)
+    questions += labelled
+
+    print(f"{len(chunks)} chunks of {args.chunk_size} tokens from {len(sources)} source(s), embedded in {embed_seconds:.1f}s "
+          f"with {model_id}\n{len(questions)} questions ({len(labelled)} labelled), recall@{args.k}, index {args.index}\n")
+    for question in unanswerable:
+        print(f"⚠️  Skipped labelled question, its answer is in no chunk: {question}")
+
+    query_vectors, embed_latencies = [], []
+    for _, question, _ in questions:
+        start = time.perf_counter()
+        query_vectors.append(retriever.embed_query(question))
+        embed_latencies.append(time.perf_counter() - start)
+
+    modes = {
+        "vector": lambda q, v: [i for i, _ in retriever.vector_search(q, args.k, v)],
+        "bm25": lambda q, v: [i for i, _ in retriever.lexical_search(q, args.k)],
+        "hybrid (rrf)": lambda q, v: [i for i, _ in retriever.search_ids(q, args.k, rerank=False, query_vector=v)],
+        "hybrid + rerank": lambda q, v: [i for i, _ in retriever.search_ids(q, args.k, rerank=True, query_vector=v)],
+    }
+    kinds = sorted({kind for kind, _, _ in questions})
+    print(f"{'mode':<16} " + " ".join(f"{kind:>8}" for kind in kinds) + f" {'all':>8} {'p50':>9} {'p95':>9}")
+    for name, search in modes.items():
+        hits, latencies = {kind: [] for kind in kinds}, []
+        for (kind, question, answers), query_vector in zip(questions, query_vectors):
+            start = time.perf_counter()
+            found = search(question, query_vector)
+            latencies.append(time.perf_counter() - start)
+            hits[kind].append(bool(set(found) & set(answers)))
+        every = [hit for kind in kinds for hit in hits[kind]]
+        print(f"{name:<16} " + " ".join(f"{np.mean(hits[kind]):8.3f}" for kind in kinds) + f" {np.mean(every):8.3f} "
+              f"{percentile(latencies, 0.5) * 1000:7.2f}ms {percentile(latencies, 0.95) * 1000:7.2f}ms")
+    print(f"\nQuery embedding: p50 {percentile(embed_latencies, 0.5) * 1000:.2f}ms, "
+          f"p95 {percentile(embed_latencies, 0.95) * 1000:.2f}ms (vector and hybrid modes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Time to first useful content vs time to first token, on a replayed turn.
+
+Replays a turn that calls knowledge_search (recorded, or synthetic) with
+its original timing, and processes it the way demo_01_app.py does. The
+sources count as shown once the tool_execution step completes, and the
+answer once its first token arrives. Reports both times, which shows how
+much sooner progressive rendering puts something on screen.
+
+    python bench_perceived_latency.py --turns 5
+"""
+
+import argparse
+import asyncio
+
+from llama_stack_client import Agent, LlamaStackClient
+
+from event_stream import StepBoundary, TextDelta, aiter_turn_events, retrieved_chunks
+from perceived_latency import PerceivedLatency, TurnTimer
+from stream_fixtures import load_fixture, start_replay_server, synthetic_session
+
+PROMPT = [{"role": "user", "content": "how to do great work?"}]
+
+
+async def run_turn(agent, session_id, show_sources):
+    timer = TurnTimer()
+    start_turn = lambda: agent.create_turn(messages=PROMPT, session_id=session_id, stream=True)
+    async for event in aiter_turn_events(start_turn):
+        if type(event) is TextDelta:
+            timer.token_shown()
+        elif show_sources and type(event) is StepBoundary and event.step_type == "tool_execution" \
+                and event.event_type == "step_complete" and retrieved_chunks(event.details):
+            timer.sources_shown()
+    return timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", help="Recorded session; default: a synthetic turn")
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed-up of the recorded timing")
+    args = parser.parse_args()
+
+    exchanges = load_fixture(args.fixture) if args.fixture else synthetic_session(tokens=50)
+    server = start_replay_server(exchanges, speed=args.speed)
+    client = LlamaStackClient(base_url=server.url)
+    agent = Agent(client, model="replay", instructions="")
+    session_id = agent.create_session("bench_session")
+
+    async def run():
+        for label, show_sources in (("answer only", False), ("sources first", True)):
+            stats = PerceivedLatency()
+            for _ in range(args.turns):
+                stats.record(await run_turn(agent, session_id, show_sources))
+            print(f"{label:<14} {stats}")
+
+    asyncio.run(run())
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
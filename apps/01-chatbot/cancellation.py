@@ -0,0 +1,112 @@
+"""Cancel agent turns that nobody is reading any more.
+
+A turn runs in a worker thread (see `event_stream.aiter_turn_events`).
+Stopping it means closing its HTTP stream, so the server sees the client
+disconnect and aborts the generation. Breaking out of the loop is not
+enough, because the client drains or holds the connection until the
+response ends.
+
+Responses are tracked through an httpx response hook installed by
+`cancellable_http_client()`. The hook registers every response opened
+by the thread that currently runs a `TurnScope`. `TurnScope.cancel()`
+can be called from any thread. It shuts the sockets down, which wakes a
+read blocked while the model is still thinking, and it tells the worker
+to stop at the next event.
+"""
+
+import socket
+import threading
+from dataclasses import dataclass
+
+import httpx
+from llama_stack_client import DefaultHttpxClient
+
+_local = threading.local()
+
+
+class TurnCancelled(Exception):
+    """The turn was stopped before it completed."""
+
+
+class TurnScope:
+    """Cancellation handle of one turn, shared by the event loop and the worker thread."""
+
+    def __init__(self):
+        self.text_deltas = 0  # Streamed so far; roughly one token each
+        self._cancelled = threading.Event()
+        self._responses = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def __enter__(self):
+        _local.scope = self
+        return self
+
+    def __exit__(self, *exc_info):
+        _local.scope = None
+        with self._lock:
+            responses, self._responses = self._responses, []
+        for response in responses:
+            response.close()
+
+    def track(self, response):
+        with self._lock:
+            self._responses.append(response)
+        if self.cancelled:
+            _abort(response)
+
+    def cancel(self):
+        """Stop the turn; safe to call more than once and from any thread."""
+        self._cancelled.set()
+        with self._lock:
+            responses = list(self._responses)
+        for response in responses:
+            _abort(response)
+
+
+def _abort(response):
+    network_stream = response.extensions.get("network_stream")
+    sock = network_stream.get_extra_info("socket") if network_stream is not None else None
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # Already closed
+
+
+def _track_response(response):
+    scope = getattr(_local, "scope", None)
+    if scope is not None:
+        scope.track(response)
+
+
+def cancellable_http_client(**kwargs) -> httpx.Client:
+    """An httpx client for `LlamaStackClient(http_client=...)` whose turns a `TurnScope` can abort.
+
+    Built on `DefaultHttpxClient`, so it keeps the SDK's timeout, connection
+    limits and redirect handling rather than plain httpx defaults.
+    """
+    return DefaultHttpxClient(event_hooks={"response": [_track_response]}, **kwargs)
+
+
+@dataclass
+class CancellationStats:
+    completed: int = 0
+    cancelled: int = 0
+    completed_deltas: int = 0
+    tokens_saved: int = 0  # Estimated: the average answer length minus what was streamed
+
+    def record(self, scope):
+        if scope.cancelled:
+            self.cancelled += 1
+            average = self.completed_deltas / self.completed if self.completed else 0
+            self.tokens_saved += max(int(average) - scope.text_deltas, 0)
+        else:
+            self.completed += 1
+            self.completed_deltas += scope.text_deltas
+
+    def __str__(self):
+        return f"Completed: {self.completed} | Cancelled: {self.cancelled} | Est. tokens saved: {self.tokens_saved}"
@@ -0,0 +1,166 @@
+"""Near-duplicate chunk elimination before embedding.
+
+Web pages repeat navigation and footers, and PDFs repeat page headers and
+index lines, so 50-token chunks of them contain many (near) copies. Each
+copy costs an embedding and index space, and fills the top k of a search
+with the same text. `deduplicate` keeps the first chunk of every group of
+near-duplicates:
+
+- Each chunk is reduced to a MinHash signature of its word 3-grams. The
+  share of equal signature values estimates the Jaccard similarity of two
+  chunks.
+- An LSH index (signature bands hashed into buckets) finds candidate pairs
+  without comparing every chunk with every other one.
+- A candidate is dropped if its estimated similarity to a kept chunk is at
+  least `threshold`. Identical texts are caught before any of that.
+
+Overlapping neighbor chunks share a quarter of their tokens, far below the
+default threshold of 0.8, so they are kept.
+
+    INGEST_DEDUP_THRESHOLD=0.8    0 or "off" disables deduplication
+
+    python dedup.py https://www.paulgraham.com/greatwork.html NPIndex2012-2016.pdf
+"""
+
+import argparse
+import os
+import re
+import zlib
+from dataclasses import dataclass, field
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+_PRIME = np.uint64(4294967311)  # First prime above 2**32; with 32-bit coefficients nothing overflows 64 bits
+
+
+@dataclass
+class DedupReport:
+    chunks: int = 0
+    exact: int = 0
+    near: int = 0
+    text_bytes_saved: int = 0
+    embedding_bytes_saved: int = 0  # Filled in once the embedding size is known
+    merged_into: dict = field(default_factory=dict)  # Dropped chunk id -> id of the chunk kept in its place
+
+    @property
+    def dropped(self):
+        return self.exact + self.near
+
+    def __str__(self):
+        return (f"Chunks: {self.chunks} -> {self.chunks - self.dropped} | Dropped: {self.exact} exact, {self.near} near "
+                f"| Embeddings saved: {self.dropped} | Bytes saved: {self.text_bytes_saved:,} text, "
+                f"{self.embedding_bytes_saved:,} embeddings")
+
+
+def shingles(text, size=3) -> set:
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode())}
+    return {zlib.crc32(" ".join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm=128, seed=1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 2**32, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 2**32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashed_shingles) -> np.ndarray:
+        values = np.fromiter(hashed_shingles, dtype=np.uint64).reshape(-1, 1)
+        return ((values * self.a + self.b) % _PRIME).min(axis=0)
+
+
+def lsh_bands(num_perm, threshold):
+    """(bands, rows) with rows * bands == num_perm, whose S-curve rises closest below `threshold`.
+
+    Rising below it trades a few more candidates to check for fewer missed duplicates.
+    """
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    rise = lambda option: (1 / option[0]) ** (1 / option[1])
+    return max((option for option in options if rise(option) <= threshold), key=rise, default=options[0])
+
+
+class MinHashLSH:
+    """Buckets of signature bands; signatures that share a bucket in any band are candidates."""
+
+    def __init__(self, num_perm=128, threshold=0.8):
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+        self.buckets = [dict() for _ in range(self.bands)]
+        self.signatures = {}
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def candidates(self, signature) -> set:
+        found = set()
+        for buckets, key in zip(self.buckets, self._band_keys(signature)):
+            found.update(buckets.get(key, ()))
+        return found
+
+    def add(self, key, signature):
+        self.signatures[key] = signature
+        for buckets, band_key in zip(self.buckets, self._band_keys(signature)):
+            buckets.setdefault(band_key, []).append(key)
+
+
+def deduplicate(chunks, threshold=0.8, num_perm=128, shingle_size=3):
+    """The chunks without near-duplicates of earlier chunks, and a `DedupReport`."""
+    report = DedupReport(chunks=len(chunks))
+    hasher = MinHasher(num_perm)
+    index = MinHashLSH(num_perm, threshold)
+    seen_texts = {}
+    kept = []
+    for chunk in chunks:
+        normalized = " ".join(chunk.text.split()).lower()
+        original = seen_texts.get(normalized)
+        if original is None:
+            signature = hasher.signature(shingles(chunk.text, shingle_size))
+            original = next((key for key in index.candidates(signature)
+                             if np.mean(index.signatures[key] == signature) >= threshold), None)
+            if original is None:
+                seen_texts[normalized] = chunk.chunk_id
+                index.add(chunk.chunk_id, signature)
+                kept.append(chunk)
+                continue
+            report.near += 1
+        else:
+            report.exact += 1
+        report.merged_into[chunk.chunk_id] = original
+        report.text_bytes_saved += len(chunk.text.encode("utf-8"))
+    return kept, report
+
+
+def threshold_from_env():
+    """The INGEST_DEDUP_THRESHOLD setting, or None if deduplication is off."""
+    value = os.getenv("INGEST_DEDUP_THRESHOLD", "0.8")
+    if value.lower() in ("", "0", "off"):
+        return None
+    return float(value)
+
+
+def main():
+    from ingest import chunk_document, fetch_text
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", nargs="+", help="URL or file")
+    parser.add_argument("--chunk-size", type=int, default=50, help="Tokens per chunk")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Estimated Jaccard similarity of a duplicate")
+    parser.add_argument("--dimension", type=int, default=384, help="Embedding size, for the bytes saved")
+    parser.add_argument("--show", type=int, default=3, help="Near-duplicate pairs to print")
+    args = parser.parse_args()
+
+    chunks = []
+    for number, source in enumerate(args.source, start=1):
+        chunks.extend(chunk_document(f"document_{number}", fetch_text(source), args.chunk_size))
+    kept, report = deduplicate(chunks, args.threshold)
+    report.embedding_bytes_saved = report.dropped * args.dimension * 4
+    print(report)
+
+    texts = {chunk.chunk_id: chunk.text for chunk in chunks}
+    for dropped, original in list(report.merged_into.items())[:args.show]:
+        print(f"\n- {' '.join(texts[dropped].split())[:150]}\n= {' '.join(texts[original].split())[:150]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,66 @@
+import os
+
 import chainlit as cl
-from demo_01_client import agent, model_id, AgentEventLogger
+from admission import AdmissionController, QueueFull
+from cancellation import CancellationStats, TurnCancelled, TurnScope
+from demo_01_client import agent, client, embedding_model_id, model_id
+from event_stream import StepBoundary, TextDelta, ToolCall, aiter_turn_events, retrieved_chunks
+from perceived_latency import PerceivedLatency, TurnTimer
+from warmup import KeepAlive
+
+# Show the retrieved sources as soon as the search returns, before the answer streams
+show_sources = os.getenv("CHAT_SHOW_SOURCES", "1") != "0"
+perceived_latency = PerceivedLatency()
+
+# One model server is shared by every chat: limit the turns running at once
+admission = AdmissionController.from_env()
+cancellations = CancellationStats()
+
+# Keep the models loaded between questions while people are using the chat
+keep_alive = KeepAlive.from_env(client, model_id, embedding_model_id)
+keep_alive.start()
+
+
+def source_preview(number, chunk, width=160):
+    text = " ".join(chunk.text.split())
+    score = f" ({chunk.score:.2f})" if chunk.score is not None else ""
+    return f"**Source {number}**{score}: {text[:width]}{'…' if len(text) > width else ''}"
+
 
-# Session variable
-session_id = None
+def user_key():
+    """Fairness is per signed-in user, or per browser session without authentication."""
+    user = cl.user_session.get("user")
+    return user.identifier if user else cl.user_session.get("id")
 
 
 @cl.on_chat_start
 async def on_chat_start():
     """Initialize the chat session"""
-    global session_id
     print("=== Starting new chat session ===")
     session_id = agent.create_session("chat_session")
+    cl.user_session.set("session_id", session_id)
     print(f"📝 Created agent session: {session_id}")
 
+async def stop_turn():
+    """Abort the turn in progress, if any, so the model stops generating for nobody."""
+    scope = cl.user_session.get("turn_scope")
+    if scope is not None:
+        scope.cancel()
+
+
+@cl.on_stop
+async def on_stop():
+    """The user pressed stop"""
+    print("⏹️ UI: Stop requested")
+    await stop_turn()
+
+
+@cl.on_chat_end
+async def on_chat_end():
+    """The user closed the chat or disconnected"""
+    print("👋 UI: Chat ended")
+    await stop_turn()
+
 @cl.set_starters
 async def set_starters():
     """Set starter suggestions for the user"""
@@ -42,8 +90,10 @@ async def set_starters():
 @cl.on_message
 async def on_message(message: cl.Message):
     """Handle incoming messages"""
-    global session_id
+    timer = TurnTimer()
+    session_id = cl.user_session.get("session_id")
     print(f"\n📥 UI: Received user message: {message.content}")
+    keep_alive.touch()
     print(f"🔍 UI: Checking system readiness (agent: {agent is not None}, session: {session_id is not None})")
     
     if not agent or not session_id:
@@ -53,29 +103,97 @@ async def on_message(message: cl.Message):
         await cl.Message(error_msg).send()
         print("✅ UI: Error response sent")
         return
-    
-    try:
-        print("🤖 Creating agent response...")
-        # Get response from agent
-        response = agent.create_turn(
+
+    # While the turn waits for a slot, a notice shows its place in the queue
+    notice = None
+
+    async def show_position(position):
+        nonlocal notice
+        content = f"⏳ Waiting for a free slot: you are #{position} in line..."
+        if notice is None:
+            notice = cl.Message(content=content)
+            await notice.send()
+        else:
+            notice.content = content
+            await notice.update()
+
+    def start_turn():
+        return agent.create_turn(
             session_id=session_id,
             messages=[{"role": "user", "content": message.content}],
-            stream=True, # TODO: Enable streaming
+            stream=True,
         )
 
-        # Create empty message for streaming
-        msg = cl.Message(content="")
-        
-        # Stream tokens to Chainlit UI
-        for log in AgentEventLogger().log(response):
-            log.print()
-            # Stream the text content from TurnStreamPrintableEvent
-            if hasattr(log, 'content') and log.content:
-                await msg.stream_token(log.content)
-        
-        # Send the completed message
-        await msg.send()
-        
+    # Stop and disconnect handlers cancel the turn through its scope, even while it is queued
+    scope = TurnScope()
+    cl.user_session.set("turn_scope", scope)
+    started = False
+    sources = None  # The message that shows the search, then what it found
+
+    async def show_search(event):
+        nonlocal sources
+        query = event.arguments.get("query", "") if isinstance(event.arguments, dict) else ""
+        sources = cl.Message(content=f"🔍 Searching the documents for: {query}")
+        await sources.send()
+
+    async def show_retrieved(event):
+        nonlocal sources
+        chunks = retrieved_chunks(event.details)
+        if not chunks:
+            return
+        if sources is None:
+            sources = cl.Message(content="")
+            await sources.send()
+        # Full texts open in the side panel from the source names in the message
+        for number, chunk in enumerate(chunks, start=1):
+            await cl.Text(name=f"Source {number}", content=chunk.text, display="side").send(for_id=sources.id)
+        sources.content = f"📚 Found {len(chunks)} sources:\n\n" + "\n\n".join(
+            source_preview(number, chunk) for number, chunk in enumerate(chunks, start=1))
+        await sources.update()
+        timer.sources_shown()
+
+    try:
+        async with admission.slot(user_key(), on_wait=show_position):
+            started = True
+            print(f"🤖 Creating agent response... ({admission.in_flight} in flight, {admission.queued} queued)")
+            if notice is not None:
+                await notice.remove()
+
+            # Create empty message for streaming
+            msg = cl.Message(content="")
+
+            # Stream tokens to Chainlit UI; the blocking client runs in a worker thread
+            async for event in aiter_turn_events(start_turn, scope):
+                if type(event) is TextDelta:
+                    timer.token_shown()
+                    await msg.stream_token(event.text)
+                elif type(event) is ToolCall:
+                    print(f"🛠️ Tool call: {event.tool_name}({event.arguments})")
+                    if show_sources and event.tool_name == "knowledge_search":
+                        await show_search(event)
+                elif type(event) is StepBoundary and event.step_type == "tool_execution" and event.event_type == "step_complete":
+                    if show_sources:
+                        await show_retrieved(event)
+
+            # Send the completed message
+            await msg.send()
+
+    except TurnCancelled:
+        print(f"⏹️ Turn stopped after {scope.text_deltas} tokens")
+    except QueueFull as e:
+        print(f"🚦 Shed turn: {admission.stats}")
+        if notice is not None:
+            await notice.remove()
+        await cl.Message(str(e)).send()
     except Exception as e:
         print(f"❌ Error: {str(e)}")
-        await cl.Message(f"Error: {str(e)}").send()
\ No newline at end of file
+        await cl.Message(f"Error: {str(e)}").send()
+    finally:
+        if cl.user_session.get("turn_scope") is scope:
+            cl.user_session.set("turn_scope", None)
+        if started:
+            cancellations.record(scope)
+            if scope.cancelled:
+                print(f"⏹️ {cancellations}")
+            perceived_latency.record(timer)
+            print(f"⏱️ {timer} | All turns: {perceived_latency}")
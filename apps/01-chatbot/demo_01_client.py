@@ -2,6 +2,10 @@ import os
 from dotenv import load_dotenv
 from llama_stack_client import Agent, AgentEventLogger, RAGDocument, LlamaStackClient
 
+from cancellation import cancellable_http_client
+from event_stream import turn_text
+from warmup import warm_up
+
 # Load environment variables
 load_dotenv()
 
@@ -9,10 +13,11 @@ load_dotenv()
 vector_db_id = os.getenv("VECTOR_DB_ID", "my_demo_vector_db")
 llama_stack_url = os.getenv("LLAMA_STACK_ENDPOINT", "http://localhost:5000")
 model_id = os.getenv("INFERENCE_MODEL")
+retrieval = os.getenv("CHAT_RETRIEVAL", "vector")  # vector: builtin knowledge_search; hybrid: see hybrid_search.py
 
 # Initialize client
 print(f"🔌 Connecting to Llama Stack API at {llama_stack_url}...")
-client = LlamaStackClient(base_url=llama_stack_url, timeout=120)
+client = LlamaStackClient(base_url=llama_stack_url, timeout=120, http_client=cancellable_http_client())
 print("✅ Connected to API")
 
 # Get models
@@ -29,7 +34,14 @@ embedding_dimension = embedding_model.metadata["embedding_dimension"]
 print(f"🚀 Using LLM: {model_id}")
 print(f"🧠 Using embedding: {embedding_model_id}")
 
+# Load the models now, so the first question does not pay for it
+if os.getenv("CHAT_WARMUP", "1") != "0":
+    print("🔥 Warming up models...")
+    warmup_report = warm_up(client, model_id, embedding_model_id)
+    print(f"✅ Warm-up done: {warmup_report}")
+
 # Setup vector DB
+# The inline faiss provider always builds a flat index; see faiss_index.py for the alternatives
 print(f"📊 Setting up vector database: {vector_db_id}...")
 _ = client.vector_dbs.register(
     vector_db_id=vector_db_id,
@@ -41,20 +53,43 @@ print("✅ Vector database ready")
 
 # Load document
 source = "https://www.paulgraham.com/greatwork.html"
-print("rag_tool> Ingesting document:", source)
-document = RAGDocument(
-    document_id="document_1",
-    content=source,
-    mime_type="text/html",
-    metadata={},
-)
+if retrieval == "hybrid":
+    # Chunk and embed here, so BM25 indexes the same chunks as the vector DB
+    from dedup import threshold_from_env
+    from embedding_cache import EmbeddingCache
+    from hybrid_search import HybridRetriever, knowledge_search_tool
+    from ingest import embed, ingest
 
-client.tool_runtime.rag_tool.insert(
-    documents=[document],
-    vector_db_id=vector_db_id,
-    chunk_size_in_tokens=50,
-)
-print("✅ Document loaded and indexed")
+    print("ingest> Ingesting document:", source)
+    embedding_cache = EmbeddingCache.from_env(embedding_model_id)
+    chunks, vectors, dedup_report = ingest(client, vector_db_id, embedding_model_id, [source], chunk_size_in_tokens=50,
+                                           cache=embedding_cache, dedup_threshold=threshold_from_env())
+    if dedup_report is not None:
+        print(f"🧹 Deduplication: {dedup_report}")
+    if embedding_cache is not None:
+        print(f"🗄️ Embedding cache: {embedding_cache.stats} ({len(embedding_cache)} cached)")
+    retriever = HybridRetriever(chunks, vectors, lambda query: embed(client, embedding_model_id, [query])[0])
+    knowledge_search = knowledge_search_tool(retriever)
+    print(f"✅ Document loaded and indexed ({len(chunks)} chunks, BM25 + {retriever.vector.config.factory})")
+else:
+    print("rag_tool> Ingesting document:", source)
+    document = RAGDocument(
+        document_id="document_1",
+        content=source,
+        mime_type="text/html",
+        metadata={},
+    )
+
+    client.tool_runtime.rag_tool.insert(
+        documents=[document],
+        vector_db_id=vector_db_id,
+        chunk_size_in_tokens=50,
+    )
+    knowledge_search = {
+        "name": "builtin::rag/knowledge_search",
+        "args": {"vector_db_ids": [vector_db_id]},
+    }
+    print("✅ Document loaded and indexed")
 
 # Create agent
 print("🤖 Creating AI agent...")
@@ -62,17 +97,12 @@ agent = Agent(
     client,
     model=model_id,
     instructions="You are a helpful assistant with access to knowledge search tools. When answering questions, first search for relevant information using your available tools before providing a response.",
-    tools=[
-        {
-            "name": "builtin::rag/knowledge_search",
-            "args": {"vector_db_ids": [vector_db_id]},
-        }
-    ],
+    tools=[knowledge_search],
 )
 print("✅ System initialized successfully")
 
 # Export for use in other modules
-__all__ = ['client', 'agent', 'model_id', 'AgentEventLogger']
+__all__ = ['client', 'agent', 'model_id', 'embedding_model_id', 'AgentEventLogger']
 
 
 def main():
@@ -88,9 +118,8 @@ def main():
         stream=False,
     )
     
-    # TODO: This throws an exception for some kinds of responses!!
-    # for log in AgentEventLogger().log(response):
-    #     log.print()
+    # AgentEventLogger only handles streams; a non-streaming turn is a Turn object
+    print(turn_text(response))
     
     print("\n" + "="*50 + "\n")
     
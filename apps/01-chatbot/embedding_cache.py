@@ -0,0 +1,151 @@
+"""Content-addressed cache of chunk embeddings, shared by every vector DB and run.
+
+An embedding depends only on the model and the text, so the cache key is
+(embedding model id, SHA-256 of the chunk text). A rebuilt vector DB, a new
+index type (faiss_index.py) or another vector DB holding the same document
+then costs disk reads instead of embedding calls.
+
+Each model has a directory with three files:
+
+    meta.json     model id, dimension and storage dtype
+    keys.bin      16-byte digests of the cached texts, in row order
+    vectors.bin   the embeddings, one row per key, read through a memory map
+
+Both data files are append-only. Rows are written before their keys, so a
+run that stops mid-write leaves at most unused rows, which are cut off on
+the next open. float16 storage halves the size. At that precision the
+cosine similarity of 384-d embeddings changes by about 1e-4.
+
+    EMBEDDING_CACHE_DIR=.embedding_cache   where the cache lives; "off" disables it
+    EMBEDDING_CACHE_DTYPE=float16          float16 or float32
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".embedding_cache"
+_KEY_BYTES = 16
+
+
+def text_key(text) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()[:_KEY_BYTES]
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    def __str__(self):
+        total = self.hits + self.misses
+        rate = f"{self.hits / total:.0%}" if total else "n/a"
+        return f"Hits: {self.hits} | Misses: {self.misses} | Hit rate: {rate}"
+
+
+class EmbeddingCache:
+    """On-disk embeddings of one model, looked up by text."""
+
+    def __init__(self, directory, model_id, dtype="float16"):
+        self.model_id = model_id
+        self.directory = Path(directory) / f"{re.sub(r'[^A-Za-z0-9._-]+', '_', model_id)}-{hashlib.sha256(model_id.encode()).hexdigest()[:8]}"
+        self.dtype = np.dtype(dtype)
+        self.dimension = None
+        self.stats = CacheStats()
+        self._rows = {}
+        self._vectors = None  # Memory map of vectors.bin, reopened after appends
+        self._lock = threading.Lock()
+        self._open()
+
+    @classmethod
+    def from_env(cls, model_id):
+        """The cache configured by EMBEDDING_CACHE_DIR / EMBEDDING_CACHE_DTYPE, or None if it is off."""
+        directory = os.getenv("EMBEDDING_CACHE_DIR", str(DEFAULT_CACHE_DIR))
+        if directory.lower() in ("", "0", "off"):
+            return None
+        return cls(directory, model_id, os.getenv("EMBEDDING_CACHE_DTYPE", "float16"))
+
+    @property
+    def _keys_path(self):
+        return self.directory / "keys.bin"
+
+    @property
+    def _vectors_path(self):
+        return self.directory / "vectors.bin"
+
+    def _open(self):
+        meta_path = self.directory / "meta.json"
+        if not meta_path.exists():
+            return
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["model_id"] != self.model_id:
+            raise ValueError(f"{self.directory} caches {meta['model_id']}, not {self.model_id}")
+        self.dimension, self.dtype = meta["dimension"], np.dtype(meta["dtype"])
+        keys = self._keys_path.read_bytes() if self._keys_path.exists() else b""
+        row_bytes = self.dimension * self.dtype.itemsize
+        vector_bytes = self._vectors_path.stat().st_size if self._vectors_path.exists() else 0
+        rows = min(len(keys) // _KEY_BYTES, vector_bytes // row_bytes)
+        if len(keys) != rows * _KEY_BYTES or vector_bytes != rows * row_bytes:
+            os.truncate(self._keys_path, rows * _KEY_BYTES)  # Drop a half-written append
+            os.truncate(self._vectors_path, rows * row_bytes)
+        self._rows = {keys[i * _KEY_BYTES:(i + 1) * _KEY_BYTES]: i for i in range(rows)}
+
+    def _create(self, dimension):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dimension = dimension
+        meta = {"model_id": self.model_id, "dimension": dimension, "dtype": self.dtype.name}
+        with open(self.directory / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def nbytes(self):
+        return len(self._rows) * (_KEY_BYTES + (self.dimension or 0) * self.dtype.itemsize)
+
+    def get_many(self, texts):
+        """The cached embeddings of `texts` (float32, one row per text) and the indices of the texts not cached."""
+        keys = [text_key(text) for text in texts]
+        with self._lock:
+            rows = [self._rows.get(key) for key in keys]
+            missing = [i for i, row in enumerate(rows) if row is None]
+            self.stats.hits += len(keys) - len(missing)
+            self.stats.misses += len(missing)
+            if self.dimension is None:
+                return np.zeros((len(texts), 0), dtype=np.float32), missing
+            vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+            found = [i for i, row in enumerate(rows) if row is not None]
+            if found:
+                if self._vectors is None or len(self._vectors) < len(self._rows):
+                    self._vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="r").reshape(-1, self.dimension)
+                vectors[found] = self._vectors[[rows[i] for i in found]]
+        return vectors, missing
+
+    def put_many(self, texts, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self.dimension is None:
+                self._create(vectors.shape[1])
+            elif vectors.shape[1] != self.dimension:
+                raise ValueError(f"{vectors.shape[1]}-d embeddings for a {self.dimension}-d cache")
+            new = {}
+            for text, vector in zip(texts, vectors):
+                key = text_key(text)
+                if key not in self._rows and key not in new:
+                    new[key] = vector
+            if not new:
+                return
+            with open(self._vectors_path, "ab") as f:
+                f.write(np.asarray(list(new.values()), dtype=self.dtype).tobytes())
+            with open(self._keys_path, "ab") as f:
+                f.write(b"".join(new))
+            for key in new:
+                self._rows[key] = len(self._rows)
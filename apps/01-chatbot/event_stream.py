@@ -0,0 +1,206 @@
+"""Lean processing of agent turns for hot paths, in place of `AgentEventLogger`.
+
+`AgentEventLogger().log(...)` builds a printable, colored object for every
+chunk, and it fails on the `Turn` that `create_turn(stream=False)` returns.
+`iter_turn_events` accepts either a streaming response or a `Turn` and yields
+only three kinds of small records, with no string formatting:
+
+- `TextDelta`: assistant text, as it streams
+- `ToolCall`: a tool call the model made, once fully parsed
+- `StepBoundary`: the start or end of a step or of the turn, with the step
+  details (or the `Turn`) attached at the end
+
+    for event in iter_turn_events(agent.create_turn(..., stream=True)):
+        if type(event) is TextDelta:
+            print(event.text, end="")
+
+In async code, `aiter_turn_events` runs the blocking client in a worker
+thread instead. `retrieved_chunks` reads the chunks a knowledge search
+returned from the details of its tool_execution step.
+"""
+
+import asyncio
+import re
+from typing import Any, AsyncIterator, Callable, Iterator, NamedTuple, Optional, Union
+
+from cancellation import TurnCancelled, TurnScope
+
+
+class TextDelta(NamedTuple):
+    step_id: str
+    text: str
+
+
+class ToolCall(NamedTuple):
+    step_id: str
+    call_id: str
+    tool_name: str
+    arguments: Any
+
+
+class StepBoundary(NamedTuple):
+    event_type: str  # step_start, step_complete, turn_start, turn_complete or turn_awaiting_input
+    step_type: Optional[str] = None  # None for turn boundaries
+    step_id: Optional[str] = None
+    details: Any = None  # the step details on step_complete, the Turn at the end of the turn
+
+
+TurnEvent = Union[TextDelta, ToolCall, StepBoundary]
+
+
+class TurnStreamError(RuntimeError):
+    """The server reported an error in the middle of a turn."""
+
+
+def content_text(content) -> str:
+    """The text of an `InterleavedContent` value (a string, an item or a list of items)."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(content_text(item) for item in content)
+    return getattr(content, "text", "") or ""
+
+
+class RetrievedChunk(NamedTuple):
+    document_id: Optional[str]
+    text: str
+    score: Optional[float] = None
+
+
+_RESULT = re.compile(r"Result \d+:\nDocument_id:(.*?)\nContent: (.*?)(?=\nResult \d+:|\nEND of knowledge_search|\Z)", re.S)
+
+
+def retrieved_chunks(step_details) -> list:
+    """The chunks that the knowledge_search calls of a tool_execution step returned.
+
+    They are read from the response metadata, which the builtin tool and
+    hybrid_search.py both fill in, or else parsed from the result text.
+    """
+    chunks = []
+    for response in getattr(step_details, "tool_responses", None) or []:
+        metadata = response.metadata or {}
+        if metadata.get("chunks"):
+            document_ids = metadata.get("document_ids") or [None] * len(metadata["chunks"])
+            scores = metadata.get("scores") or [None] * len(metadata["chunks"])
+            chunks.extend(RetrievedChunk(*fields) for fields in zip(document_ids, metadata["chunks"], scores))
+        elif response.tool_name == "knowledge_search":
+            chunks.extend(RetrievedChunk(document_id, text.strip())
+                          for document_id, text in _RESULT.findall(content_text(response.content)))
+    return chunks
+
+
+def iter_turn_events(response) -> Iterator[TurnEvent]:
+    """Typed events of a `create_turn` result, streaming or not."""
+    if hasattr(response, "output_message"):
+        yield from _iter_completed_turn(response)
+        return
+
+    for chunk in response:
+        event = getattr(chunk, "event", None)
+        if event is None:
+            error = getattr(chunk, "error", None) or {}
+            raise TurnStreamError(error.get("message", str(error)) if isinstance(error, dict) else str(error))
+        payload = event.payload
+        event_type = payload.event_type
+        # Text deltas are nearly every chunk of a turn, so they are tested first
+        if event_type == "step_progress":
+            delta = payload.delta
+            if delta.type == "text":
+                yield TextDelta(payload.step_id, delta.text)
+            elif delta.type == "tool_call" and delta.parse_status == "succeeded":
+                call = delta.tool_call
+                if not isinstance(call, str):
+                    yield ToolCall(payload.step_id, call.call_id, call.tool_name, call.arguments)
+        elif event_type == "step_start":
+            yield StepBoundary(event_type, payload.step_type, payload.step_id)
+        elif event_type == "step_complete":
+            yield StepBoundary(event_type, payload.step_type, payload.step_id, payload.step_details)
+        elif event_type == "turn_start":
+            yield StepBoundary(event_type)
+        elif event_type in ("turn_complete", "turn_awaiting_input"):
+            yield StepBoundary(event_type, details=payload.turn)
+
+
+def _iter_completed_turn(turn) -> Iterator[TurnEvent]:
+    """The events a streamed turn would have produced, rebuilt from a completed `Turn`."""
+    yield StepBoundary("turn_start")
+    for step in turn.steps or []:
+        yield StepBoundary("step_start", step.step_type, step.step_id)
+        if step.step_type == "inference":
+            message = step.api_model_response
+            text = content_text(message.content)
+            if text:
+                yield TextDelta(step.step_id, text)
+            for call in message.tool_calls or []:
+                yield ToolCall(step.step_id, call.call_id, call.tool_name, call.arguments)
+        yield StepBoundary("step_complete", step.step_type, step.step_id, step)
+    if not turn.steps:
+        text = content_text(turn.output_message.content)
+        if text:
+            yield TextDelta("", text)
+    yield StepBoundary("turn_complete", details=turn)
+
+
+def turn_text(response) -> str:
+    """The assistant text of a turn, streaming or not."""
+    return "".join(event.text for event in iter_turn_events(response) if type(event) is TextDelta)
+
+
+class _Failure(NamedTuple):
+    error: BaseException
+
+
+_DONE = object()
+
+
+async def aiter_turn_events(start_turn: Callable[[], Any], scope: Optional[TurnScope] = None) -> AsyncIterator[TurnEvent]:
+    """`iter_turn_events(start_turn())` as an async iterator, run in a worker thread.
+
+    `start_turn` is called in the thread too, so the request, the blocking
+    reads and the parsing all stay off the event loop and other chats keep
+    streaming meanwhile. If the consumer stops early (the task is cancelled
+    or the loop is left) or `scope.cancel()` is called, the turn's HTTP
+    stream is closed so the server stops generating; in the latter case the
+    iterator raises `TurnCancelled`.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    scope = scope or TurnScope()
+
+    def produce():
+        events = None
+        try:
+            with scope:
+                try:
+                    if not scope.cancelled:
+                        events = iter_turn_events(start_turn())
+                        for event in events:
+                            if type(event) is TextDelta:
+                                scope.text_deltas += 1
+                            loop.call_soon_threadsafe(queue.put_nowait, event)
+                            if scope.cancelled:
+                                break
+                finally:
+                    if events is not None:
+                        events.close()  # Before the scope closes the response under it
+        except BaseException as e:
+            if not scope.cancelled:  # Errors from the aborted connection are expected
+                loop.call_soon_threadsafe(queue.put_nowait, _Failure(e))
+                return
+        loop.call_soon_threadsafe(queue.put_nowait, _Failure(TurnCancelled()) if scope.cancelled else _DONE)
+
+    worker = loop.run_in_executor(None, produce)
+    finished = False
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE or type(item) is _Failure:
+                finished = True
+                if item is _DONE:
+                    break
+                raise item.error
+            yield item
+    finally:
+        if not finished:
+            scope.cancel()
+    await worker
@@ -0,0 +1,114 @@
+"""FAISS index selection for the chatbot's vector search.
+
+A flat index compares the query with every vector, so memory and search
+time grow linearly with the corpus. The index type is picked with a FAISS
+factory string, or one of the presets below, and tuned with its search
+parameters:
+
+    VECTOR_INDEX=flat | hnsw | ivf | ivf-sq8 | ivf-pq | <any faiss.index_factory string>
+    VECTOR_INDEX_NPROBE=16        IVF: inverted lists visited per query
+    VECTOR_INDEX_EF_SEARCH=64     HNSW: candidate list size per query
+    VECTOR_INDEX_METRIC=ip        ip (cosine on normalized embeddings) or l2
+
+`{nlist}` in a factory string is replaced with about 4 * sqrt(corpus size)
+inverted lists, and `{pq_m}` with dimension / 8 subquantizers (8 bytes per
+vector for 64 dimensions).
+
+The inline faiss provider of Llama Stack always builds a flat index, and
+`vector_dbs.register` takes no index settings, so this configures the
+client-side index built by `VectorIndex`. bench_faiss_index.py compares
+the options on a synthetic corpus.
+"""
+
+import math
+import os
+from dataclasses import dataclass
+
+import faiss
+import numpy as np
+
+PRESETS = {
+    "flat": "Flat",
+    "hnsw": "HNSW32",
+    "ivf": "IVF{nlist},Flat",
+    "ivf-sq8": "IVF{nlist},SQ8",
+    "ivf-pq": "IVF{nlist},PQ{pq_m}",
+}
+
+
+@dataclass
+class IndexConfig:
+    factory: str = "Flat"
+    metric: str = "ip"
+    nprobe: int = 16
+    ef_search: int = 64
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            factory=os.getenv("VECTOR_INDEX", "flat"),
+            metric=os.getenv("VECTOR_INDEX_METRIC", "ip"),
+            nprobe=int(os.getenv("VECTOR_INDEX_NPROBE", "16")),
+            ef_search=int(os.getenv("VECTOR_INDEX_EF_SEARCH", "64")),
+        )
+
+    def factory_string(self, dimension, count) -> str:
+        """The factory string for a corpus of `count` vectors, with the placeholders filled in."""
+        factory = PRESETS.get(self.factory.lower(), self.factory)
+        nlist = max(1, min(int(4 * math.sqrt(max(count, 1))), count // 39 or 1))  # FAISS wants >= 39 points per list
+        return factory.format(nlist=nlist, pq_m=max(1, dimension // 8))
+
+    @property
+    def faiss_metric(self):
+        return faiss.METRIC_INNER_PRODUCT if self.metric == "ip" else faiss.METRIC_L2
+
+    def build(self, vectors) -> faiss.Index:
+        """Train (if the index type needs it) and fill an index with `vectors`."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        count, dimension = vectors.shape
+        factory = self.factory_string(dimension, count)
+        index = faiss.index_factory(dimension, factory, self.faiss_metric)
+        if not index.is_trained:
+            # k-means gains little beyond 256 points per centroid (IVF lists, or the 256 codes of PQ / SQ)
+            nlist = faiss.extract_index_ivf(index).nlist if "IVF" in factory else 1
+            size = 256 * max(nlist, 256)
+            sample = vectors if count <= size else vectors[np.random.default_rng(0).choice(count, size, replace=False)]
+            index.train(sample)
+        index.add(vectors)
+        self.apply_search_parameters(index)
+        return index
+
+    def apply_search_parameters(self, index):
+        parameters = faiss.ParameterSpace()
+        factory = self.factory_string(index.d, index.ntotal)
+        if "IVF" in factory:
+            parameters.set_index_parameter(index, "nprobe", self.nprobe)
+        if "HNSW" in factory:
+            parameters.set_index_parameter(index, "efSearch", self.ef_search)
+
+
+class VectorIndex:
+    """Embeddings of a set of chunks in a configured FAISS index, searchable by query embedding."""
+
+    def __init__(self, config: IndexConfig, vectors, payloads):
+        if len(vectors) != len(payloads):
+            raise ValueError(f"{len(vectors)} vectors for {len(payloads)} payloads")
+        self.config = config
+        self.payloads = list(payloads)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if config.metric == "ip":
+            vectors = _normalize(vectors)
+        self.index = config.build(vectors)
+
+    def search(self, query_vector, k=5):
+        """The `k` best (payload, score) pairs for one query embedding."""
+        query = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+        if self.config.metric == "ip":
+            query = _normalize(query)
+        scores, ids = self.index.search(query, k)
+        return [(self.payloads[i], float(score)) for i, score in zip(ids[0], scores[0]) if i >= 0]
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
@@ -0,0 +1,176 @@
+"""Hybrid lexical + vector retrieval over the chatbot's chunks, with a cheap rerank.
+
+Embedding search of 50-token chunks misses many exact-term questions (names,
+dates, rare words), and the agent then searches again. `HybridRetriever`
+runs two searches over the same chunks:
+
+- BM25 over an in-memory inverted index (`BM25Index`)
+- the embedding index of faiss_index.py
+
+It merges the two rankings with reciprocal rank fusion. Then it reranks
+the top `rerank_top` on the CPU, with no model: the IDF-weighted share of
+query terms in a chunk, the share of query bigrams it contains as phrases,
+and the fused score.
+
+    retriever = HybridRetriever(chunks, vectors, embed_query)
+    for chunk, score in retriever.search("When did the Bering Land Bridge become a preserve?", k=5):
+        ...
+
+`knowledge_search_tool` wraps a retriever as a client tool that replaces
+`builtin::rag/knowledge_search` (`CHAT_RETRIEVAL=hybrid`), and
+bench_hybrid_search.py measures recall and latency against pure vector search.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+from llama_stack_client.lib.agents.client_tool import client_tool
+
+from faiss_index import IndexConfig, VectorIndex
+
+_TERM = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a about an and are as at be but by can did do does for from had has have how i if in into is it its of on or "
+    "so than that the their them then there these they this to was we were what when where which who why will with "
+    "you your".split()
+)
+
+
+def terms(text) -> list:
+    return [term for term in _TERM.findall(text.lower()) if term not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of texts."""
+
+    def __init__(self, texts, k1=1.2, b=0.75):
+        self.k1, self.b = k1, b
+        self.doc_terms = [terms(text) for text in texts]
+        lengths = np.array([len(doc) for doc in self.doc_terms], dtype=np.float32)
+        self.count = len(self.doc_terms)
+        postings = defaultdict(lambda: ([], []))
+        for doc_id, doc in enumerate(self.doc_terms):
+            for term, frequency in Counter(doc).items():
+                postings[term][0].append(doc_id)
+                postings[term][1].append(frequency)
+        # Per term: the documents that contain it, and the term's BM25 weight in each
+        norm = k1 * (1 - b + b * lengths / max(lengths.mean(), 1.0)) if self.count else lengths
+        self.postings = {}
+        for term, (doc_ids, frequencies) in postings.items():
+            doc_ids = np.array(doc_ids)
+            frequencies = np.array(frequencies, dtype=np.float32)
+            self.postings[term] = (doc_ids, self.idf(term, len(doc_ids)) * frequencies * (k1 + 1) / (frequencies + norm[doc_ids]))
+
+    def idf(self, term, document_frequency=None):
+        if document_frequency is None:
+            document_frequency = len(self.postings[term][0]) if term in self.postings else 0
+        return math.log(1 + (self.count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def search(self, query, k=10):
+        """The `k` best (document index, score) pairs; documents without any query term are left out."""
+        scores = np.zeros(self.count, dtype=np.float32)
+        for term in set(terms(query)):
+            if term in self.postings:
+                doc_ids, weights = self.postings[term]
+                scores[doc_ids] += weights
+        matched = np.flatnonzero(scores)
+        best = matched[np.argsort(-scores[matched], kind="stable")[:k]]
+        return [(int(i), float(scores[i])) for i in best]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Merge ranked lists of document indices; each list adds 1 / (k + rank) to a document's score."""
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] += 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])
+
+
+class HybridRetriever:
+    """BM25 and vector search over the same chunks, fused and reranked."""
+
+    COVERAGE_WEIGHT = 0.5
+    PHRASE_WEIGHT = 0.3
+    FUSION_WEIGHT = 0.2
+
+    def __init__(self, chunks, vectors, embed_query, config=None, candidates=50, rerank_top=20):
+        """`embed_query(text)` returns the embedding of a query, made with the model of `vectors`."""
+        self.chunks = list(chunks)
+        self.embed_query = embed_query
+        self.candidates = candidates
+        self.rerank_top = rerank_top
+        self.lexical = BM25Index([chunk.text for chunk in self.chunks])
+        self.vector = VectorIndex(config or IndexConfig.from_env(), vectors, range(len(self.chunks)))
+
+    def vector_search(self, query, k=10, query_vector=None):
+        if query_vector is None:
+            query_vector = self.embed_query(query)
+        return self.vector.search(query_vector, k)
+
+    def lexical_search(self, query, k=10):
+        return self.lexical.search(query, k)
+
+    def fused_search(self, query, k=10, query_vector=None):
+        rankings = [[i for i, _ in self.lexical_search(query, self.candidates)],
+                    [i for i, _ in self.vector_search(query, self.candidates, query_vector)]]
+        return reciprocal_rank_fusion(rankings)[:k]
+
+    def rerank(self, query, candidates):
+        """Reorder (document index, fused score) pairs by how much of the query each chunk contains."""
+        query_terms = terms(query)
+        weights = {term: self.lexical.idf(term) for term in set(query_terms)}
+        total_weight = sum(weights.values()) or 1.0
+        query_bigrams = set(zip(query_terms, query_terms[1:]))
+        top_fused = max((score for _, score in candidates), default=1.0)
+        reranked = []
+        for doc_id, fused in candidates:
+            doc_terms = self.lexical.doc_terms[doc_id]
+            present = set(doc_terms)
+            coverage = sum(weight for term, weight in weights.items() if term in present) / total_weight
+            phrase = len(query_bigrams & set(zip(doc_terms, doc_terms[1:]))) / len(query_bigrams) if query_bigrams else 0.0
+            score = self.COVERAGE_WEIGHT * coverage + self.PHRASE_WEIGHT * phrase + self.FUSION_WEIGHT * fused / top_fused
+            reranked.append((doc_id, score))
+        reranked.sort(key=lambda item: -item[1])
+        return reranked
+
+    def search_ids(self, query, k=5, rerank=True, query_vector=None):
+        fused = self.fused_search(query, max(k, self.rerank_top if rerank else k), query_vector)
+        if rerank:
+            fused = self.rerank(query, fused[:self.rerank_top])
+        return fused[:k]
+
+    def search(self, query, k=5, rerank=True):
+        """The `k` best (chunk, score) pairs for a question."""
+        return [(self.chunks[i], score) for i, score in self.search_ids(query, k, rerank)]
+
+
+def knowledge_search_tool(retriever, k=5):
+    """A client tool for `Agent(tools=[...])` that answers searches from `retriever`.
+
+    Its result has the layout and metadata of `builtin::rag/knowledge_search`.
+    """
+
+    @client_tool
+    def knowledge_search(query: str) -> dict:
+        """Search for information in a database of documents.
+
+        :param query: The query to search for. Can be a natural language sentence or keywords.
+        """
+        results = retriever.search(query, k)
+        lines = [f"knowledge_search tool found {len(results)} chunks:\nBEGIN of knowledge_search tool results.\n"]
+        for number, (chunk, _) in enumerate(results, start=1):
+            lines.append(f"Result {number}:\nDocument_id:{chunk.document_id}\nContent: {chunk.text}\n")
+        lines.append("END of knowledge_search tool results.\n")
+        return {
+            "content": "".join(lines),
+            "metadata": {
+                "document_ids": [chunk.document_id for chunk, _ in results],
+                "chunks": [chunk.text for chunk, _ in results],
+                "scores": [score for _, score in results],
+            },
+        }
+
+    return knowledge_search
@@ -0,0 +1,159 @@
+"""Client-side ingestion: fetch, chunk and embed documents, then insert them into a vector DB.
+
+`rag_tool.insert` chunks and embeds on the server, so the client never sees
+the chunks. Hybrid retrieval (hybrid_search.py) needs the same chunks for
+its lexical index, so this module makes them itself, the way the RAG tool
+does. It uses windows of `chunk_size_in_tokens`, overlapping by a quarter,
+and inserts them with their embeddings through `vector_io.insert`. Tokens
+are approximated by words and punctuation marks, which comes close to the
+server's tiktoken counts for English prose.
+
+    chunks, vectors, dedup_report = ingest(client, vector_db_id, embedding_model_id, [url])
+"""
+
+import hashlib
+import io
+import mimetypes
+import re
+from html.parser import HTMLParser
+from typing import NamedTuple
+
+import httpx
+import numpy as np
+
+from dedup import deduplicate
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_SKIPPED_TAGS = {"script", "style", "head", "noscript"}
+_BLOCK_TAGS = {"p", "br", "div", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "title", "blockquote", "pre"}
+
+
+class Chunk(NamedTuple):
+    chunk_id: str
+    document_id: str
+    text: str
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self._skipping += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            self._skipping = max(self._skipping - 1, 0)
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+
+def html_to_text(html) -> str:
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    text = "".join(extractor.parts)
+    return re.sub(r"\n\s*\n+", "\n\n", re.sub(r"[ \t\r\f\v]+", " ", text)).strip()
+
+
+def pdf_to_text(data) -> str:
+    from pypdf import PdfReader  # Only needed for PDFs
+
+    return "\n\n".join(page.extract_text() or "" for page in PdfReader(io.BytesIO(data)).pages)
+
+
+def fetch_text(source) -> str:
+    """The plain text of a URL or a local file; HTML markup is stripped and PDFs are extracted."""
+    if re.match(r"^https?://", str(source)):
+        response = httpx.get(str(source), follow_redirects=True, timeout=60)
+        response.raise_for_status()
+        data, content_type = response.content, response.headers.get("content-type", "")
+    else:
+        with open(source, "rb") as f:
+            data = f.read()
+        content_type = mimetypes.guess_type(str(source))[0] or ""
+    if "pdf" in content_type:
+        return pdf_to_text(data)
+    text = data.decode("utf-8", errors="replace")
+    return html_to_text(text) if "html" in content_type else text
+
+
+def chunk_document(document_id, text, chunk_size_in_tokens=50, overlap_tokens=None) -> list:
+    """Overlapping windows of about `chunk_size_in_tokens` tokens, cut at token boundaries."""
+    overlap_tokens = chunk_size_in_tokens // 4 if overlap_tokens is None else overlap_tokens
+    spans = [match.span() for match in _TOKEN.finditer(text)]
+    stride = max(chunk_size_in_tokens - overlap_tokens, 1)
+    chunks = []
+    for start in range(0, max(len(spans) - overlap_tokens, 1), stride):
+        window = spans[start:start + chunk_size_in_tokens]
+        if not window:
+            break
+        chunk_text = text[window[0][0]:window[-1][1]]
+        chunk_id = hashlib.sha256(f"{document_id}:{start}:{chunk_text}".encode()).hexdigest()[:32]
+        chunks.append(Chunk(chunk_id, document_id, chunk_text))
+    return chunks
+
+
+def embed(client, embedding_model_id, texts, batch_size=32, cache=None) -> np.ndarray:
+    """Embeddings of `texts` as a float32 array, requested `batch_size` texts at a time.
+
+    With an `EmbeddingCache` of the same model, only the texts it does not
+    hold yet are sent to the model, and their embeddings are added to it.
+    """
+    texts = list(texts)
+    if cache is not None:
+        vectors, missing = cache.get_many(texts)
+        if missing:
+            fresh = embed(client, embedding_model_id, [texts[i] for i in missing], batch_size)
+            cache.put_many([texts[i] for i in missing], fresh)
+            if vectors.shape[1] == 0:
+                vectors = np.zeros((len(texts), fresh.shape[1]), dtype=np.float32)
+            vectors[missing] = fresh
+        return vectors
+
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        response = client.inference.embeddings(model_id=embedding_model_id, contents=texts[start:start + batch_size])
+        vectors.extend(response.embeddings)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def ingest(client, vector_db_id, embedding_model_id, sources, chunk_size_in_tokens=50, cache=None,
+           dedup_threshold=None):
+    """Chunk and embed `sources` (URLs or paths) and insert them into `vector_db_id`.
+
+    Returns the chunks and their embeddings (one row per chunk), so a local
+    index can be built over exactly what the vector DB holds, and the
+    `DedupReport` (None without `dedup_threshold`). Embeddings found in
+    `cache` are reused. With `dedup_threshold`, near-duplicate chunks are
+    dropped before they are embedded (see dedup.py).
+    """
+    chunks = []
+    for number, source in enumerate(sources, start=1):
+        chunks.extend(chunk_document(f"document_{number}", fetch_text(source), chunk_size_in_tokens))
+    report = None
+    if dedup_threshold:
+        chunks, report = deduplicate(chunks, dedup_threshold)
+    vectors = embed(client, embedding_model_id, [chunk.text for chunk in chunks], cache=cache)
+    if report is not None:
+        report.embedding_bytes_saved = report.dropped * vectors.shape[1] * vectors.itemsize
+    for start in range(0, len(chunks), 256):
+        client.vector_io.insert(
+            vector_db_id=vector_db_id,
+            chunks=[
+                {
+                    "content": chunk.text,
+                    "metadata": {"document_id": chunk.document_id},
+                    "chunk_metadata": {"chunk_id": chunk.chunk_id, "document_id": chunk.document_id},
+                    "embedding": vector.tolist(),
+                }
+                for chunk, vector in zip(chunks[start:start + 256], vectors[start:start + 256])
+            ],
+        )
+    return chunks, vectors, report
@@ -0,0 +1,13 @@
+"""Percentiles and formatting shared by the latency reports and benchmarks."""
+
+SAMPLES_KEPT = 1000  # Latencies kept by long-running reports; older ones are dropped
+
+
+def percentile(values, fraction, default=None):
+    """The nearest-rank `fraction` percentile of `values`, or `default` if there are none."""
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else default
+
+
+def fmt_seconds(value, digits=2):
+    return "n/a" if value is None else f"{value:.{digits}f}s"
@@ -0,0 +1,67 @@
+"""Time to first useful content, next to time to first token.
+
+With progressive rendering, the sources a knowledge search retrieved are
+shown as soon as the tool_execution step completes. The model still has to
+read them before it writes the first token of the answer. Time to first
+useful content (TTFUC) is the earlier of the two, measured from the
+moment the message arrived. The gap between TTFUC and TTFT is the wait
+that progressive rendering takes off the user's screen.
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from latency_stats import SAMPLES_KEPT, fmt_seconds, percentile
+
+
+@dataclass
+class TurnTimer:
+    """When the first sources and the first token of one turn were shown, in seconds after `started`."""
+    started: float = field(default_factory=time.perf_counter)
+    first_sources: Optional[float] = None
+    first_token: Optional[float] = None
+
+    def sources_shown(self):
+        if self.first_sources is None:
+            self.first_sources = time.perf_counter() - self.started
+
+    def token_shown(self):
+        if self.first_token is None:
+            self.first_token = time.perf_counter() - self.started
+
+    @property
+    def first_useful(self) -> Optional[float]:
+        shown = [t for t in (self.first_sources, self.first_token) if t is not None]
+        return min(shown) if shown else None
+
+    def __str__(self):
+        return (f"First useful content {fmt_seconds(self.first_useful)} (sources {fmt_seconds(self.first_sources)}, "
+                f"first token {fmt_seconds(self.first_token)})")
+
+
+@dataclass
+class PerceivedLatency:
+    """Latencies of the last `SAMPLES_KEPT` turns, and counts over all of them."""
+    first_useful: deque = field(default_factory=lambda: deque(maxlen=SAMPLES_KEPT))
+    first_token: deque = field(default_factory=lambda: deque(maxlen=SAMPLES_KEPT))
+    turns: int = 0
+    sources_first: int = 0  # Turns whose sources were on screen before the answer started
+
+    def record(self, timer: TurnTimer):
+        if timer.first_useful is None:
+            return
+        self.turns += 1
+        self.first_useful.append(timer.first_useful)
+        if timer.first_token is not None:
+            self.first_token.append(timer.first_token)
+        if timer.first_sources is not None and (timer.first_token is None or timer.first_sources < timer.first_token):
+            self.sources_first += 1
+
+    def __str__(self):
+        return (f"TTFUC p50 {fmt_seconds(percentile(self.first_useful, 0.5))} "
+                f"p95 {fmt_seconds(percentile(self.first_useful, 0.95))} | "
+                f"TTFT p50 {fmt_seconds(percentile(self.first_token, 0.5))} "
+                f"p95 {fmt_seconds(percentile(self.first_token, 0.95))} | "
+                f"Sources first: {self.sources_first}/{self.turns} turns")
@@ -0,0 +1,433 @@
+"""Record Llama Stack HTTP exchanges, including SSE streams with their timing, and replay them offline.
+
+`record` runs the same setup as `test_log_print.py` (models, vector DB,
+agent, session), then a streaming `agent.create_turn` and a streaming
+`responses.create` per prompt, through a `RecordingTransport`. Every
+exchange is written as one JSON line: method, path, status, the time to the
+response headers and the body chunks as `[ms since request, text]` pairs.
+
+`serve` replays a fixture from a local stub server. Requests are matched on
+method and path (IDs in paths are the recorded ones, since the client got
+them from recorded responses); repeated requests get the recorded answers in
+order, then start over. `--speed 1` keeps the recorded timing, `--speed 0`
+sends everything as fast as possible, so client-side overhead can be
+measured apart from model time. With `--capacity N`, streams beyond N
+concurrent ones share the recorded speed, like turns on a saturated model
+server.
+
+    python stream_fixtures.py record fixtures/great_work.jsonl --prompt "How do you do great work?"
+    python stream_fixtures.py serve fixtures/great_work.jsonl --port 5055 --speed 0 &
+    LLAMA_STACK_API_URL=http://127.0.0.1:5055 python test_log_print.py
+    python stream_fixtures.py show fixtures/great_work.jsonl
+
+`synthesize` writes a fixture with the same shape but made-up content, for
+offline benchmarks when no recording is at hand.
+"""
+
+import argparse
+import codecs
+import gzip
+import json
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import httpx
+
+# Response headers worth keeping; the rest (dates, server names, lengths) are replaced on replay.
+# Bodies are recorded uncompressed, so content-encoding is never kept.
+KEPT_HEADERS = ("content-type",)
+
+
+def _open(path, mode):
+    """Fixtures ending in .gz are gzip-compressed."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def load_fixture(path):
+    """The recorded exchanges of a fixture file, in order."""
+    with _open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def iter_chunks(exchange):
+    """The body chunks of an exchange as bytes, without their timing."""
+    for _, text in exchange["chunks"]:
+        yield text.encode("utf-8")
+
+
+class _RecordingStream(httpx.SyncByteStream):
+    def __init__(self, stream, started, on_close):
+        self._stream = stream
+        self._started = started
+        self._on_close = on_close
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.chunks = []
+
+    def __iter__(self):
+        for chunk in self._stream:
+            # A multi-byte character split across chunks is kept for the next chunk
+            text = self._decoder.decode(chunk)
+            if text:
+                self.chunks.append([round((time.perf_counter() - self._started) * 1000, 1), text])
+            yield chunk
+
+    def close(self):
+        self._stream.close()
+        self._on_close(self.chunks)
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """httpx transport that appends every exchange to a fixture file once its body is consumed.
+
+    Pass it to the client with
+    `LlamaStackClient(base_url=..., http_client=httpx.Client(transport=RecordingTransport(path)))`.
+    Bodies are recorded as the server sent them, so a streamed turn keeps its
+    chunk boundaries and timing.
+    """
+
+    def __init__(self, path, transport=None):
+        self.path = path
+        self.exchanges = 0
+        self._transport = transport or httpx.HTTPTransport()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with _open(path, "w"):
+            pass  # Start a fresh fixture
+
+    def handle_request(self, request):
+        started = time.perf_counter()
+        request.headers["Accept-Encoding"] = "identity"  # Record the body as text, not compressed bytes
+        response = self._transport.handle_request(request)
+        headers_ms = round((time.perf_counter() - started) * 1000, 1)
+        try:
+            request_body = json.loads(request.content or b"null")
+        except ValueError:
+            request_body = None
+
+        def save(chunks):
+            self._append({
+                "method": request.method,
+                "path": request.url.raw_path.decode("ascii"),
+                "request": request_body,
+                "status": response.status_code,
+                "headers": {k: v for k, v in response.headers.items() if k.lower() in KEPT_HEADERS},
+                "headers_ms": headers_ms,
+                "chunks": chunks,
+            })
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, started, save),
+            extensions=response.extensions,
+        )
+
+    def _append(self, exchange):
+        with self._lock:
+            with _open(self.path, "a") as f:
+                f.write(json.dumps(exchange, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self.exchanges += 1
+
+    def close(self):
+        self._transport.close()
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, exchanges, speed=1.0, capacity=None):
+        super().__init__(address, _Handler)
+        self.speed = speed  # 1.0 = recorded timing, 2.0 = twice as fast, 0 = no delays
+        # Streams the "model" serves at full speed; beyond that they share it, like a busy Ollama
+        self.capacity = capacity
+        self.streaming = 0
+        self.replayed = 0
+        self.aborted = 0  # Responses the client hung up on, and the chunks it never received
+        self.unsent_chunks = 0
+        self.unmatched = 0
+        self._exchanges = {}
+        for exchange in exchanges:
+            self._exchanges.setdefault((exchange["method"], urlparse(exchange["path"]).path), []).append(exchange)
+        self._next = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def match(self, method, path):
+        """The next recorded exchange for `method` and `path`, cycling through repeats, or None."""
+        key = (method, urlparse(path).path)
+        with self._lock:
+            candidates = self._exchanges.get(key)
+            if not candidates:
+                self.unmatched += 1
+                return None
+            index = self._next.get(key, 0)
+            self._next[key] = (index + 1) % len(candidates)
+            self.replayed += 1
+            return candidates[index]
+
+    def share(self) -> float:
+        """Fraction of full speed each stream gets right now."""
+        if self.capacity is None or self.streaming <= self.capacity:
+            return 1.0
+        return self.capacity / self.streaming
+
+
+class _ReplayClock:
+    """Recorded time of one exchange being replayed; it runs slower while the server is over capacity."""
+
+    def __init__(self, server):
+        self.server = server
+        self.position_ms = 0.0
+        self.last = time.perf_counter()
+
+    def wait_until(self, offset_ms):
+        server = self.server
+        if server.speed <= 0:
+            return
+        while True:
+            now = time.perf_counter()
+            recorded_ms_per_second = 1000 * server.speed * server.share()
+            self.position_ms += (now - self.last) * recorded_ms_per_second
+            self.last = now
+            remaining = (offset_ms - self.position_ms) / recorded_ms_per_second
+            if remaining <= 0:
+                return
+            # Re-check the share often when other streams can start or finish meanwhile
+            time.sleep(remaining if server.capacity is None else min(remaining, 0.01))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: ReplayServer
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real server
+
+    def setup(self):
+        super().setup()
+        # Chunks go out as they are written, as from uvicorn; Nagle's algorithm would hold them back
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _replay(self):
+        clock = _ReplayClock(self.server)
+        self.rfile.read(int(self.headers.get("Content-Length", 0)) or 0)
+        exchange = self.server.match(self.command, self.path)
+        if exchange is None:
+            data = json.dumps({"detail": f"No recorded response for {self.command} {self.path}"}).encode()
+            self.send_response(404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        streamed = exchange["headers"].get("content-type", "").startswith("text/event-stream")
+        if streamed:
+            with self.server._lock:
+                self.server.streaming += 1
+        try:
+            self._send(exchange, clock)
+        finally:
+            if streamed:
+                with self.server._lock:
+                    self.server.streaming -= 1
+
+    def _send(self, exchange, clock):
+        clock.wait_until(exchange["headers_ms"])
+        self.send_response(exchange["status"])
+        for name, value in exchange["headers"].items():
+            self.send_header(name, value)
+        self.send_header("Transfer-Encoding", "chunked")  # Keep the recorded chunk boundaries
+        self.end_headers()
+        sent = 0
+        try:
+            for sent, (offset_ms, text) in enumerate(exchange["chunks"]):
+                clock.wait_until(offset_ms)
+                data = text.encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # The client stopped reading, as a cancelled turn does
+            with self.server._lock:
+                self.server.aborted += 1
+                self.server.unsent_chunks += len(exchange["chunks"]) - sent
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _replay
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+
+def start_replay_server(fixture, host="127.0.0.1", port=0, speed=1.0, capacity=None) -> ReplayServer:
+    """Start a replay server for a fixture path (or loaded exchanges) in a background thread."""
+    exchanges = load_fixture(fixture) if isinstance(fixture, str) else fixture
+    server = ReplayServer((host, port), exchanges, speed=speed, capacity=capacity)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def record(path, base_url, prompts, model_id=None, vector_db_id="my_demo_vector_db"):
+    """Record a session with the same calls as test_log_print.py, plus Responses API streams."""
+    from llama_stack_client import Agent, LlamaStackClient
+
+    transport = RecordingTransport(path)
+    client = LlamaStackClient(base_url=base_url, timeout=120, http_client=httpx.Client(transport=transport))
+    models = client.models.list()
+    model_id = model_id or next(m for m in models if m.model_type == "llm").identifier
+    embedding_model = next(m for m in models if m.model_type == "embedding")
+    try:
+        client.vector_dbs.register(
+            vector_db_id=vector_db_id,
+            embedding_model=embedding_model.identifier,
+            embedding_dimension=embedding_model.metadata["embedding_dimension"],
+            provider_id="faiss",
+        )
+    except Exception:
+        pass  # Already registered
+
+    agent = Agent(
+        client,
+        model=model_id,
+        instructions="You are a helpful assistant with access to knowledge search tools. When answering questions, first search for relevant information using your available tools before providing a response.",
+        tools=[{"name": "builtin::rag/knowledge_search", "args": {"vector_db_ids": [vector_db_id]}}],
+    )
+    session_id = agent.create_session("test_session")
+    for prompt in prompts:
+        print("prompt>", prompt)
+        for _ in agent.create_turn(messages=[{"role": "user", "content": prompt}],
+                                   session_id=session_id, stream=True):
+            pass
+        for _ in client.responses.create(model=model_id, input=prompt, stream=True):
+            pass
+    client.close()
+    return transport.exchanges
+
+
+def _sse(payload):
+    return "data: " + json.dumps({"event": {"payload": payload}}, separators=(",", ":")) + "\n\n"
+
+
+def _json_exchange(method, path, body, ms=2.0):
+    return {"method": method, "path": path, "request": None, "status": 200,
+            "headers": {"content-type": "application/json"}, "headers_ms": ms,
+            "chunks": [[ms, json.dumps(body, separators=(",", ":"))]]}
+
+
+def synthetic_session(tokens=200, sources=5, first_token_ms=400.0, token_ms=25.0, tool_ms=150.0):
+    """Exchanges for a test_log_print.py-style session whose turn calls knowledge_search once.
+
+    The turn streams like a real one: an inference step that emits the tool
+    call, a tool_execution step with `sources` retrieved chunks, then an
+    inference step streaming `tokens` text deltas. For benchmarks where no
+    recorded fixture is at hand; record one for realistic timing.
+    """
+    agent_id, session_id, turn_id = "agent-synthetic", "session-synthetic", "turn-synthetic"
+    call = {"call_id": "call-0", "tool_name": "knowledge_search", "arguments": {"query": "doing great work"}}
+    chunks = [f"Chunk {i} of the essay: work on what you find most interesting, and keep at it." for i in range(sources)]
+    results = ([{"type": "text", "text": f"knowledge_search tool found {sources} chunks:\nBEGIN of knowledge_search tool results.\n"}]
+               + [{"type": "text", "text": f"Result {i + 1}:\nDocument_id:docum\nContent: {chunk}\n"} for i, chunk in enumerate(chunks)]
+               + [{"type": "text", "text": "END of knowledge_search tool results.\n"}])
+    answer = [f"word{i} " for i in range(tokens)]
+    message = {"role": "assistant", "content": "".join(answer), "stop_reason": "end_of_turn", "tool_calls": []}
+    tool_message = {"role": "assistant", "content": "", "stop_reason": "end_of_turn", "tool_calls": [call]}
+
+    events = [(5.0, {"event_type": "turn_start", "turn_id": turn_id}),
+              (5.0, {"event_type": "step_start", "step_id": "step-0", "step_type": "inference"}),
+              (first_token_ms, {"event_type": "step_progress", "step_id": "step-0", "step_type": "inference",
+                                "delta": {"type": "tool_call", "parse_status": "succeeded", "tool_call": call}}),
+              (first_token_ms, {"event_type": "step_complete", "step_id": "step-0", "step_type": "inference",
+                                "step_details": {"step_type": "inference", "step_id": "step-0", "turn_id": turn_id,
+                                                 "model_response": tool_message}}),
+              (first_token_ms, {"event_type": "step_start", "step_id": "step-1", "step_type": "tool_execution"}),
+              (first_token_ms + tool_ms, {
+                  "event_type": "step_complete", "step_id": "step-1", "step_type": "tool_execution",
+                  "step_details": {"step_type": "tool_execution", "step_id": "step-1", "turn_id": turn_id,
+                                   "tool_calls": [call],
+                                   "tool_responses": [{"call_id": "call-0", "tool_name": "knowledge_search", "content": results,
+                                                       "metadata": {"document_ids": ["document_1"] * sources,
+                                                                    "chunks": chunks, "scores": [0.9 - i / 20 for i in range(sources)]}}]}}),
+              (first_token_ms + tool_ms, {"event_type": "step_start", "step_id": "step-2", "step_type": "inference"})]
+    started = first_token_ms * 2 + tool_ms  # The answer needs another prompt evaluation
+    events += [(started + i * token_ms, {"event_type": "step_progress", "step_id": "step-2", "step_type": "inference",
+                                         "delta": {"type": "text", "text": text}}) for i, text in enumerate(answer)]
+    done = started + tokens * token_ms
+    events += [(done, {"event_type": "step_complete", "step_id": "step-2", "step_type": "inference",
+                       "step_details": {"step_type": "inference", "step_id": "step-2", "turn_id": turn_id,
+                                        "model_response": message}}),
+               (done, {"event_type": "turn_complete", "turn": {
+                   "turn_id": turn_id, "session_id": session_id, "input_messages": [{"role": "user", "content": "how to do great work?"}],
+                   "output_message": message, "started_at": "2025-01-01T00:00:00Z", "steps": []}})]
+
+    turn = {"method": "POST", "path": f"/v1/agents/{agent_id}/session/{session_id}/turn", "request": None,
+            "status": 200, "headers": {"content-type": "text/event-stream"}, "headers_ms": 5.0,
+            "chunks": [[round(ms, 1), _sse(payload)] for ms, payload in events]}
+    return [_json_exchange("GET", "/v1/models", {"data": [
+                {"identifier": "ollama/llama3.2:1b", "provider_id": "ollama", "type": "model", "model_type": "llm", "metadata": {}},
+                {"identifier": "all-minilm:latest", "provider_id": "ollama", "type": "model", "model_type": "embedding",
+                 "metadata": {"embedding_dimension": 384}}]}),
+            _json_exchange("POST", "/v1/vector-dbs", {"identifier": "my_demo_vector_db", "provider_id": "faiss",
+                                                      "type": "vector_db", "embedding_model": "all-minilm:latest",
+                                                      "embedding_dimension": 384}),
+            _json_exchange("POST", "/v1/agents", {"agent_id": agent_id}),
+            _json_exchange("GET", "/v1/tools", {"data": []}),
+            _json_exchange("POST", f"/v1/agents/{agent_id}/session", {"session_id": session_id}),
+            turn]
+
+
+def show(path):
+    print(f"{'method':<7}{'path':<60}{'status':>7}{'chunks':>8}{'bytes':>9}{'headers ms':>12}{'first ms':>10}{'last ms':>10}")
+    for exchange in load_fixture(path):
+        chunks = exchange["chunks"]
+        first, last = (chunks[0][0], chunks[-1][0]) if chunks else (0.0, 0.0)
+        size = sum(len(text.encode("utf-8")) for _, text in chunks)
+        print(f"{exchange['method']:<7}{exchange['path'][:59]:<60}{exchange['status']:>7}{len(chunks):>8}"
+              f"{size:>9}{exchange['headers_ms']:>12.1f}{first:>10.1f}{last:>10.1f}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["record", "synthesize", "serve", "show"])
+    parser.add_argument("fixture", help="Fixture file (.jsonl, or .jsonl.gz to compress)")
+    parser.add_argument("--base-url", default=os.getenv("LLAMA_STACK_ENDPOINT", "http://localhost:5000"),
+                        help="Llama Stack server to record from")
+    parser.add_argument("--model", default=os.getenv("INFERENCE_MODEL"))
+    parser.add_argument("--prompt", action="append", dest="prompts", help="Prompt to record (repeatable)")
+    parser.add_argument("--tokens", type=int, default=200, help="Answer length of a synthesized turn")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Replay speed: 1 = recorded timing, 0 = as fast as possible")
+    parser.add_argument("--capacity", type=int,
+                        help="Streams served at full speed; more share it (default: unlimited)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    if args.command == "record":
+        count = record(args.fixture, args.base_url, args.prompts or ["how to do great work?"], model_id=args.model)
+        print(f"Recorded {count} exchanges to {args.fixture}")
+    elif args.command == "synthesize":
+        exchanges = synthetic_session(tokens=args.tokens)
+        with _open(args.fixture, "w") as f:
+            f.writelines(json.dumps(exchange, separators=(",", ":")) + "\n" for exchange in exchanges)
+        print(f"Wrote {len(exchanges)} synthetic exchanges to {args.fixture}")
+    elif args.command == "show":
+        show(args.fixture)
+    else:
+        server = ReplayServer((args.host, args.port), load_fixture(args.fixture), speed=args.speed,
+                              capacity=args.capacity)
+        print(f"Replaying {args.fixture} on {server.url} (speed {args.speed or 'unthrottled'})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        print(f"\nServer stopped after {server.replayed} replayed requests ({server.unmatched} unmatched).")
@@ -0,0 +1,140 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+APP_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(APP_DIR))
+
+from admission import AdmissionController, QueueFull  # noqa: E402
+
+
+async def settle():
+    """Let queued tasks run until they block again."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def enqueue(admission, user_id, label, admitted, positions=None):
+    async def on_wait(position):
+        positions.append(position)
+
+    async def turn():
+        await admission.acquire(user_id, on_wait if positions is not None else None)
+        admitted.append(label)
+
+    return asyncio.ensure_future(turn())
+
+
+def test_queue_is_served_round_robin_across_users():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queued=8, max_queued_per_user=4)
+        await admission.acquire("holder")
+        admitted = []
+        tasks = [enqueue(admission, user, label, admitted)
+                 for user, label in [("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1"), ("c", "c1")]]
+        await settle()
+        for _ in tasks:
+            admission.release()
+            await settle()
+        await asyncio.gather(*tasks)
+        return admitted
+
+    assert asyncio.run(scenario()) == ["a1", "b1", "c1", "a2", "a3"]
+
+
+def test_positions_are_reported_as_the_queue_moves():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1)
+        await admission.acquire("holder")
+        admitted, positions = [], {"a1": [], "a2": [], "b1": []}
+        tasks = [enqueue(admission, user, label, admitted, positions[label])
+                 for user, label in [("a", "a1"), ("a", "a2"), ("b", "b1")]]
+        await settle()
+        for _ in tasks:
+            admission.release()
+            await settle()
+        await asyncio.gather(*tasks)
+        return positions
+
+    # b1 joins the round ahead of a2: one turn per user per round
+    assert asyncio.run(scenario()) == {"a1": [1], "a2": [2, 3, 2, 1], "b1": [2, 1]}
+
+
+def test_shed_when_the_queue_is_full():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queued=1)
+        await admission.acquire("holder")
+        waiting = enqueue(admission, "a", "a1", [])
+        await settle()
+        with pytest.raises(QueueFull, match="capacity"):
+            await admission.acquire("b")
+        waiting.cancel()
+        return admission
+
+    assert asyncio.run(scenario()).stats.shed == 1
+
+
+def test_shed_when_the_user_already_has_turns_queued():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queued=8, max_queued_per_user=1)
+        await admission.acquire("holder")
+        waiting = enqueue(admission, "a", "a1", [])
+        await settle()
+        with pytest.raises(QueueFull, match="already have messages waiting"):
+            await admission.acquire("a")
+        waiting.cancel()
+        return admission
+
+    assert asyncio.run(scenario()).stats.shed == 1
+
+
+def test_shed_after_max_wait_leaves_the_queue():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_wait=0.05)
+        await admission.acquire("holder")
+        with pytest.raises(QueueFull, match="too busy"):
+            await admission.acquire("a")
+        return admission
+
+    admission = asyncio.run(scenario())
+    assert (admission.stats.shed, admission.queued, admission.in_flight) == (1, 0, 1)
+
+
+def test_cancelled_waiter_is_removed_from_the_queue():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1)
+        await admission.acquire("holder")
+        admitted = []
+        cancelled = enqueue(admission, "a", "a1", admitted)
+        waiting = enqueue(admission, "b", "b1", admitted)
+        await settle()
+        cancelled.cancel()
+        await settle()
+        assert admission.queued == 1
+        admission.release()
+        await waiting
+        admission.release()
+        return admission, admitted
+
+    admission, admitted = asyncio.run(scenario())
+    assert admitted == ["b1"]
+    assert (admission.in_flight, admission.queued) == (0, 0)
+
+
+def test_waiter_cancelled_as_it_is_admitted_releases_its_slot():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1)
+        await admission.acquire("holder")
+        waiting = enqueue(admission, "a", "a1", [])
+        await settle()
+        admission.release()  # Hands the slot to a1 ...
+        assert admission.in_flight == 1
+        waiting.cancel()  # ... which is cancelled before it resumes
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        return admission
+
+    admission = asyncio.run(scenario())
+    assert (admission.in_flight, admission.queued, admission.stats.admitted) == (0, 0, 1)
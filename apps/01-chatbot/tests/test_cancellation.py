@@ -0,0 +1,56 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("llama_stack_client")
+
+APP_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(APP_DIR))
+
+from llama_stack_client import Agent, LlamaStackClient  # noqa: E402
+
+from cancellation import TurnCancelled, TurnScope, cancellable_http_client  # noqa: E402
+from event_stream import TextDelta, aiter_turn_events  # noqa: E402
+from stream_fixtures import start_replay_server, synthetic_session  # noqa: E402
+
+PROMPT = [{"role": "user", "content": "how to do great work?"}]
+
+
+@pytest.fixture
+def server():
+    # Recorded timing: 200 tokens at 25 ms each, so the turn is still streaming when it is cancelled
+    server = start_replay_server(synthetic_session(tokens=200), speed=1)
+    yield server
+    server.shutdown()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_cancelled_turn_aborts_the_server_stream(server):
+    client = LlamaStackClient(base_url=server.url, http_client=cancellable_http_client())
+    agent = Agent(client, model="replay", instructions="")
+    session_id = agent.create_session("test_session")
+    scope = TurnScope()
+
+    async def run():
+        start_turn = lambda: agent.create_turn(messages=PROMPT, session_id=session_id, stream=True)
+        async for event in aiter_turn_events(start_turn, scope):
+            if type(event) is TextDelta and scope.text_deltas >= 3:
+                scope.cancel()
+
+    started = time.perf_counter()
+    with pytest.raises(TurnCancelled):
+        asyncio.run(run())
+    assert time.perf_counter() - started < 3  # Not the 5 s the whole answer takes
+
+    assert wait_for(lambda: server.aborted == 1)
+    assert server.unsent_chunks > 0
+    assert 3 <= scope.text_deltas < 200
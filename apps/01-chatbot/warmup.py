@@ -0,0 +1,138 @@
+"""Load the chatbot's models before the first question, and keep them loaded while it is in use.
+
+Ollama loads a model on its first request and unloads it after
+`OLLAMA_KEEP_ALIVE` without requests, so the first question of the day
+pays for the load. `warm_up` sends a one-token completion and a one-word
+embedding at startup, twice each, and reports the cold and warm latency.
+`KeepAlive` repeats that in the background, but only while users have been
+active recently and the models have not been used meanwhile. An idle
+chatbot still lets the models unload.
+
+    CHAT_WARMUP=0                       skip the warm-up
+    CHAT_KEEPALIVE_SECONDS=240          ping interval; 0 disables the pinger
+    CHAT_KEEPALIVE_IDLE_SECONDS=3600    stop pinging after this long without users
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from latency_stats import fmt_seconds
+
+
+@dataclass
+class WarmupReport:
+    """Latencies in seconds; the first call of each kind includes any model load."""
+    inference_cold: Optional[float] = None  # time to first token
+    inference_warm: Optional[float] = None
+    embedding_cold: Optional[float] = None
+    embedding_warm: Optional[float] = None
+
+    def __str__(self):
+        return (f"Inference TTFT cold {fmt_seconds(self.inference_cold, 3)} / warm {fmt_seconds(self.inference_warm, 3)} | "
+                f"Embedding cold {fmt_seconds(self.embedding_cold, 3)} / warm {fmt_seconds(self.embedding_warm, 3)}")
+
+
+def time_to_first_token(client, model_id) -> float:
+    """Seconds until the first token of a one-token chat completion."""
+    start = time.perf_counter()
+    stream = client.inference.chat_completion(
+        model_id=model_id,
+        messages=[{"role": "user", "content": "Hi"}],
+        sampling_params={"max_tokens": 1},
+        stream=True,
+    )
+    try:
+        for chunk in stream:
+            if chunk.event.event_type == "progress":
+                break
+    finally:
+        stream.close()
+    return time.perf_counter() - start
+
+
+def embedding_latency(client, embedding_model_id) -> float:
+    start = time.perf_counter()
+    client.inference.embeddings(model_id=embedding_model_id, contents=["warm-up"])
+    return time.perf_counter() - start
+
+
+def _measure(label, fn, *args):
+    try:
+        return fn(*args)
+    except Exception as e:  # A failed warm-up must not keep the app from starting
+        print(f"⚠️ Warm-up {label} failed: {e}")
+        return None
+
+
+def warm_up(client, model_id, embedding_model_id=None) -> WarmupReport:
+    report = WarmupReport()
+    report.inference_cold = _measure("inference", time_to_first_token, client, model_id)
+    if report.inference_cold is not None:
+        report.inference_warm = _measure("inference", time_to_first_token, client, model_id)
+    if embedding_model_id:
+        report.embedding_cold = _measure("embedding", embedding_latency, client, embedding_model_id)
+        if report.embedding_cold is not None:
+            report.embedding_warm = _measure("embedding", embedding_latency, client, embedding_model_id)
+    return report
+
+
+class KeepAlive:
+    """Background pinger that keeps the models loaded while the chatbot has users.
+
+    Call `touch()` on every user request. Every `interval` seconds the models
+    are pinged, unless they were used within the interval anyway or nobody
+    has used the chatbot for `idle_after` seconds.
+    """
+
+    def __init__(self, client, model_id, embedding_model_id=None, interval=240.0, idle_after=3600.0):
+        self.client = client
+        self.model_id = model_id
+        self.embedding_model_id = embedding_model_id
+        self.interval = interval
+        self.idle_after = idle_after
+        self.pings = 0
+        self.last_ttft = None
+        self._last_activity = None  # Last user request
+        self._last_use = None  # Last request or ping
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls, client, model_id, embedding_model_id=None):
+        return cls(client, model_id, embedding_model_id,
+                   interval=float(os.getenv("CHAT_KEEPALIVE_SECONDS", "240")),
+                   idle_after=float(os.getenv("CHAT_KEEPALIVE_IDLE_SECONDS", "3600")))
+
+    def touch(self):
+        self._last_activity = self._last_use = time.monotonic()
+
+    def due(self) -> bool:
+        if self._last_activity is None:
+            return False
+        now = time.monotonic()
+        return now - self._last_activity < self.idle_after and now - self._last_use >= self.interval
+
+    def ping(self):
+        self.last_ttft = _measure("keep-alive inference", time_to_first_token, self.client, self.model_id)
+        if self.embedding_model_id:
+            _measure("keep-alive embedding", embedding_latency, self.client, self.embedding_model_id)
+        self._last_use = time.monotonic()
+        self.pings += 1
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="model-keep-alive", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # Check several times per interval, so a ping follows the last use by about `interval`
+        while not self._stop.wait(max(self.interval / 8, 1.0)):
+            if self.due():
+                self.ping()
@@ -0,0 +1,204 @@
+# vector_store_ingest.py
+# Parallel file ingestion into Llama Stack vector stores for file_search.
+
+"""Parallel file ingestion into vector stores for the Responses API file_search tool.
+
+The helpers here work with both the Llama Stack client and the OpenAI client
+pointed at Llama Stack, since both expose the same `files` and `vector_stores`
+APIs:
+
+- Downloads are streamed to disk in chunks rather than held in memory.
+- Uploads run concurrently in a thread pool.
+- Files are attached with a single `vector_stores.file_batches` call when the
+  server supports it, falling back to concurrent per-file attachment.
+- Ingestion status is polled with exponential backoff, so callers only get
+  control back once every file is indexed (or has failed), and queries never
+  race an incomplete ingestion.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+from urllib.parse import urlparse
+
+import requests
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+DEFAULT_MAX_WORKERS = 8
+
+# HTTP status codes that mean "this server does not implement file batches"
+_UNSUPPORTED_STATUS_CODES = (404, 405, 501)
+
+
+@dataclass
+class IngestionResult:
+    """Outcome of ingesting one file into a vector store."""
+    source: str
+    file_id: Optional[str] = None
+    status: str = "pending"
+    chunks: Optional[int] = None
+    usage_bytes: Optional[int] = None
+    upload_seconds: float = 0.0
+    total_seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def download_file(url: str, dest_dir: str = ".", filename: Optional[str] = None,
+                  chunk_size: int = DOWNLOAD_CHUNK_SIZE, overwrite: bool = False) -> Path:
+    """Stream a file from `url` to `dest_dir` in chunks and return its path.
+
+    The download goes to a `.part` file that is renamed once complete, so an
+    interrupted download is never mistaken for a finished one. Existing files
+    are reused unless `overwrite` is set.
+    """
+    filepath = Path(dest_dir) / (filename or Path(urlparse(url).path).name)
+    if filepath.exists() and not overwrite:
+        print(f"Using cached download: {filepath}")
+        return filepath
+
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = filepath.with_name(filepath.name + ".part")
+    print(f"Downloading from: {url}")
+    with requests.get(url, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        with open(partial_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+    partial_path.replace(filepath)
+    print(f"Saved as: {filepath} ({filepath.stat().st_size:,} bytes)")
+    return filepath
+
+
+def _is_url(source: str) -> bool:
+    return urlparse(str(source)).scheme in ("http", "https")
+
+
+def _is_unsupported(error: Exception) -> bool:
+    return isinstance(error, AttributeError) or getattr(error, "status_code", None) in _UNSUPPORTED_STATUS_CODES
+
+
+def _upload(client, result: IngestionResult, path: Path, start: float) -> None:
+    try:
+        result.file_id = client.files.create(file=path, purpose="assistants").id
+        result.status = "uploaded"
+    except Exception as e:
+        result.status, result.error = "failed", f"upload failed: {e}"
+    result.upload_seconds = time.perf_counter() - start
+
+
+def _attach(client, vector_store_id: str, results: list, max_workers: int) -> None:
+    """Attach uploaded files, preferring one file_batches call over one call per file."""
+    file_ids = [r.file_id for r in results if r.file_id]
+    if not file_ids:
+        return
+    try:
+        batch = client.vector_stores.file_batches.create(vector_store_id=vector_store_id, file_ids=file_ids)
+        print(f"Attached {len(file_ids)} file(s) with batch {batch.id}")
+        return
+    except Exception as e:
+        if not _is_unsupported(e):
+            raise
+        print("File batches not supported by this server; attaching files individually")
+
+    def attach_one(result: IngestionResult) -> None:
+        try:
+            client.vector_stores.files.create(vector_store_id=vector_store_id, file_id=result.file_id)
+        except Exception as e:
+            result.status, result.error = "failed", f"attach failed: {e}"
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(attach_one, [r for r in results if r.file_id]))
+
+
+def _count_chunks(client, vector_store_id: str, file_id: str) -> Optional[int]:
+    try:
+        contents = client.vector_stores.files.content(file_id=file_id, vector_store_id=vector_store_id)
+    except Exception:
+        return None  # Not every server exposes file contents
+    return len(getattr(contents, "content", None) or getattr(contents, "data", None) or [])
+
+
+def wait_for_ingestion(client, vector_store_id: str, results: list, start: float,
+                       timeout: float = 600.0, initial_delay: float = 0.5,
+                       max_delay: float = 10.0, backoff: float = 2.0) -> None:
+    """Poll each pending file until it leaves `in_progress`, backing off exponentially.
+
+    Updates `results` in place with the final status, chunk count, stored size
+    and time since `start` at which each file was seen finished.
+    """
+    pending = [r for r in results if r.file_id and r.status != "failed"]
+    delay = initial_delay
+    deadline = time.perf_counter() + timeout
+    while pending:
+        still_pending = []
+        for result in pending:
+            vs_file = client.vector_stores.files.retrieve(file_id=result.file_id, vector_store_id=vector_store_id)
+            if vs_file.status == "in_progress":
+                still_pending.append(result)
+                continue
+            result.status = vs_file.status
+            result.usage_bytes = getattr(vs_file, "usage_bytes", None)
+            result.total_seconds = time.perf_counter() - start
+            last_error = getattr(vs_file, "last_error", None)
+            if last_error:
+                result.error = getattr(last_error, "message", str(last_error))
+            if vs_file.status == "completed":
+                result.chunks = _count_chunks(client, vector_store_id, result.file_id)
+        pending = still_pending
+        if not pending:
+            break
+        if time.perf_counter() + delay > deadline:
+            for result in pending:
+                result.status, result.error = "timed_out", f"still in progress after {timeout:.0f}s"
+            break
+        time.sleep(delay)
+        delay = min(delay * backoff, max_delay)
+
+
+def ingest_files(client, vector_store_id: str, sources: Iterable[str], download_dir: str = ".",
+                 max_workers: int = DEFAULT_MAX_WORKERS, timeout: float = 600.0,
+                 verbose: bool = True) -> list:
+    """Download (if needed), upload and index `sources` into a vector store.
+
+    `sources` may mix URLs and local paths. Downloads and uploads run
+    concurrently, and the function only returns once every file has finished
+    ingesting, failed or timed out. Returns one `IngestionResult` per source.
+    """
+    sources = [str(s) for s in sources]
+    results = [IngestionResult(source=s) for s in sources]
+    start = time.perf_counter()
+
+    def fetch_and_upload(result: IngestionResult) -> None:
+        try:
+            path = download_file(result.source, download_dir) if _is_url(result.source) else Path(result.source)
+        except Exception as e:
+            result.status, result.error = "failed", f"download failed: {e}"
+            return
+        _upload(client, result, path, start)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(fetch_and_upload, results))
+
+    _attach(client, vector_store_id, results, max_workers)
+    wait_for_ingestion(client, vector_store_id, results, start, timeout=timeout)
+    if verbose:
+        print_ingestion_report(results, time.perf_counter() - start)
+    return results
+
+
+def print_ingestion_report(results: list, elapsed: Optional[float] = None) -> None:
+    """Print a per-file summary of an ingestion run."""
+    print(f"\n{'Source':<40} {'Status':<10} {'Chunks':>7} {'Bytes':>12} {'Upload s':>9} {'Total s':>8}")
+    print("-" * 90)
+    for r in results:
+        name = Path(urlparse(r.source).path).name or r.source
+        chunks = "-" if r.chunks is None else str(r.chunks)
+        usage = "-" if r.usage_bytes is None else f"{r.usage_bytes:,}"
+        print(f"{name[:40]:<40} {r.status:<10} {chunks:>7} {usage:>12} {r.upload_seconds:>9.2f} {r.total_seconds:>8.2f}")
+        if r.error:
+            print(f"    ⚠️  {r.error}")
+    if elapsed is not None:
+        completed = sum(1 for r in results if r.status == "completed")
+        print(f"\n{completed}/{len(results)} file(s) ingested in {elapsed:.2f}s")
@@ -0,0 +1,179 @@
+# vector_store_registry.py
+# Local registry that lets repeated runs reuse an existing vector store.
+
+"""Reuse vector stores across runs instead of re-creating and re-ingesting them.
+
+A vector store is identified by what went into it: the content hash of the
+corpus, the embedding model and the chunking parameters. The registry is a
+small JSON file mapping that key to the ID of a vector store on the server, so
+a repeated run with the same inputs finds the existing store and skips
+ingestion entirely. The embedding model is resolved before the key is built,
+so a change of the server's default model does not reuse a stale store.
+
+The registry also records every store it created. Stores that were created
+by earlier runs but are no longer referenced from the registry can be
+garbage-collected; stores it did not create (other users, other checkouts,
+other cells of the notebook) are never touched.
+"""
+
+import hashlib
+import json
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable, Optional
+
+from vector_store_ingest import download_file, ingest_files
+
+DEFAULT_REGISTRY_PATH = Path(__file__).parent / ".vector_store_registry.json"
+NAME_PREFIX = "vec_"
+# Stored in the metadata of every store this module creates
+CREATED_BY = {"created_by": "vector_store_registry"}
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path) -> str:
+    """Hash a file's content without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def corpus_hash(paths: Iterable) -> str:
+    """Order-independent content hash of a set of files."""
+    digest = hashlib.sha256()
+    for file_hash in sorted(file_sha256(p) for p in paths):
+        digest.update(file_hash.encode())
+    return digest.hexdigest()
+
+
+def registry_key(corpus: str, embedding_model: Optional[str], chunking_strategy: Optional[dict]) -> str:
+    """Stable key for (corpus content, embedding model, chunking parameters)."""
+    payload = {"corpus": corpus, "embedding_model": embedding_model, "chunking_strategy": chunking_strategy}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def load_registry(registry_path=DEFAULT_REGISTRY_PATH) -> dict:
+    path = Path(registry_path)
+    if not path.exists():
+        return {"version": 2, "stores": {}, "created": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        registry = json.load(f)
+    # Version 1 did not record the stores it created; only its current entries are known to be ours
+    registry.setdefault("created", {e["vector_store_id"]: {"name": e["name"]} for e in registry["stores"].values()})
+    registry["version"] = 2
+    return registry
+
+
+def save_registry(registry: dict, registry_path=DEFAULT_REGISTRY_PATH) -> None:
+    """Write the registry atomically so an interrupted run never leaves it half-written."""
+    path = Path(registry_path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(registry, f, indent=2, sort_keys=True)
+    tmp_path.replace(path)
+
+
+def _store_is_usable(client, vector_store_id: str, expected_files: int) -> bool:
+    try:
+        store = client.vector_stores.retrieve(vector_store_id=vector_store_id)
+    except Exception:
+        return False  # Deleted on the server, or the server was reset
+    completed = getattr(getattr(store, "file_counts", None), "completed", None)
+    return completed is None or completed >= expected_files
+
+
+def resolve_embedding_model(client, embedding_model: Optional[str] = None):
+    """(model ID, dimension) of `embedding_model`, or of the server's first embedding model if not given."""
+    models = [m for m in client.models.list() if getattr(m, "model_type", None) == "embedding"]
+    if embedding_model is None and not models:
+        raise ValueError("The server has no embedding model")
+    model = next((m for m in models if m.identifier == embedding_model), None) if embedding_model else models[0]
+    if model is None:
+        return embedding_model, None
+    return model.identifier, (getattr(model, "metadata", None) or {}).get("embedding_dimension")
+
+
+def get_or_create_vector_store(client, sources: Iterable[str], embedding_model: Optional[str] = None,
+                               chunking_strategy: Optional[dict] = None, download_dir: str = ".",
+                               registry_path=DEFAULT_REGISTRY_PATH) -> str:
+    """Return the ID of a vector store holding `sources`, creating and ingesting it only if needed.
+
+    `sources` may mix URLs and local paths; URLs are downloaded (or taken from
+    the local download cache) so the corpus can be hashed by content.
+    """
+    paths = [download_file(s, download_dir) if re.match(r"^https?://", str(s)) else Path(s) for s in sources]
+    embedding_model, embedding_dimension = resolve_embedding_model(client, embedding_model)
+    key = registry_key(corpus_hash(paths), embedding_model, chunking_strategy)
+
+    registry = load_registry(registry_path)
+    entry = registry["stores"].get(key)
+    if entry and _store_is_usable(client, entry["vector_store_id"], len(paths)):
+        print(f"♻️  Reusing vector store {entry['vector_store_id']} ({entry['name']}); skipping ingestion")
+        return entry["vector_store_id"]
+
+    name = f"{NAME_PREFIX}{str(uuid.uuid4())[0:8]}"
+    create_kwargs = {"name": name, "metadata": CREATED_BY}
+    if chunking_strategy:
+        create_kwargs["chunking_strategy"] = chunking_strategy
+    create_kwargs["extra_body"] = {"embedding_model": embedding_model}
+    if embedding_dimension:
+        create_kwargs["extra_body"]["embedding_dimension"] = embedding_dimension
+    vector_store = client.vector_stores.create(**create_kwargs)
+    print(f"Created vector store {vector_store.id} ({name})")
+    # Recorded before ingesting, so a store left behind by a failed run can still be collected
+    registry["created"][vector_store.id] = {"name": name, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+    save_registry(registry, registry_path)
+
+    results = ingest_files(client, vector_store.id, paths, download_dir=download_dir)
+    if all(r.status == "completed" for r in results):
+        registry["stores"][key] = {
+            "vector_store_id": vector_store.id,
+            "name": name,
+            "sources": [str(p) for p in paths],
+            "embedding_model": embedding_model,
+            "chunking_strategy": chunking_strategy,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        save_registry(registry, registry_path)
+    else:
+        print("⚠️  Ingestion incomplete; not registering this vector store for reuse")
+    return vector_store.id
+
+
+def collect_garbage(client, registry_path=DEFAULT_REGISTRY_PATH, dry_run: bool = False) -> list:
+    """Drop stale registry entries and delete orphaned stores created by this registry.
+
+    A registry entry is stale if its store no longer exists on the server. A
+    store is orphaned if this registry created it but no longer references it
+    (e.g. it was superseded, or its ingestion failed). Stores this registry did
+    not create are never deleted, whatever their name. Returns the IDs of the
+    deleted (or, with `dry_run`, deletable) stores.
+    """
+    registry = load_registry(registry_path)
+    server_stores = {s.id: s for s in client.vector_stores.list()}
+
+    stale_keys = [k for k, e in registry["stores"].items() if e["vector_store_id"] not in server_stores]
+    for key in stale_keys:
+        print(f"Dropping stale registry entry for {registry['stores'][key]['vector_store_id']}")
+        del registry["stores"][key]
+    gone = [store_id for store_id in registry["created"] if store_id not in server_stores]
+    for store_id in gone:
+        del registry["created"][store_id]
+
+    referenced = {e["vector_store_id"] for e in registry["stores"].values()}
+    # Only stores that still carry the marker, in case an ID was reused or the store re-purposed
+    orphans = [store_id for store_id in registry["created"] if store_id not in referenced
+               and (getattr(server_stores[store_id], "metadata", None) or {}).get("created_by") == CREATED_BY["created_by"]]
+    for store_id in orphans:
+        print(f"{'Would delete' if dry_run else 'Deleting'} orphaned vector store {store_id} ({server_stores[store_id].name})")
+        if not dry_run:
+            client.vector_stores.delete(vector_store_id=store_id)
+            del registry["created"][store_id]
+
+    if (stale_keys or gone or orphans) and not dry_run:
+        save_registry(registry, registry_path)
+    return orphans
@@ -0,0 +1,130 @@
+"""Benchmark what a tool-input shield adds to each tool call.
+
+Replays a corpus of recorded tool inputs (one JSON object with `tool_name`
+and `arguments` per line) through `client.safety.run_shield`, sequentially
+and at each requested concurrency, and reports per-check latency
+percentiles, throughput and the allow/deny/error distribution.
+
+Against a running stack:
+
+    python -m toolguard.bench_shields --base-url http://localhost:8321 --shield-id myclinic_toolguard
+
+Offline, against the local stub safety API (simulated 40±10 ms guard):
+
+    python -m toolguard.bench_shields --stub --concurrency 1 8 32 --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from llama_stack_client import LlamaStackClient
+
+from toolguard.verdict_cache import CachedToolGuard, tool_call_message
+
+DEFAULT_CORPUS = Path(__file__).parent / "data" / "tool_inputs.jsonl"
+
+
+@dataclass
+class BenchResult:
+    concurrency: int
+    latencies: list = field(default_factory=list)
+    outcomes: Counter = field(default_factory=Counter)
+    wall_seconds: float = 0.0
+
+    def percentile(self, q: float) -> float:
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0.0
+        return statistics.quantiles(self.latencies, n=100, method="inclusive")[int(q) - 1]
+
+    def print_row(self):
+        checks = len(self.latencies)
+        ms = 1000.0
+        outcomes = ", ".join(f"{k}={v}" for k, v in sorted(self.outcomes.items()))
+        print(f"{self.concurrency:>5} {checks:>7} {self.percentile(50) * ms:>8.1f} {self.percentile(90) * ms:>8.1f} "
+              f"{self.percentile(99) * ms:>8.1f} {max(self.latencies, default=0) * ms:>8.1f} "
+              f"{checks / self.wall_seconds if self.wall_seconds else 0:>10.1f}   {outcomes}")
+
+
+def load_corpus(path) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _classify(response) -> str:
+    violation = getattr(response, "violation", None)
+    if violation is None:
+        return "allow"
+    return "deny" if violation.violation_level == "error" else f"allow ({violation.violation_level})"
+
+
+def run_checks(check, corpus: list, repeat: int, concurrency: int) -> BenchResult:
+    """Run every corpus entry `repeat` times through `check` with `concurrency` workers."""
+    result = BenchResult(concurrency=concurrency)
+    work = [entry for _ in range(repeat) for entry in corpus]
+
+    def timed_check(entry):
+        start = time.perf_counter()
+        try:
+            outcome = _classify(check(entry["tool_name"], entry["arguments"]))
+        except Exception as e:
+            outcome = f"error ({type(e).__name__})"
+        return time.perf_counter() - start, outcome
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, outcome in pool.map(timed_check, work):
+            result.latencies.append(latency)
+            result.outcomes[outcome] += 1
+    result.wall_seconds = time.perf_counter() - start
+    return result
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8321", help="Llama Stack URL")
+    parser.add_argument("--shield-id", default="myclinic_toolguard")
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="JSONL file of recorded tool inputs")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8], help="Concurrency levels (1 = sequential)")
+    parser.add_argument("--repeat", type=int, default=3, help="Times to replay the corpus per level")
+    parser.add_argument("--cache", action="store_true", help="Go through the client-side verdict cache")
+    parser.add_argument("--stub", action="store_true", help="Start and use the local stub safety API")
+    parser.add_argument("--stub-latency-ms", type=float, default=40.0)
+    parser.add_argument("--stub-jitter-ms", type=float, default=10.0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    base_url = args.base_url
+    if args.stub:
+        from toolguard.stub_safety_server import start_stub_server
+        server = start_stub_server(latency_ms=args.stub_latency_ms, jitter_ms=args.stub_jitter_ms)
+        base_url = server.url
+        print(f"Using stub safety API at {base_url} ({args.stub_latency_ms}±{args.stub_jitter_ms} ms per check)")
+
+    corpus = load_corpus(args.corpus)
+    client = LlamaStackClient(base_url=base_url, max_retries=0, timeout=120)
+    print(f"Replaying {len(corpus)} tool inputs x{args.repeat} through shield '{args.shield_id}'\n")
+
+    def run_shield(tool_name, arguments):
+        return client.safety.run_shield(
+            messages=[tool_call_message(tool_name, arguments)], shield_id=args.shield_id, params={})
+
+    run_checks(run_shield, corpus[:1], 1, 1)  # Warm up the connection
+    print(f"{'conc':>5} {'checks':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'checks/s':>10}   outcomes")
+    for concurrency in args.concurrency:
+        guard = CachedToolGuard(client, args.shield_id) if args.cache else None  # Fresh cache per level
+        result = run_checks(guard.check if guard else run_shield, corpus, args.repeat, concurrency)
+        result.print_row()
+        if args.cache:
+            print(f"      cache: {guard.cache.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark local validation of `book_reservation` tool-call arguments.
+
+Reports validations/s for the cached `Draft202012Validator` in
+`tool_registry` on realistic nested passenger, flight and payment arrays,
+and for `jsonschema.validate` as a baseline, which checks the schema and
+builds a new validator on every call.
+
+    python -m toolguard.bench_tool_registry --iterations 20000 --passengers 5
+"""
+
+import argparse
+import json
+import time
+
+import jsonschema
+
+from toolguard.book_reserv import book_resrervation_tool
+from toolguard.tool_registry import ToolArgumentsError, default_registry
+
+
+def make_arguments(passengers: int, flights: int, payments: int) -> dict:
+    """A well-formed book_reservation call of the requested size."""
+    return {
+        "user_id": "sara_doe_496",
+        "origin": "JFK",
+        "destination": "SFO",
+        "flight_type": "round_trip",
+        "cabin": "economy",
+        "flights": [
+            {"flight_number": f"HAT{100 + i:03d}", "date": f"2024-05-{1 + i % 28:02d}"}
+            for i in range(flights)
+        ],
+        "passengers": [
+            {"first_name": f"Passenger{i}", "last_name": "Doe", "dob": f"19{60 + i % 40}-0{1 + i % 9}-15"}
+            for i in range(passengers)
+        ],
+        "payment_methods": [
+            {"payment_id": f"credit_card_{7815826 + i}", "amount": 250 + 10 * i}
+            for i in range(payments)
+        ],
+        "total_baggages": passengers,
+        "nonfree_baggages": 0,
+        "insurance": "no",
+    }
+
+
+def bench(label: str, fn, iterations: int) -> float:
+    fn()  # warm up (and, for the registry, compile)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    rate = iterations / elapsed
+    print(f"{label:<45} {rate:>12,.0f} validations/s  ({elapsed / iterations * 1e6:.1f} µs each)")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--passengers", type=int, default=5)
+    parser.add_argument("--flights", type=int, default=4)
+    parser.add_argument("--payments", type=int, default=2)
+    args = parser.parse_args()
+
+    registry = default_registry()
+    valid = make_arguments(args.passengers, args.flights, args.payments)
+    valid_json = json.dumps(valid)
+    invalid = make_arguments(args.passengers, args.flights, args.payments)
+    invalid["cabin"] = "first"
+    invalid["passengers"][-1].pop("dob")
+    invalid["payment_methods"][0]["amount"] = "250"
+
+    print(f"book_reservation: {args.passengers} passengers, {args.flights} flights, "
+          f"{args.payments} payments, {len(valid_json)} bytes of JSON\n")
+
+    def validate_invalid():
+        try:
+            registry.validate("book_reservation", invalid)
+        except ToolArgumentsError:
+            pass
+
+    cached_rate = bench("cached validator (dict)", lambda: registry.validate("book_reservation", valid), args.iterations)
+    bench("cached validator (JSON string)", lambda: registry.validate("book_reservation", valid_json), args.iterations)
+    bench("cached validator (invalid, 3 errors)", validate_invalid, args.iterations)
+
+    schema = book_resrervation_tool["parameters"]
+    baseline_rate = bench("jsonschema.validate (per call)", lambda: jsonschema.validate(valid, schema), max(args.iterations // 20, 100))
+    print(f"\nSpeed-up of the cached validator: {cached_rate / baseline_rate:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
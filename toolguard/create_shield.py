@@ -1,29 +1,121 @@
+"""Idempotent shield bootstrap.
 
+Diffs the shields declared in shields.yaml against `shields.list()` and
+registers only the missing or changed ones, concurrently, then warms every
+declared shield with one concurrent smoke check, the harmless tool call in
+its `smoke_check` manifest entry. Re-running it against an up-to-date stack
+costs a single list call plus the warm-up.
+
+The stack cannot update a shield in place, so a changed shield is deleted
+and registered again. Between the two calls the shield does not exist and
+tool calls guarded by it fail; the length of that window is logged.
+
+    python -m toolguard.create_shield [--dry-run] [--no-warm]
+"""
+
+import argparse
 import asyncio
-from llama_stack_client import LlamaStackClient
+import sys
+import time
+
+from llama_stack_client import AsyncLlamaStackClient
+
+from toolguard.shield_orchestrator import DEFAULT_MANIFEST, ShieldConfig, load_shield_configs
+from toolguard.verdict_cache import tool_call_message
 
 LLAMA_STACK_URL = "http://localhost:8321/"
 
-client = LlamaStackClient(base_url=LLAMA_STACK_URL)
+
+def plan_changes(desired: list, existing: list) -> tuple:
+    """Split desired shields into (to_register, to_replace, unchanged) against the registered ones."""
+    registered = {shield.identifier: shield for shield in existing}
+    to_register, to_replace, unchanged = [], [], []
+    for shield in desired:
+        current = registered.get(shield.shield_id)
+        if current is None:
+            to_register.append(shield)
+        elif (current.provider_id != shield.provider_id
+              or (current.params or {}) != shield.params
+              or (shield.provider_shield_id and current.provider_resource_id != shield.provider_shield_id)):
+            to_replace.append(shield)
+        else:
+            unchanged.append(shield)
+    return to_register, to_replace, unchanged
+
+
+async def register_shield(client: AsyncLlamaStackClient, shield: ShieldConfig, replace: bool) -> None:
+    kwargs = {}
+    if shield.provider_shield_id:
+        kwargs["provider_shield_id"] = shield.provider_shield_id
+    if replace:
+        await client.shields.delete(shield.shield_id)
+        deleted_at = time.perf_counter()
+        print(f"⚠️  Deleted shield {shield.shield_id}; it does not exist until it is registered again")
+    try:
+        await client.shields.register(
+            shield_id=shield.shield_id,
+            provider_id=shield.provider_id,
+            params=shield.params,
+            **kwargs,
+        )
+    except Exception:
+        if replace:
+            print(f"❌ Shield {shield.shield_id} was deleted but not registered again; it is missing")
+        raise
+    if replace:
+        print(f"🔁 Replaced shield {shield.shield_id} ({shield.provider_id}); "
+              f"missing for {(time.perf_counter() - deleted_at) * 1000:.0f} ms")
+    else:
+        print(f"➕ Registered shield {shield.shield_id} ({shield.provider_id})")
+
+
+async def warm_shield(client: AsyncLlamaStackClient, shield: ShieldConfig) -> None:
+    shield_id = shield.shield_id
+    message = tool_call_message(shield.smoke_check["tool_name"], shield.smoke_check.get("arguments") or {})
+    start = time.perf_counter()
+    try:
+        resp = await client.safety.run_shield(messages=[message], shield_id=shield_id, params={})
+    except Exception as e:
+        print(f"⚠️  Smoke check for {shield_id} failed: {e}")
+        return
+    outcome = "allowed" if resp.violation is None else f"violation ({resp.violation.violation_level})"
+    print(f"🔥 Warmed {shield_id} in {(time.perf_counter() - start) * 1000:.0f} ms: {outcome}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=LLAMA_STACK_URL, help="Llama Stack URL")
+    parser.add_argument("--manifest", default=str(DEFAULT_MANIFEST))
+    parser.add_argument("--dry-run", action="store_true", help="Only print what would change")
+    parser.add_argument("--no-warm", action="store_true", help="Skip the smoke checks")
+    return parser.parse_args()
+
+
 async def main():
-    shields = client.shields.list()
-    for shield in shields:
-        print(shield.identifier)
-    
-    client.shields.register(
-        shield_id="myclinic_toolguard",
-        params={
-            "path": "../ToolGuardAgent/output/step2_claude4sonnet",
-            "touch_points": ["tool_input"]
-        },
-        provider_id="tool-guard",
-    )
-
-    resp = client.safety.run_shield(messages=[], shield_id="clinic_toolguard", params={})
-    print(resp)
-
-    shields = client.shields.list()
-    for shield in shields:
-        print(shield.identifier)
-
-asyncio.run(main())
+    args = parse_arguments()
+    desired = load_shield_configs(args.manifest)
+    async with AsyncLlamaStackClient(base_url=args.base_url) as client:
+        existing = await client.shields.list()
+        to_register, to_replace, unchanged = plan_changes(desired, existing)
+        print(f"Shields: {len(to_register)} to register, {len(to_replace)} changed, {len(unchanged)} up to date")
+        if args.dry_run:
+            for shield in to_register + to_replace:
+                print(f"   would {'replace' if shield in to_replace else 'register'} {shield.shield_id}")
+            return
+
+        changes = [(shield, False) for shield in to_register] + [(shield, True) for shield in to_replace]
+        results = await asyncio.gather(*[register_shield(client, shield, replace) for shield, replace in changes],
+                                       return_exceptions=True)
+        failed = set()
+        for (shield, _), result in zip(changes, results):
+            if isinstance(result, BaseException):
+                print(f"❌ Could not register shield {shield.shield_id}: {result}")
+                failed.add(shield.shield_id)
+        if not args.no_warm:
+            await asyncio.gather(*[warm_shield(client, shield) for shield in desired
+                                   if shield.shield_id not in failed])
+        if failed:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
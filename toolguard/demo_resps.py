@@ -1,31 +1,69 @@
 
 import asyncio
 import datetime
+import time
+from pathlib import Path
 
-import markdown
-from llama_stack_client import LlamaStackClient
+from llama_stack_client import LlamaStackClient, NotFoundError
+
+# Sibling imports: run as `python demo_resps.py` from this directory
+from policy_loader import PolicyLoader, print_latency_report, print_policy_report
+from stream_printer import print_response_stream
 
 LLAMA_STACK_URL = "http://localhost:8321/"
 MCP_URL = "http://localhost:8765/mcp/"
 LLAMA_STACK_MODEL_ID = "openai/gpt-4o"
+STREAM = True # Render text deltas and tool calls as they arrive
+REUSE_POLICY = True # Send the policy once and chain requests to it with previous_response_id
 
 # from llama_stack.providers.utils.tools.mcp import list_mcp_tools
 # tools_resp = await list_mcp_tools(MCP_URL, {})
 # print(tools_resp.model_dump_json(indent=2))
 
-policy_path = "../ToolGuardAgent/src/appointment_app/clinic_policy_doc.md"
+policy_path = Path(__file__).parent / "../ToolGuardAgent/src/appointment_app/clinic_policy_doc.md"
 
 async def main():
     client = LlamaStackClient(base_url=LLAMA_STACK_URL, max_retries = 0, timeout=600)
 
-    with open(policy_path, 'r', encoding='utf-8') as f:
-        policy_text = markdown.markdown(f.read())
+    policy_loader = PolicyLoader()
+    policy = policy_loader.load(policy_path)
 
     today = datetime.date(2025, 9, 12)
-    instructions = f"Today is the {today.day} of {today.strftime('%B %Y')}.\n{policy_text}"
-    
-    resp = client.responses.create(
+    instructions = f"Today is the {today.day} of {today.strftime('%B %Y')}."
+    previous_response_id = None
+    if REUSE_POLICY:
+        # Instructions are not carried over by previous_response_id, but the
+        # primed response's input (which holds the policy) is.
+        previous_response_id = policy_loader.prime(client, policy, LLAMA_STACK_MODEL_ID)
+    else:
+        instructions = f"{instructions}\n{policy.text}"
+    print_policy_report(policy, reused=REUSE_POLICY)
+
+    started_at = time.perf_counter()
+    try:
+        resp = create_response(client, instructions, previous_response_id)
+    except NotFoundError:
+        # The stack no longer has the primed response (e.g. its store was reset)
+        previous_response_id = policy_loader.prime(client, policy, LLAMA_STACK_MODEL_ID, force=True)
+        started_at = time.perf_counter()
+        resp = create_response(client, instructions, previous_response_id)
+    if STREAM:
+        _, timings = print_response_stream(resp, started_at=started_at)
+        total = timings.total
+    else:
+        print(resp.model_dump_json(indent=2))
+        total = time.perf_counter() - started_at
+        print(f"\n⏱️  Total: {total:.3f}s")
+    # Flip REUSE_POLICY between runs to compare both placements
+    policy_loader.record_latency(policy, LLAMA_STACK_MODEL_ID, REUSE_POLICY, total)
+    print_latency_report(policy_loader.latencies(policy, LLAMA_STACK_MODEL_ID))
+
+
+def create_response(client, instructions, previous_response_id=None):
+    return client.responses.create(
         model=LLAMA_STACK_MODEL_ID,
+        previous_response_id=previous_response_id,
+        stream=STREAM,
         extra_body={
             # "guardrails": ["myclinic_toolguard"],
             "before_toolcall_shield_ids": ["myclinic_toolguard"]
@@ -47,6 +85,5 @@ Pay with credit card which ends with 1234.""",
             } # type: ignore
         ],
     )
-    print(resp.model_dump_json(indent=2))
 
 asyncio.run(main())
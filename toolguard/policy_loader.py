@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_CACHE_DIR = Path(os.getenv("TOOLGUARD_CACHE_DIR", Path.home() / ".cache" / "toolguard"))
+CHARS_PER_TOKEN = 4  # Rough estimate when no tokenizer is installed
+LATENCY_SAMPLES = 20  # Request latencies kept per model and policy placement
+
+_MD_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_MD_EMPHASIS = re.compile(r"(\*\*|\*|`)(?=\S)(.+?)(?<=\S)\1")
+# Underscores only mark emphasis at word boundaries, so snake_case names survive
+_MD_UNDERSCORE_EMPHASIS = re.compile(r"(?<!\w)(__|_)(?=\S)(.+?)(?<=\S)\1(?!\w)")
+_MD_HEADER = re.compile(r"^\s{0,3}#{1,6}\s*(.*?)\s*#*\s*$")
+_MD_BULLET = re.compile(r"^(\s*)(?:[*+-]|\d+[.)])\s+")
+_MD_RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+
+
+@dataclass
+class Policy:
+    path: str
+    sha256: str
+    text: str  # compact plain-text rendering sent to the model
+    source_chars: int
+    html_tokens: Optional[int] = None  # size of the markdown.markdown() rendering, if available
+    load_seconds: float = 0.0
+    cache_hit: str = "none"  # memory, disk or none
+
+
+def markdown_to_text(source: str) -> str:
+    """Render policy markdown as compact plain text.
+
+    Keeps headings, list structure and code verbatim but drops markup the
+    model does not need (emphasis, link targets, rules, HTML), trims trailing
+    whitespace and collapses runs of blank lines.
+    """
+    lines = []
+    in_code = False
+    for line in source.splitlines():
+        if line.strip().startswith("```"):
+            in_code = not in_code
+            continue
+        if in_code:
+            lines.append(line.rstrip())
+            continue
+        if _MD_RULE.match(line):
+            continue
+        header = _MD_HEADER.match(line)
+        if header:
+            line = header.group(1)
+        line = _MD_BULLET.sub(r"\1- ", line)
+        line = _MD_LINK.sub(r"\1", line)
+        line = _MD_EMPHASIS.sub(r"\2", line)
+        line = _MD_UNDERSCORE_EMPHASIS.sub(r"\2", line)
+        line = re.sub(r"<[^>]+>", "", line)
+        line = re.sub(r"[ \t]+", " ", line).rstrip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def estimate_tokens(text: str) -> int:
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("o200k_base").encode(text))
+    except Exception:  # tiktoken missing, or its encoding files cannot be downloaded
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class PolicyLoader:
+    """Loads policy documents, caching the rendered text by file mtime and content hash.
+
+    An unchanged file (same mtime and size) is served from memory without being
+    read. A file whose content hash has been rendered before (in this or an
+    earlier process) is served from the on-disk cache without re-rendering.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir) / "policies"
+        self._memory = {}  # path -> (mtime_ns, size, Policy)
+
+    def _disk_path(self, sha256: str) -> Path:
+        return self.cache_dir / f"{sha256}.json"
+
+    def _read_disk(self, sha256: str) -> Optional[dict]:
+        try:
+            with open(self._disk_path(sha256), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, sha256: str, entry: dict) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._disk_path(sha256).with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        tmp_path.replace(self._disk_path(sha256))
+
+    def load(self, path: str) -> Policy:
+        start = time.perf_counter()
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        cached = self._memory.get(path)
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+            policy = cached[2]
+            policy.cache_hit, policy.load_seconds = "memory", time.perf_counter() - start
+            return policy
+
+        with open(path, "r", encoding="utf-8") as f:
+            source = f.read()
+        sha256 = hashlib.sha256(source.encode()).hexdigest()
+        entry = self._read_disk(sha256)
+        cache_hit = "disk"
+        if entry is None:
+            cache_hit = "none"
+            entry = {"text": markdown_to_text(source), "html_tokens": None, "primed_responses": {}}
+            try:
+                import markdown
+                entry["html_tokens"] = estimate_tokens(markdown.markdown(source))
+            except ImportError:
+                pass
+            self._write_disk(sha256, entry)
+
+        policy = Policy(path=path, sha256=sha256, text=entry["text"], source_chars=len(source),
+                        html_tokens=entry.get("html_tokens"), cache_hit=cache_hit)
+        self._memory[path] = (st.st_mtime_ns, st.st_size, policy)
+        policy.load_seconds = time.perf_counter() - start
+        return policy
+
+    def primed_response_id(self, policy: Policy, model: str) -> Optional[str]:
+        entry = self._read_disk(policy.sha256) or {}
+        return (entry.get("primed_responses") or {}).get(model)
+
+    def prime(self, client, policy: Policy, model: str, force: bool = False) -> str:
+        """Return the ID of a stored response that already carries `policy` in its context.
+
+        Later requests pass it as `previous_response_id` and send only the new
+        input instead of the whole policy. The ID is cached on disk per policy
+        hash and model, so the client uploads the policy once, not once per
+        run. The stack still replays the primed input to the model on every
+        request, so the model reads (and bills) the policy tokens each time.
+        """
+        response_id = None if force else self.primed_response_id(policy, model)
+        if response_id:
+            return response_id
+        response = client.responses.create(
+            model=model,
+            input=[
+                {"role": "system", "content": policy.text},
+                {"role": "user", "content": "Acknowledge that you will follow this policy. Reply with OK only."},
+            ],
+            store=True,
+        )
+        entry = self._read_disk(policy.sha256) or {"text": policy.text, "html_tokens": policy.html_tokens}
+        entry.setdefault("primed_responses", {})[model] = response.id
+        self._write_disk(policy.sha256, entry)
+        return response.id
+
+    def record_latency(self, policy: Policy, model: str, reused: bool, seconds: float) -> None:
+        """Keep the latency of a request sent with (`reused`) or without the primed response."""
+        entry = self._read_disk(policy.sha256) or {"text": policy.text, "html_tokens": policy.html_tokens}
+        samples = entry.setdefault("latencies", {}).setdefault(model, {}).setdefault(_placement(reused), [])
+        samples.append(seconds)
+        del samples[:-LATENCY_SAMPLES]
+        self._write_disk(policy.sha256, entry)
+
+    def latencies(self, policy: Policy, model: str) -> dict:
+        """Recorded request latencies for `model`, by placement ("primed" or "instructions")."""
+        entry = self._read_disk(policy.sha256) or {}
+        return (entry.get("latencies") or {}).get(model) or {}
+
+
+def _placement(reused: bool) -> str:
+    return "primed" if reused else "instructions"
+
+
+def print_policy_report(policy: Policy, reused: bool) -> None:
+    """Print how the policy was loaded, its rendered size and where the request carries it."""
+    text_tokens = estimate_tokens(policy.text)
+    print(f"📜 Policy {os.path.basename(policy.path)} ({policy.sha256[:12]}): "
+          f"loaded in {policy.load_seconds * 1000:.1f} ms (cache: {policy.cache_hit})")
+    baseline = f"~{policy.html_tokens} tokens as HTML" if policy.html_tokens else f"{policy.source_chars} chars as markdown"
+    print(f"   Rendered: ~{text_tokens} tokens as plain text vs {baseline}")
+    if reused:
+        print(f"   Carried as the primed input message via previous_response_id; "
+              f"the model still reads its ~{text_tokens} tokens on every request")
+    else:
+        print(f"   Carried in instructions: ~{text_tokens} tokens on every request")
+
+
+def print_latency_report(latencies: dict) -> None:
+    """Print the median measured request latency with and without the primed response."""
+    parts = []
+    for placement, label in (("primed", "with previous_response_id"), ("instructions", "in instructions")):
+        samples = sorted(latencies.get(placement) or [])
+        median = f"{samples[len(samples) // 2]:.3f}s" if samples else "n/a"
+        parts.append(f"{label}: {median} median of {len(samples)}")
+    print(f"⏱️  Request latency, policy {' | '.join(parts)}")
@@ -0,0 +1,180 @@
+"""Evaluate all shields attached to a touch point concurrently.
+
+Shields run in parallel and the first blocking violation cancels the checks
+still in flight, so a guarded tool call costs the latency of the slowest
+shield that has to answer rather than the sum of all of them. Each shield has
+its own timeout and fail-open / fail-closed behaviour, configured in
+shields.yaml. A touch point without any shield fails closed: a call nothing
+checked is blocked, not allowed.
+
+This is for clients that dispatch tool calls themselves. It does not apply
+to demo_resps.py, whose MCP tools are called by the stack: there the stack
+runs the `before_toolcall_shield_ids` shields one after another, and only
+the stack's configuration can change that.
+
+    python -m toolguard.shield_orchestrator --base-url http://localhost:8321
+"""
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import yaml
+from llama_stack_client import AsyncLlamaStackClient
+
+from toolguard.verdict_cache import tool_call_message
+
+DEFAULT_MANIFEST = Path(__file__).parent / "shields.yaml"
+FAIL_OPEN = "fail_open"
+FAIL_CLOSED = "fail_closed"
+# A harmless call from the clinic policy's tool set, used to load a shield before real traffic arrives
+DEFAULT_SMOKE_CHECK = {"tool_name": "list_physicians", "arguments": {"specialty": "family medicine"}}
+
+
+@dataclass
+class ShieldConfig:
+    shield_id: str
+    touch_points: list = field(default_factory=lambda: ["tool_input"])
+    timeout_s: float = 10.0
+    on_failure: str = FAIL_CLOSED
+    provider_id: Optional[str] = None
+    provider_shield_id: Optional[str] = None
+    params: dict = field(default_factory=dict)  # As registered with the stack
+    smoke_check: dict = field(default_factory=lambda: dict(DEFAULT_SMOKE_CHECK))
+
+    @classmethod
+    def from_manifest_entry(cls, entry: dict) -> "ShieldConfig":
+        on_failure = entry.get("on_failure", FAIL_CLOSED)
+        if on_failure not in (FAIL_OPEN, FAIL_CLOSED):
+            raise ValueError(f"Shield '{entry['shield_id']}': on_failure must be {FAIL_OPEN} or {FAIL_CLOSED}")
+        return cls(
+            shield_id=entry["shield_id"],
+            touch_points=list((entry.get("params") or {}).get("touch_points") or ["tool_input"]),
+            timeout_s=float(entry.get("timeout_s", 10.0)),
+            on_failure=on_failure,
+            provider_id=entry.get("provider_id"),
+            provider_shield_id=entry.get("provider_shield_id"),
+            params=entry.get("params") or {},
+            smoke_check=entry.get("smoke_check") or dict(DEFAULT_SMOKE_CHECK),
+        )
+
+
+@dataclass
+class ShieldOutcome:
+    shield_id: str
+    status: str  # allow, deny, timeout, error, cancelled or unguarded
+    latency: float = 0.0
+    violation: Optional[object] = None
+    error: Optional[str] = None
+    blocking: bool = False
+
+
+@dataclass
+class Verdict:
+    allowed: bool
+    outcomes: list
+    latency: float
+
+    @property
+    def blocked_by(self) -> Optional[ShieldOutcome]:
+        return next((o for o in self.outcomes if o.blocking), None)
+
+
+def load_shield_configs(manifest_path=DEFAULT_MANIFEST) -> list:
+    """Read the enabled shields from a shields.yaml manifest."""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = yaml.safe_load(f) or {}
+    return [ShieldConfig.from_manifest_entry(entry) for entry in manifest.get("shields") or []
+            if entry.get("enabled", True)]
+
+
+class ShieldOrchestrator:
+    """Runs the shields for a touch point concurrently and short-circuits on the first block."""
+
+    def __init__(self, client: AsyncLlamaStackClient, shields: list):
+        self.client = client
+        self.shields = shields
+
+    def shields_for(self, touch_point: str) -> list:
+        return [s for s in self.shields if touch_point in s.touch_points]
+
+    async def _run_shield(self, shield: ShieldConfig, messages: list) -> ShieldOutcome:
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                self.client.safety.run_shield(messages=messages, shield_id=shield.shield_id, params={}),
+                timeout=shield.timeout_s,
+            )
+        except asyncio.TimeoutError:
+            return ShieldOutcome(shield.shield_id, "timeout", time.perf_counter() - start,
+                                 error=f"no answer within {shield.timeout_s}s",
+                                 blocking=shield.on_failure == FAIL_CLOSED)
+        except Exception as e:
+            return ShieldOutcome(shield.shield_id, "error", time.perf_counter() - start, error=str(e),
+                                 blocking=shield.on_failure == FAIL_CLOSED)
+        violation = response.violation
+        denied = violation is not None and violation.violation_level == "error"
+        return ShieldOutcome(shield.shield_id, "deny" if denied else "allow", time.perf_counter() - start,
+                             violation=violation, blocking=denied)
+
+    async def evaluate(self, messages: list, touch_point: str = "tool_input") -> Verdict:
+        """Check `messages` against every shield on `touch_point`; stop at the first blocking outcome.
+
+        Blocks if no shield is attached to `touch_point`.
+        """
+        start = time.perf_counter()
+        shields = self.shields_for(touch_point)
+        if not shields:
+            unguarded = ShieldOutcome("", "unguarded", error=f"no shield is attached to touch point '{touch_point}'",
+                                      blocking=True)
+            return Verdict(allowed=False, outcomes=[unguarded], latency=time.perf_counter() - start)
+        tasks = {asyncio.create_task(self._run_shield(shield, messages)): shield for shield in shields}
+        outcomes = []
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                outcomes.extend(task.result() for task in done)
+                if any(o.blocking for o in outcomes):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+                outcomes.append(ShieldOutcome(tasks[task].shield_id, "cancelled", time.perf_counter() - start))
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        allowed = not any(o.blocking for o in outcomes)
+        return Verdict(allowed=allowed, outcomes=outcomes, latency=time.perf_counter() - start)
+
+    async def check_tool_call(self, tool_name: str, arguments: dict) -> Verdict:
+        return await self.evaluate([tool_call_message(tool_name, arguments)], touch_point="tool_input")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8321", help="Llama Stack URL")
+    parser.add_argument("--manifest", default=str(DEFAULT_MANIFEST))
+    parser.add_argument("--corpus", default=str(Path(__file__).parent / "data" / "tool_inputs.jsonl"))
+    return parser.parse_args()
+
+
+async def main():
+    from toolguard.bench_shields import load_corpus
+
+    args = parse_arguments()
+    shields = load_shield_configs(args.manifest)
+    guarding = [s.shield_id for s in shields if "tool_input" in s.touch_points]
+    print(f"Shields on tool_input: {', '.join(guarding) or 'none, every tool call will be blocked'}")
+    async with AsyncLlamaStackClient(base_url=args.base_url, max_retries=0) as client:
+        orchestrator = ShieldOrchestrator(client, shields)
+        for entry in load_corpus(args.corpus):
+            verdict = await orchestrator.check_tool_call(entry["tool_name"], entry["arguments"])
+            details = ", ".join(f"{o.shield_id}={o.status} ({o.latency * 1000:.0f} ms)" for o in verdict.outcomes)
+            print(f"{'✅' if verdict.allowed else '⛔'} {entry['tool_name']:<22} {verdict.latency * 1000:>6.0f} ms  {details}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
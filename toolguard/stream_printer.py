@@ -0,0 +1,124 @@
+import json
+import sys
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class StreamTimings:
+    """Wall-clock timings of one streamed Responses API call, in seconds."""
+    ttfb: Optional[float] = None  # first event of any kind
+    ttft: Optional[float] = None  # first output text delta
+    total: float = 0.0
+    events: int = 0
+
+    def __str__(self):
+        return (f"TTFB: {_fmt_seconds(self.ttfb)} | TTFT: {_fmt_seconds(self.ttft)} | "
+                f"Total: {_fmt_seconds(self.total)} | Events: {self.events}")
+
+
+def _fmt_seconds(value):
+    return "n/a" if value is None else f"{value:.3f}s"
+
+
+def print_response_stream(stream, out=sys.stdout, started_at=None, registry=None):
+    """Render a `responses.create(stream=True)` stream as it arrives.
+
+    Text deltas are written as they come, MCP tool calls are shown when they
+    start and finish, and file_search results are printed once available.
+    `started_at` should be the `time.perf_counter()` value taken just before
+    the request was sent; it defaults to when iteration starts. If a
+    `ToolRegistry` is given, finished function calls are validated against
+    their schema and malformed ones are reported. Nothing is rejected: by the
+    time the call is printed, the server has already returned or executed it.
+
+    Returns the final response object (or None if the stream ended without
+    one) and the `StreamTimings` of the call.
+    """
+    start = time.perf_counter() if started_at is None else started_at
+    timings = StreamTimings()
+    final_response = None
+    in_text = False
+
+    for event in stream:
+        now = time.perf_counter() - start
+        timings.events += 1
+        if timings.ttfb is None:
+            timings.ttfb = now
+
+        event_type = getattr(event, "type", "")
+        if event_type == "response.output_text.delta":
+            if timings.ttft is None:
+                timings.ttft = now
+            in_text = True
+            out.write(event.delta)
+            out.flush()
+            continue
+
+        if in_text:
+            out.write("\n")
+            in_text = False
+
+        if event_type == "response.created":
+            print(f"ID: {event.response.id} | Model: {event.response.model}", file=out)
+        elif event_type == "response.output_item.added":
+            _print_item_started(event.item, now, out)
+        elif event_type == "response.output_item.done":
+            _print_item_done(event.item, now, out, registry)
+        elif event_type in ("response.completed", "response.incomplete"):
+            final_response = event.response
+        elif event_type == "response.failed":
+            final_response = event.response
+            error = getattr(event.response, "error", None)
+            print(f"❌ Response failed: {getattr(error, 'message', error)}", file=out)
+        elif event_type == "error":
+            print(f"❌ Stream error: {getattr(event, 'message', event)}", file=out)
+
+    if in_text:
+        out.write("\n")
+    timings.total = time.perf_counter() - start
+    print(f"\n⏱️  {timings}", file=out)
+    return final_response, timings
+
+
+def _print_item_started(item, elapsed, out):
+    if item.type == "mcp_call":
+        print(f"\n🛠️  [{elapsed:.2f}s] MCP Tool Call started: {item.name} ({item.server_label})", file=out)
+    elif item.type == "mcp_list_tools":
+        print(f"\n🔧 [{elapsed:.2f}s] Listing tools from MCP server: {item.server_label}", file=out)
+    elif item.type == "file_search_call":
+        print(f"\n🔍 [{elapsed:.2f}s] File search started", file=out)
+    elif item.type == "function_call":
+        print(f"\n🛠️  [{elapsed:.2f}s] Function call started: {item.name}", file=out)
+
+
+def _print_item_done(item, elapsed, out, registry=None):
+    if item.type == "mcp_call":
+        print(f"✅ [{elapsed:.2f}s] MCP Tool Call finished: {item.name}", file=out)
+        print(f"   Arguments: {item.arguments}", file=out)
+        if item.error:
+            print(f"   Error: {item.error}", file=out)
+        elif item.output:
+            try:
+                print(json.dumps(json.loads(item.output), indent=4), file=out)
+            except (TypeError, ValueError):
+                print(f"   {item.output}", file=out)
+    elif item.type == "mcp_list_tools":
+        print(f"✅ [{elapsed:.2f}s] {len(item.tools)} tools available: "
+              f"{', '.join(tool.name for tool in item.tools)}", file=out)
+    elif item.type == "file_search_call":
+        print(f"✅ [{elapsed:.2f}s] File search finished ({item.status})", file=out)
+        print(f"   Queries: {', '.join(item.queries or [])}", file=out)
+        for result in item.results or []:
+            text = (getattr(result, "text", "") or "").replace("\n", " ")
+            print(f"   • {getattr(result, 'filename', '?')} (score {getattr(result, 'score', 0):.3f}): {text[:120]}", file=out)
+    elif item.type == "function_call":
+        print(f"✅ [{elapsed:.2f}s] Function call finished: {item.name}({item.arguments})", file=out)
+        if registry is not None and item.name in registry:
+            from toolguard.tool_registry import ToolArgumentsError, UnknownToolError  # Needs jsonschema
+
+            try:
+                registry.validate_function_call(item)
+            except (ToolArgumentsError, UnknownToolError) as e:
+                print(f"   ❌ Fails schema validation: {e}", file=out)
@@ -0,0 +1,118 @@
+"""A local stand-in for the Llama Stack safety API, for offline shield benchmarks.
+
+Serves `POST /v1/safety/run-shield` with a configurable, simulated guard
+latency and a simple deny rule: a tool call is blocked if its canonical JSON
+matches one of the deny patterns. Point `LlamaStackClient(base_url=...)` at it
+instead of a real stack.
+
+    python -m toolguard.stub_safety_server --port 8399 --latency-ms 40 --jitter-ms 10
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from toolguard.verdict_cache import canonical_json
+
+DEFAULT_DENY_PATTERNS = [
+    r'"membership_discount":"(gold|platinum)"',  # discounts must come from the patient record
+    r'"time":"(2[0-3]|0[0-6]):',  # outside clinic hours
+]
+
+
+class StubSafetyServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=40.0, jitter_ms=0.0, deny_patterns=None):
+        super().__init__(address, _Handler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.deny_patterns = [re.compile(p) for p in (DEFAULT_DENY_PATTERNS if deny_patterns is None else deny_patterns)]
+        self.checks = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def evaluate(self, shield_id: str, messages: list):
+        """Return the violation (or None) for the tool calls in `messages`."""
+        with self._lock:
+            self.checks += 1
+        delay = max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms))
+        time.sleep(delay / 1000)
+        for message in messages:
+            for tool_call in message.get("tool_calls") or []:
+                serialized = canonical_json(tool_call.get("arguments"))
+                for pattern in self.deny_patterns:
+                    if pattern.search(serialized):
+                        return {
+                            "violation_level": "error",
+                            "user_message": f"Tool call '{tool_call.get('tool_name')}' violates the policy",
+                            "metadata": {"shield_id": shield_id, "rule": pattern.pattern},
+                        }
+        return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StubSafetyServer
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real server
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)) or 0)
+        if self.path.rstrip("/") != "/v1/safety/run-shield":
+            self._send(404, {"detail": f"Not found: {self.path}"})
+            return
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            self._send(400, {"detail": "Invalid JSON body"})
+            return
+        violation = self.server.evaluate(request.get("shield_id", ""), request.get("messages") or [])
+        self._send(200, {"violation": violation})
+
+    def _send(self, status: int, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+
+def start_stub_server(host="127.0.0.1", port=0, **kwargs) -> StubSafetyServer:
+    """Start a stub server in a background thread; port 0 picks a free port."""
+    server = StubSafetyServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8399)
+    parser.add_argument("--latency-ms", type=float, default=40.0, help="Simulated guard latency per check")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Uniform +/- jitter added to the latency")
+    parser.add_argument("--deny-pattern", action="append", dest="deny_patterns",
+                        help="Regex matched against the canonical JSON arguments (repeatable)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    server = StubSafetyServer((args.host, args.port), latency_ms=args.latency_ms,
+                              jitter_ms=args.jitter_ms, deny_patterns=args.deny_patterns)
+    print(f"Stub safety API listening on {server.url} (latency {args.latency_ms}±{args.jitter_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print("\nServer stopped.")
@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("llama_stack_client")
+
+from toolguard.create_shield import plan_changes  # noqa: E402
+from toolguard.shield_orchestrator import DEFAULT_MANIFEST, ShieldConfig, load_shield_configs  # noqa: E402
+
+PARAMS = {"path": "policy", "touch_points": ["tool_input"]}
+
+
+def desired(**overrides):
+    fields = dict(shield_id="guard", provider_id="tool-guard", provider_shield_id=None, params=dict(PARAMS))
+    fields.update(overrides)
+    return ShieldConfig(**fields)
+
+
+def registered(**overrides):
+    fields = dict(identifier="guard", provider_id="tool-guard", params=dict(PARAMS), provider_resource_id="guard")
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+@pytest.mark.parametrize("shield, existing, expected", [
+    (desired(), [registered()], "unchanged"),
+    (desired(params={}), [registered(params=None)], "unchanged"),
+    (desired(), [registered(provider_id="llama-guard")], "replace"),
+    (desired(), [registered(params={"path": "other", "touch_points": ["tool_input"]})], "replace"),
+    (desired(provider_shield_id="meta-llama/Llama-Guard-3-1B"), [registered()], "replace"),
+    (desired(provider_shield_id="guard"), [registered()], "unchanged"),
+    (desired(), [], "register"),
+    (desired(), [registered(identifier="other")], "register"),
+], ids=["unchanged", "params-none", "provider-id", "params", "provider-resource-id",
+        "same-provider-resource-id", "new", "new-beside-other"])
+def test_plan_changes(shield, existing, expected):
+    to_register, to_replace, unchanged = plan_changes([shield], existing)
+    plan = {"register": to_register, "replace": to_replace, "unchanged": unchanged}
+    assert {name: len(shields) for name, shields in plan.items()} == {
+        name: int(name == expected) for name in plan}
+
+
+def test_manifest_smoke_checks_use_policy_tools():
+    smoke_checks = {shield.shield_id: shield.smoke_check["tool_name"]
+                    for shield in load_shield_configs(DEFAULT_MANIFEST)}
+    assert smoke_checks["myclinic_toolguard"] == "list_physicians"
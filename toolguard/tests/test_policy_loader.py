@@ -0,0 +1,23 @@
+from toolguard.policy_loader import PolicyLoader, markdown_to_text
+
+
+def test_emphasis_markup_is_dropped():
+    assert markdown_to_text("**Never** book _outside_ of __clinic hours__, see `policy`.") == \
+        "Never book outside of clinic hours, see policy."
+
+
+def test_snake_case_names_survive():
+    source = "- Call book_appointment_slot with the patient_id, then `get_patient_record`."
+    assert markdown_to_text(source) == "- Call book_appointment_slot with the patient_id, then get_patient_record."
+
+
+def test_latencies_are_kept_per_placement(tmp_path):
+    policy_path = tmp_path / "policy.md"
+    policy_path.write_text("# Policy\n\nBe nice.\n", encoding="utf-8")
+    loader = PolicyLoader(cache_dir=tmp_path / "cache")
+    policy = loader.load(str(policy_path))
+    loader.record_latency(policy, "model", reused=True, seconds=1.0)
+    loader.record_latency(policy, "model", reused=False, seconds=2.0)
+    loader.record_latency(policy, "model", reused=False, seconds=3.0)
+    assert loader.latencies(policy, "model") == {"primed": [1.0], "instructions": [2.0, 3.0]}
+    assert PolicyLoader(cache_dir=tmp_path / "cache").load(str(policy_path)).text == "Policy\n\nBe nice."
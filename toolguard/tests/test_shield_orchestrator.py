@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("llama_stack_client")
+
+from toolguard.shield_orchestrator import FAIL_CLOSED, FAIL_OPEN, ShieldConfig, ShieldOrchestrator  # noqa: E402
+
+ALLOW = SimpleNamespace(violation=None)
+DENY = SimpleNamespace(violation=SimpleNamespace(violation_level="error", user_message="denied"))
+
+
+class FakeSafety:
+    """run_shield answers per shield: (delay in seconds, response or exception to raise)."""
+
+    def __init__(self, behaviours):
+        self.behaviours = behaviours
+        self.cancelled = []
+
+    async def run_shield(self, messages, shield_id, params):
+        delay, result = self.behaviours[shield_id]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(shield_id)
+            raise
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def evaluate(behaviours, shields, touch_point="tool_input"):
+    safety = FakeSafety(behaviours)
+    orchestrator = ShieldOrchestrator(SimpleNamespace(safety=safety), shields)
+    verdict = asyncio.run(orchestrator.evaluate([{"role": "user", "content": "hi"}], touch_point))
+    return verdict, safety
+
+
+def statuses(verdict):
+    return {o.shield_id: o.status for o in verdict.outcomes}
+
+
+def test_all_shields_allow():
+    verdict, _ = evaluate({"a": (0, ALLOW), "b": (0.01, ALLOW)}, [ShieldConfig("a"), ShieldConfig("b")])
+    assert verdict.allowed
+    assert statuses(verdict) == {"a": "allow", "b": "allow"}
+
+
+def test_first_block_cancels_the_remaining_shields():
+    verdict, safety = evaluate({"fast": (0, DENY), "slow": (5, ALLOW)}, [ShieldConfig("fast"), ShieldConfig("slow")])
+    assert not verdict.allowed
+    assert verdict.blocked_by.shield_id == "fast"
+    assert statuses(verdict) == {"fast": "deny", "slow": "cancelled"}
+    assert safety.cancelled == ["slow"]
+    assert verdict.latency < 1
+
+
+@pytest.mark.parametrize("on_failure, allowed", [(FAIL_OPEN, True), (FAIL_CLOSED, False)])
+def test_timeout(on_failure, allowed):
+    shields = [ShieldConfig("hung", timeout_s=0.05, on_failure=on_failure), ShieldConfig("ok")]
+    verdict, _ = evaluate({"hung": (5, ALLOW), "ok": (0, ALLOW)}, shields)
+    assert verdict.allowed is allowed
+    assert statuses(verdict)["hung"] == "timeout"
+
+
+@pytest.mark.parametrize("on_failure, allowed", [(FAIL_OPEN, True), (FAIL_CLOSED, False)])
+def test_exception(on_failure, allowed):
+    shields = [ShieldConfig("broken", on_failure=on_failure), ShieldConfig("ok", on_failure=on_failure)]
+    verdict, _ = evaluate({"broken": (0, RuntimeError("provider down")), "ok": (0.01, ALLOW)}, shields)
+    assert verdict.allowed is allowed
+    outcome = next(o for o in verdict.outcomes if o.shield_id == "broken")
+    assert (outcome.status, outcome.error) == ("error", "provider down")
+
+
+def test_touch_point_without_shields_fails_closed():
+    verdict, _ = evaluate({"a": (0, ALLOW)}, [ShieldConfig("a", touch_points=["tool_output"])])
+    assert not verdict.allowed
+    assert [o.status for o in verdict.outcomes] == ["unguarded"]
+
+
+def test_manifest_entries_are_validated():
+    entry = {"shield_id": "s", "provider_id": "p", "params": {"touch_points": ["tool_output"]}, "timeout_s": 3}
+    config = ShieldConfig.from_manifest_entry(entry)
+    assert (config.touch_points, config.timeout_s, config.on_failure) == (["tool_output"], 3.0, FAIL_CLOSED)
+    with pytest.raises(ValueError):
+        ShieldConfig.from_manifest_entry(dict(entry, on_failure="maybe"))
@@ -0,0 +1,58 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from jsonschema import SchemaError
+
+from toolguard.bench_tool_registry import make_arguments
+from toolguard.tool_registry import (ToolArgumentsError, ToolRegistry, UnknownToolError, _validator_for_canonical,
+                                    compiled_validator, default_registry)
+
+
+def test_valid_call_is_returned_parsed():
+    registry = default_registry()
+    arguments = make_arguments(passengers=2, flights=2, payments=1)
+    assert registry.validate("book_reservation", json.dumps(arguments)) == arguments
+    assert registry.validate("list_all_airports", "") == {}
+
+
+def test_invalid_call_reports_every_error_with_its_path():
+    arguments = make_arguments(passengers=2, flights=2, payments=1)
+    arguments["cabin"] = "first"
+    arguments["passengers"][1].pop("dob")
+    arguments["payment_methods"][0]["amount"] = "250"
+    with pytest.raises(ToolArgumentsError) as raised:
+        default_registry().validate("book_reservation", arguments)
+    errors = raised.value.errors
+    assert len(errors) == 3
+    assert any(e.startswith("$.cabin:") for e in errors)
+    assert any(e.startswith("$.passengers[1]:") and "'dob'" in e for e in errors)
+    assert any(e.startswith("$.payment_methods[0].amount:") for e in errors)
+
+
+def test_malformed_json_and_unknown_tools_are_rejected():
+    registry = default_registry()
+    assert registry.errors("book_reservation", "{not json")[0].startswith("$: arguments are not valid JSON")
+    with pytest.raises(UnknownToolError):
+        registry.validate("cancel_reservation", {})
+
+
+def test_function_call_items_are_validated():
+    registry = default_registry()
+    item = SimpleNamespace(name="book_reservation", arguments=json.dumps({"user_id": 1}))
+    with pytest.raises(ToolArgumentsError):
+        registry.validate_function_call(item)
+
+
+def test_validators_are_cached_by_schema():
+    schema = {"type": "object", "properties": {"a": {"type": "integer"}}}
+    same_schema = {"properties": {"a": {"type": "integer"}}, "type": "object"}
+    compiled_validator(schema)
+    cached = _validator_for_canonical.cache_info().currsize
+    compiled_validator(same_schema)
+    assert _validator_for_canonical.cache_info().currsize == cached
+
+
+def test_invalid_schemas_are_rejected_at_registration():
+    with pytest.raises(SchemaError):
+        ToolRegistry([{"type": "function", "name": "broken", "parameters": {"type": "no-such-type"}}])
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+
+from toolguard import verdict_cache
+from toolguard.verdict_cache import CachedToolGuard, VerdictCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(verdict_cache.time, "monotonic", clock)
+    return clock
+
+
+def test_hits_and_misses_are_counted(clock):
+    cache = VerdictCache()
+    key = cache.key("shield", "book_appointment", {"ssn": "12345"})
+    assert cache.get(key) is None
+    cache.put(key, "allow", guard_seconds=0.5)
+    assert cache.get(key) == "allow"
+    assert cache.get(key) == "allow"
+    assert (cache.stats.hits, cache.stats.misses) == (2, 1)
+    assert cache.stats.hit_rate == pytest.approx(2 / 3)
+    assert cache.stats.saved_seconds == pytest.approx(1.0)
+    assert cache.stats.guard_seconds == pytest.approx(0.5)
+
+
+def test_keys_ignore_argument_order_but_not_values(clock):
+    cache = VerdictCache()
+    assert cache.key("shield", "t", {"a": 1, "b": 2}) == cache.key("shield", "t", {"b": 2, "a": 1})
+    assert cache.key("shield", "t", {"a": 1}) != cache.key("shield", "t", {"a": 2})
+    assert cache.key("shield", "t", {"a": 1}) != cache.key("other", "t", {"a": 1})
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = VerdictCache(ttl=10)
+    cache.put("key", "allow", guard_seconds=0.1)
+    clock.now += 10
+    assert cache.get("key") == "allow"
+    clock.now += 0.5
+    assert cache.get("key") is None
+    assert cache.stats.expired == 1
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = VerdictCache(max_entries=2)
+    cache.put("a", 1, guard_seconds=0)
+    cache.put("b", 2, guard_seconds=0)
+    cache.get("a")  # "b" is now the least recently used
+    cache.put("c", 3, guard_seconds=0)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_policy_change_drops_every_verdict(clock, tmp_path):
+    policy = tmp_path / "policy"
+    policy.mkdir()
+    (policy / "rules.md").write_text("Discounts come from the patient record.", encoding="utf-8")
+    cache = VerdictCache(policy_path=str(policy), policy_check_interval=1.0)
+    old_key = cache.key("shield", "t", {})
+    cache.put(old_key, "allow", guard_seconds=0)
+
+    (policy / "rules.md").write_text("Gold members get a discount.", encoding="utf-8")
+    assert cache.key("shield", "t", {}) == old_key  # Not re-checked within the interval
+    clock.now += 1.0
+    new_key = cache.key("shield", "t", {})
+    assert new_key != old_key
+    assert cache.get(old_key) is None
+    assert cache.stats.invalidations == 1
+
+
+def test_missing_policy_path_is_an_error(clock, tmp_path):
+    cache = VerdictCache(policy_path=str(tmp_path / "missing"))
+    with pytest.raises(FileNotFoundError):
+        cache.key("shield", "t", {})
+
+
+def test_guard_calls_the_shield_once_per_distinct_input(clock):
+    calls = []
+
+    def run_shield(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(violation=None)
+
+    guard = CachedToolGuard(SimpleNamespace(safety=SimpleNamespace(run_shield=run_shield)), "shield")
+    assert guard.is_allowed("book_appointment", '{"ssn": "12345"}')
+    assert guard.is_allowed("book_appointment", {"ssn": "12345"})
+    assert guard.is_allowed("book_appointment", {"ssn": "67890"})
+    assert len(calls) == 2
@@ -0,0 +1,117 @@
+"""Local validation of tool-call arguments against the tools' JSON schemas.
+
+Each tool's schema is checked and turned into a jsonschema
+`Draft202012Validator` once, when the tool is registered; validators are
+cached by canonical schema, so tools sharing a schema share one. Validating
+a call then only runs the prebuilt validator.
+
+The registry can only guard calls the client dispatches itself, i.e.
+`function_call` items of function tools. MCP tools (as in demo_resps.py) are
+called by the stack, before the client sees the call, so their arguments
+can only be checked there, by a before-toolcall shield.
+"""
+
+import functools
+import json
+from typing import Callable, Optional
+
+from jsonschema import Draft202012Validator
+
+from toolguard.book_reserv import book_resrervation_tool
+from toolguard.list_airports import list_airports_tool
+
+
+class UnknownToolError(KeyError):
+    """Raised when a tool call names a tool that is not in the registry."""
+
+
+class ToolArgumentsError(ValueError):
+    """Raised when tool-call arguments do not match the tool's JSON schema."""
+
+    def __init__(self, tool_name: str, errors: list):
+        self.tool_name = tool_name
+        self.errors = errors
+        super().__init__(f"Invalid arguments for tool '{tool_name}': " + "; ".join(errors))
+
+
+@functools.lru_cache(maxsize=None)
+def _validator_for_canonical(canonical_schema: str) -> Draft202012Validator:
+    schema = json.loads(canonical_schema)
+    Draft202012Validator.check_schema(schema)
+    return Draft202012Validator(schema)
+
+
+def compiled_validator(schema: dict) -> Callable[[object], list]:
+    """Return a function listing the validation errors of a value against `schema`.
+
+    The underlying validator is built (and the schema checked) on first use
+    and cached by canonical schema.
+    """
+    validator = _validator_for_canonical(json.dumps(schema, sort_keys=True, separators=(",", ":")))
+
+    def validate(value) -> list:
+        return [f"{error.json_path}: {error.message}" for error in validator.iter_errors(value)]
+
+    return validate
+
+
+class ToolRegistry:
+    """Function-tool specs plus their argument validators.
+
+    Register each tool spec once; `validate` then checks tool-call arguments
+    locally with the cached validator, so malformed calls are rejected before
+    they are dispatched or sent to a shield.
+    """
+
+    def __init__(self, tools: Optional[list] = None):
+        self._tools = {}
+        self._validators = {}
+        for tool in tools or []:
+            self.register(tool)
+
+    def register(self, tool: dict) -> None:
+        self._tools[tool["name"]] = tool
+        self._validators[tool["name"]] = compiled_validator(tool.get("parameters") or {})
+
+    def __contains__(self, tool_name: str) -> bool:
+        return tool_name in self._tools
+
+    def specs(self) -> list:
+        """The registered tool specs, as passed in `tools=` to the Responses API."""
+        return list(self._tools.values())
+
+    def errors(self, tool_name: str, arguments) -> list:
+        """Return the validation errors for a call (empty if the call is valid)."""
+        try:
+            self.validate(tool_name, arguments)
+        except ToolArgumentsError as e:
+            return e.errors
+        return []
+
+    def validate(self, tool_name: str, arguments) -> dict:
+        """Validate a call's arguments (a dict or JSON string) and return them parsed.
+
+        Raises `UnknownToolError` for unregistered tools and
+        `ToolArgumentsError` if the arguments do not match the schema.
+        """
+        validator = self._validators.get(tool_name)
+        if validator is None:
+            raise UnknownToolError(tool_name)
+        if isinstance(arguments, (str, bytes)):
+            try:
+                arguments = json.loads(arguments or "{}")
+            except ValueError as e:
+                raise ToolArgumentsError(tool_name, [f"$: arguments are not valid JSON ({e})"]) from e
+        errors = validator(arguments)
+        if errors:
+            raise ToolArgumentsError(tool_name, errors)
+        return arguments
+
+    def validate_function_call(self, item) -> dict:
+        """Validate a `function_call` output item from the Responses API."""
+        return self.validate(item.name, item.arguments)
+
+
+def default_registry() -> ToolRegistry:
+    """Registry with the example airline tools defined in this package."""
+    return ToolRegistry([book_resrervation_tool, list_airports_tool])
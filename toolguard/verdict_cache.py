@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from toolguard.tool_registry import ToolRegistry
+
+
+def canonical_json(value) -> str:
+    """Serialize `value` so that equal tool inputs always give the same string."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def tool_call_message(tool_name: str, arguments: dict, call_id: Optional[str] = None) -> dict:
+    """Wrap one tool call as the assistant message `safety.run_shield` checks at the tool_input touch point."""
+    return {
+        "role": "assistant",
+        "content": "",
+        "stop_reason": "end_of_turn",
+        "tool_calls": [{
+            "call_id": call_id or str(uuid.uuid4()),
+            "tool_name": tool_name,
+            "arguments": arguments,
+        }],
+    }
+
+
+def _policy_files(path: str) -> list:
+    # os.walk yields nothing for a missing path, which would hash as an (unchanging) empty policy
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Policy path not found: {path}")
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for root, _dirs, names in os.walk(path):
+        files.extend(os.path.join(root, name) for name in names)
+    return sorted(files)
+
+
+def policy_signature(path: str) -> tuple:
+    """Cheap change detector for a policy file or directory: (path, mtime, size) of every file."""
+    signature = []
+    for file_path in _policy_files(path):
+        st = os.stat(file_path)
+        signature.append((os.path.relpath(file_path, path), st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+def policy_hash(path: str) -> str:
+    """Content hash of a policy file or of every file under a policy directory."""
+    digest = hashlib.sha256()
+    for file_path in _policy_files(path):
+        digest.update(os.path.relpath(file_path, path).encode())
+        with open(file_path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    invalidations: int = 0
+    saved_seconds: float = 0.0  # guard latency not paid thanks to hits
+    guard_seconds: float = 0.0  # guard latency paid on misses
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self):
+        return (f"hits={self.hits} misses={self.misses} hit_rate={self.hit_rate:.1%} "
+                f"expired={self.expired} invalidations={self.invalidations} "
+                f"guard_time={self.guard_seconds:.3f}s saved={self.saved_seconds:.3f}s")
+
+
+class VerdictCache:
+    """TTL + LRU cache of shield verdicts for tool inputs.
+
+    Entries are keyed on a hash of the shield ID, tool name, canonicalized
+    arguments and the content hash of the policy at `policy_path`. The policy
+    is re-checked (by file mtimes and sizes) at most every
+    `policy_check_interval` seconds; when it changes, every cached verdict is
+    dropped, since they were computed against the old policy.
+    """
+
+    def __init__(self, policy_path: Optional[str] = None, ttl: float = 300.0, max_entries: int = 10000,
+                 policy_check_interval: float = 1.0):
+        self.policy_path = policy_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.policy_check_interval = policy_check_interval
+        self.stats = CacheStats()
+        self._entries = OrderedDict()  # key -> (verdict, stored_at, guard_seconds)
+        self._lock = threading.Lock()
+        self._policy_signature = None
+        self._policy_hash = ""
+        self._policy_checked_at = float("-inf")
+
+    def _current_policy_hash(self) -> str:
+        """Return the policy hash, invalidating the cache if the policy changed. Call with the lock held."""
+        if self.policy_path is None:
+            return ""
+        now = time.monotonic()
+        if now - self._policy_checked_at < self.policy_check_interval:
+            return self._policy_hash
+        self._policy_checked_at = now
+        signature = policy_signature(self.policy_path)
+        if signature != self._policy_signature:
+            new_hash = policy_hash(self.policy_path)
+            if self._policy_signature is not None and new_hash != self._policy_hash:
+                self._entries.clear()
+                self.stats.invalidations += 1
+            self._policy_signature, self._policy_hash = signature, new_hash
+        return self._policy_hash
+
+    def key(self, shield_id: str, tool_name: str, arguments: dict) -> str:
+        with self._lock:
+            policy = self._current_policy_hash()
+        return hashlib.sha256(canonical_json([shield_id, tool_name, arguments, policy]).encode()).hexdigest()
+
+    def get(self, key: str):
+        """Return the cached verdict for `key`, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl:
+                del self._entries[key]
+                self.stats.expired += 1
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            self.stats.saved_seconds += entry[2]
+            return entry[0]
+
+    def put(self, key: str, verdict, guard_seconds: float) -> None:
+        with self._lock:
+            self.stats.guard_seconds += guard_seconds
+            self._entries[key] = (verdict, time.monotonic(), guard_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Drop every cached verdict, e.g. after the shield was re-registered."""
+        with self._lock:
+            self._entries.clear()
+            self.stats.invalidations += 1
+
+
+class CachedToolGuard:
+    """Client-side tool-input check against a shield, with local validation and verdict caching.
+
+    Arguments are first validated against the tool's schema (if a registry is
+    given), so malformed calls never reach the shield. Identical checks under
+    the same policy are then answered from the cache instead of calling
+    `safety.run_shield` again.
+
+    This is for clients that dispatch tool calls themselves (bench_shields.py
+    uses it). demo_resps.py cannot use it: its MCP tool calls are made by the
+    stack, which runs the `before_toolcall_shield_ids` shields itself, uncached.
+    """
+
+    def __init__(self, client, shield_id: str, policy_path: Optional[str] = None,
+                 cache: Optional[VerdictCache] = None, registry: Optional[ToolRegistry] = None):
+        self.client = client
+        self.shield_id = shield_id
+        self.cache = cache or VerdictCache(policy_path=policy_path)
+        self.registry = registry
+
+    def check(self, tool_name: str, arguments):
+        """Return the `run_shield` response for this tool input (possibly cached).
+
+        Raises `ToolArgumentsError` if the registry rejects the arguments.
+        """
+        if self.registry is not None and tool_name in self.registry:
+            arguments = self.registry.validate(tool_name, arguments)
+        elif isinstance(arguments, (str, bytes)):
+            arguments = json.loads(arguments or "{}")
+
+        key = self.cache.key(self.shield_id, tool_name, arguments)
+        verdict = self.cache.get(key)
+        if verdict is not None:
+            return verdict
+
+        start = time.perf_counter()
+        verdict = self.client.safety.run_shield(
+            messages=[tool_call_message(tool_name, arguments)],
+            shield_id=self.shield_id,
+            params={},
+        )
+        self.cache.put(key, verdict, time.perf_counter() - start)
+        return verdict
+
+    def is_allowed(self, tool_name: str, arguments) -> bool:
+        violation = self.check(tool_name, arguments).violation
+        return violation is None or violation.violation_level != "error"